@@ -1,7 +1,17 @@
 """NLP Agent main application."""
-from typing import Dict, Any
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Any, AsyncIterator, Deque, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from app.lexicon import scan
+from app.spec_grammar import apply_parameters, extract_parameters, first_values
 
 
 app = FastAPI(
@@ -24,47 +34,63 @@ class ParseResult(BaseModel):
     confidence: float = 0.0
 
 
+# Batch parsing: parsing is pure Python and holds the GIL, so chunks go to a
+# process pool (several in flight at once) while the event loop streams the
+# finished ones back in order. NLP_BATCH_WORKERS=0 parses in a thread instead.
+BATCH_CHUNK_SIZE = int(os.getenv("NLP_BATCH_CHUNK_SIZE", "256"))
+BATCH_MAX_ITEMS = int(os.getenv("NLP_BATCH_MAX_ITEMS", "100000"))
+BATCH_WORKERS = int(os.getenv("NLP_BATCH_WORKERS", "4"))
+_batch_executor: Optional[Executor] = None
+
+
+def batch_executor() -> Optional[Executor]:
+    """Process pool for batch chunks, started on first use (None when disabled)."""
+    global _batch_executor
+    if _batch_executor is None and BATCH_WORKERS > 0:
+        _batch_executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _batch_executor
+
+
 @app.get("/health")
 async def health_check():
     """Health check."""
     return {"service": "NLP Agent", "status": "healthy"}
 
 
-@app.post("/parse", response_model=ParseResult)
-async def parse_text(request: ParseRequest):
-    """Parse natural language hardware specification."""
+def analyze_text(text: str) -> Dict[str, Any]:
+    """Parse natural language hardware specification into intent, entities and constraints."""
     # Simplified NLP parsing
-    text_lower = request.text.lower()
+    matches = scan(text)
     
     # Detect intent
     intent = "unknown"
-    if "create" in text_lower or "design" in text_lower or "generate" in text_lower:
+    if matches.has("service_design"):
         intent = "design_creation"
-    elif "optimize" in text_lower:
+    elif matches.has("service_optimize"):
         intent = "optimization"
-    elif "simulate" in text_lower or "emulate" in text_lower:
+    elif matches.has("service_simulate"):
         intent = "simulation"
     
     # Extract entities (simplified)
     entities = {}
-    if "adder" in text_lower:
+    if matches.has("adder"):
         entities["component"] = "adder"
-        entities["bit_width"] = 4 if "4-bit" in text_lower or "4 bit" in text_lower else 8
+        entities["bit_width"] = 4 if matches.has("width_4") else 8
         entities["description"] = "Arithmetic adder circuit"
-    elif "multiplier" in text_lower:
+    elif matches.has("multiplier"):
         entities["component"] = "multiplier"
         entities["bit_width"] = 8
         entities["description"] = "Integer multiplier"
-    elif "alu" in text_lower:
+    elif matches.has("alu"):
         entities["component"] = "alu"
-        entities["bit_width"] = 8 if "8-bit" in text_lower or "8 bit" in text_lower else 16
+        entities["bit_width"] = 8 if matches.has("width_8") else 16
         entities["operations"] = ["ADD", "SUB", "AND", "OR", "XOR"]
         entities["description"] = "Arithmetic Logic Unit"
-    elif "fsm" in text_lower or "state machine" in text_lower:
+    elif matches.has("fsm"):
         entities["component"] = "fsm"
-        entities["states"] = ["red", "green", "yellow"] if "traffic" in text_lower else ["idle", "active", "done"]
+        entities["states"] = ["red", "green", "yellow"] if matches.has("fsm_traffic") else ["idle", "active", "done"]
         entities["description"] = "Finite State Machine"
-    elif "uart" in text_lower:
+    elif matches.has("uart"):
         entities["component"] = "uart_tx"
         entities["baud_rate"] = 115200
         entities["data_bits"] = 8
@@ -73,20 +99,204 @@ async def parse_text(request: ParseRequest):
         entities["component"] = "generic_design"
         entities["description"] = "Custom hardware design"
     
+    # Explicit widths, depths, rates and lists override the defaults above
+    parameters = extract_parameters(text)
+    warnings = apply_parameters(entities, first_values(parameters))
+    if warnings:
+        entities["warnings"] = warnings
+    if parameters:
+        entities["parameters"] = [p._asdict() for p in parameters]
+    
     # Extract constraints
     constraints = {}
-    if "low power" in text_lower or "minimal area" in text_lower:
+    if matches.has("goal_area"):
         constraints["power"] = "low"
         constraints["optimization_goal"] = "area"
-    if "high performance" in text_lower or "fast" in text_lower:
+    if matches.has("goal_speed"):
         constraints["performance"] = "high"
         constraints["optimization_goal"] = "speed"
-    if "timing" in text_lower:
+    if matches.has("timing"):
         constraints["timing_constraint_ns"] = 10.0
+    constraints.update(entities.pop("constraints", {}))
     
-    return ParseResult(
-        intent=intent,
-        entities=entities,
-        constraints=constraints,
-        confidence=0.92,
-    )
+    return {
+        "intent": intent,
+        "entities": entities,
+        "constraints": constraints,
+        "confidence": 0.92,
+    }
+
+
+def _parse_texts(texts: List[str]) -> List[Dict[str, Any]]:
+    """Parse a chunk of texts (runs in a worker process); failures become per-text errors."""
+    results = []
+    for text in texts:
+        try:
+            results.append({"result": analyze_text(text)})
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def _validate(raw: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(text, None) for a valid item, (None, error) otherwise."""
+    try:
+        if isinstance(raw, Exception):
+            raise raw
+        request = ParseRequest(**raw) if isinstance(raw, dict) else ParseRequest(text=raw)
+    except ValidationError as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"]) or "item"
+        return None, f"{field}: {error['msg']}"
+    except (TypeError, ValueError) as e:
+        return None, str(e)
+    return request.text, None
+
+
+async def _json_items(request: Request) -> Tuple[List[Any], Optional[bool]]:
+    """Items from a JSON body: a list of texts/objects, or {"texts": [...], "dedup": bool}."""
+    try:
+        payload = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+
+    dedup = None
+    if isinstance(payload, dict):
+        dedup = payload.get("dedup")
+        payload = payload.get("texts", payload.get("items"))
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a list of texts or {\"texts\": [...]}")
+    return payload, dedup
+
+
+async def _ndjson_items(request: Request) -> List[Any]:
+    """Items from an NDJSON body, one text or {"text", "context"} object per line."""
+    # The body must be fully consumed before the streaming response starts:
+    # its disconnect listener shares the same receive channel
+    items: List[Any] = []
+    partial: List[bytes] = []  # pieces of a line that spans several blocks
+
+    def add(line: bytes):
+        if line.strip():
+            items.append(_decode_line(line))
+            if len(items) > BATCH_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail=f"Batch limit of {BATCH_MAX_ITEMS} items exceeded")
+
+    async for block in request.stream():
+        *lines, rest = block.split(b"\n")
+        if lines:
+            lines[0] = b"".join(partial) + lines[0]
+            partial = []
+            for line in lines:
+                add(line)
+        if rest:
+            partial.append(rest)
+    add(b"".join(partial))
+    return items
+
+
+def _decode_line(line: bytes) -> Any:
+    """Decode one NDJSON line; a bad line is reported as that item's error."""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return ValueError(f"Invalid JSON line: {e}")
+
+
+@app.post("/parse", response_model=ParseResult)
+async def parse_text(request: ParseRequest):
+    """Parse natural language hardware specification."""
+    return ParseResult(**analyze_text(request.text))
+
+
+@app.post("/parse/batch")
+async def parse_batch(request: Request, dedup: bool = True):
+    """
+    Parse many texts in one call.
+
+    Accepts a JSON list (or {"texts": [...], "dedup": bool}) or an NDJSON body
+    (Content-Type: application/x-ndjson) where each line is a text or a
+    {"text", "context"} object. Results stream back as NDJSON in input order,
+    one {"index", "result"} or {"index", "error"} line per item. With dedup,
+    identical texts are parsed once and repeats are flagged "duplicate".
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = await _ndjson_items(request)
+    else:
+        items, body_dedup = await _json_items(request)
+        if body_dedup is not None:
+            dedup = bool(body_dedup)
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch limit of {BATCH_MAX_ITEMS} items exceeded")
+
+    loop = asyncio.get_running_loop()
+    executor = batch_executor()
+    chunks = [items[start:start + BATCH_CHUNK_SIZE] for start in range(0, len(items), BATCH_CHUNK_SIZE)]
+
+    # Only texts not seen before (with dedup) are sent to a worker; repeats
+    # are answered from the first occurrence, which is in the same or an
+    # earlier chunk
+    seen: set = set()
+    plans: List[List[Tuple[Optional[str], Optional[str], bool]]] = []
+    jobs: List[List[str]] = []
+    for chunk in chunks:
+        plan, texts = [], []
+        for raw in chunk:
+            text, error = _validate(raw)
+            duplicate = dedup and text is not None and text in seen
+            if text is not None and not duplicate:
+                texts.append(text)
+                if dedup:
+                    seen.add(text)
+            plan.append((text, error, duplicate))
+        plans.append(plan)
+        jobs.append(texts)
+
+    def submit(texts: List[str]) -> "asyncio.Future":
+        if executor is None:
+            return asyncio.ensure_future(asyncio.to_thread(_parse_texts, texts))
+        return loop.run_in_executor(executor, _parse_texts, texts)
+
+    async def stream() -> AsyncIterator[bytes]:
+        window = max(1, BATCH_WORKERS) * 2
+        pending: Deque["asyncio.Future"] = deque()
+        next_job = 0
+        parsed: Dict[str, Dict[str, Any]] = {}
+        index = 0
+        try:
+            for plan in plans:
+                while next_job < len(jobs) and len(pending) < window:
+                    pending.append(submit(jobs[next_job]))
+                    next_job += 1
+                results = iter(await pending.popleft())
+                lines = []
+                for text, error, duplicate in plan:
+                    if error is not None:
+                        lines.append({"index": index, "error": error})
+                    elif duplicate:
+                        lines.append({"index": index, **parsed[text], "duplicate": True})
+                    else:
+                        outcome = next(results)
+                        if dedup:
+                            parsed[text] = outcome
+                        lines.append({"index": index, **outcome})
+                    index += 1
+                yield b"".join(_line(line) for line in lines)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _line(result: Dict[str, Any]) -> bytes:
+    """Serialize one batch result as an NDJSON line."""
+    return (json.dumps(result) + "\n").encode()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the batch worker pool."""
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+"""Test NLP Agent Batch Parsing."""
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _lines(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.fixture(params=[0, 2], ids=["thread", "pool"])
+def workers(request, monkeypatch):
+    """Run each test with parsing in a thread and on a process pool."""
+    monkeypatch.setattr(main, "BATCH_WORKERS", request.param)
+    monkeypatch.setattr(main, "BATCH_CHUNK_SIZE", 3)
+    monkeypatch.setattr(main, "_batch_executor", None)
+    yield request.param
+    if main._batch_executor is not None:
+        main._batch_executor.shutdown()
+
+
+def test_results_in_input_order(workers):
+    """Test every item gets one line, in input order, matching /parse."""
+    texts = [f"design a {width}-bit adder" for width in range(2, 12)]
+    lines = _lines(client.post("/parse/batch", json=texts))
+    assert [line["index"] for line in lines] == list(range(len(texts)))
+    for text, line in zip(texts, lines):
+        assert line["result"] == client.post("/parse", json={"text": text}).json()
+
+
+def test_per_item_errors(workers):
+    """Test invalid items fail alone without affecting their neighbours."""
+    items = ["design an alu", {"text": 5}, {"context": {}}, "design a uart"]
+    lines = _lines(client.post("/parse/batch", json=items))
+    assert lines[0]["result"]["entities"]["component"] == "alu"
+    assert lines[1]["error"].startswith("text:")
+    assert lines[2]["error"].startswith("text:")
+    assert lines[3]["result"]["entities"]["component"] == "uart_tx"
+
+
+def test_dedup(workers):
+    """Test repeats are flagged duplicate across chunks, and only with dedup."""
+    texts = ["design an alu", "design a fifo", "design an alu", "x", "y", "design a fifo"]
+    lines = _lines(client.post("/parse/batch", json=texts))
+    assert [bool(line.get("duplicate")) for line in lines] == [False, False, True, False, False, True]
+    assert lines[2]["result"] == lines[0]["result"]
+    assert lines[5]["result"] == lines[1]["result"]
+
+    for response in (
+        client.post("/parse/batch?dedup=false", json=texts),
+        client.post("/parse/batch", json={"texts": texts, "dedup": False}),
+    ):
+        assert not any("duplicate" in line for line in _lines(response))
+
+
+def test_ndjson_body(workers):
+    """Test an NDJSON body matches the JSON body, with bad lines reported per item."""
+    items = ["design an alu", {"text": "design a 12-bit adder", "context": {}}, "design a uart"]
+    body = "\n".join(json.dumps(item) for item in items) + "\n"
+    headers = {"Content-Type": "application/x-ndjson"}
+    ndjson = _lines(client.post("/parse/batch", content=body, headers=headers))
+    assert ndjson == _lines(client.post("/parse/batch", json=items))
+
+    lines = _lines(client.post("/parse/batch", content='"design an alu"\n{broken\n\n"design a uart"', headers=headers))
+    assert len(lines) == 3
+    assert lines[1]["error"].startswith("Invalid JSON line")
+    assert lines[2]["result"]["entities"]["component"] == "uart_tx"
+
+
+def test_ndjson_lines_split_across_blocks(workers):
+    """Test lines split over several body blocks are reassembled."""
+    body = "".join(json.dumps(f"design a {width}-bit adder") + "\n" for width in range(2, 9)).encode()
+
+    def blocks():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    response = client.post("/parse/batch", content=blocks(), headers={"Content-Type": "application/x-ndjson"})
+    lines = _lines(response)
+    assert [line["result"]["entities"]["bit_width"] for line in lines] == list(range(2, 9))
+
+
+def test_batch_limit(monkeypatch):
+    """Test batches over NLP_BATCH_MAX_ITEMS are rejected with 413, NDJSON while reading."""
+    monkeypatch.setattr(main, "BATCH_MAX_ITEMS", 3)
+    assert client.post("/parse/batch", json=["a"] * 3).status_code == 200
+    assert client.post("/parse/batch", json=["a"] * 4).status_code == 413
+
+    response = client.post("/parse/batch", content='"a"\n' * 4, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413
+
+    class Body:
+        """Request stub that records how many NDJSON blocks were read."""
+        read = 0
+
+        async def stream(self):
+            for _ in range(10):
+                self.read += 1
+                yield b'"a"\n'
+
+    body = Body()
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(main._ndjson_items(body))
+    assert raised.value.status_code == 413
+    assert body.read == 4  # stopped at the first item over the limit
+
+
+def test_bad_body():
+    """Test a body that is not a list of items is a 400."""
+    assert client.post("/parse/batch", content="{", headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post("/parse/batch", json={"text": "design an alu"}).status_code == 400
+
+
+def test_batch_throughput(monkeypatch):
+    """Test a batch parses at least 10x more items per second than individual /parse calls."""
+    monkeypatch.setattr(main, "BATCH_WORKERS", 0)
+    texts = [f"design a {i % 60 + 2}-bit adder with low power, variant {i}" for i in range(2000)]
+
+    def best_of(runs, fn):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    individual = best_of(3, lambda: [client.post("/parse", json={"text": text}) for text in texts[:200]]) / 200
+    batch = best_of(3, lambda: _lines(client.post("/parse/batch", json=texts))) / len(texts)
+    assert individual / batch >= 10
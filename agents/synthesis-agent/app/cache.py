@@ -0,0 +1,127 @@
+"""Synthesis result cache keyed by a canonical hash of (spec, constraints)."""
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+def _canonical(value: Any) -> Any:
+    """Normalize a value so equivalent specs serialize identically."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=repr)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def cache_key(spec: Dict[str, Any], constraints: Optional[Dict[str, Any]] = None) -> str:
+    """Order-independent SHA-256 hash of a (spec, constraints) pair."""
+    payload = json.dumps(
+        [_canonical(spec or {}), _canonical(constraints or {})],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SynthesisCache:
+    """Two-tier cache: bounded in-memory LRU plus optional SQLite store shared across processes."""
+
+    def __init__(self, max_entries: int = 512, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS synthesis_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL
+                )
+            """)
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached result, promoting disk hits into the LRU tier."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT result FROM synthesis_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return copy.deepcopy(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result in both tiers."""
+        with self._lock:
+            self._remember(key, copy.deepcopy(result))
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO synthesis_cache (key, result) VALUES (?, ?)",
+                    (key, json.dumps(result, default=str))
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        """Insert into the LRU tier, evicting the least recently used entry."""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self._conn is not None,
+        }
+
+    def clear(self):
+        """Drop every cached entry (both tiers)."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM synthesis_cache")
+                self._conn.commit()
+
+    def close(self):
+        """Close the persistent tier."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
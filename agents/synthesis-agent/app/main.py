@@ -1,14 +1,24 @@
 """Synthesis Agent main application."""
+import os
 from typing import Dict, Any, List
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
+from app.cache import SynthesisCache, cache_key
+from app.fsm_encoding import optimize_fsm_encoding
+
 
 app = FastAPI(
     title="SPARTA Synthesis Agent",
     version="0.1.0",
 )
 
+# Memoized results; set SYNTHESIS_CACHE_DB to share them across worker processes
+cache = SynthesisCache(
+    max_entries=int(os.getenv("SYNTHESIS_CACHE_SIZE", "1024")),
+    db_path=os.getenv("SYNTHESIS_CACHE_DB"),
+)
+
 
 class SynthesisRequest(BaseModel):
     """Synthesis request."""
@@ -29,9 +39,30 @@ async def health_check():
     return {"service": "Synthesis Agent", "status": "healthy"}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Synthesis cache hit/miss counters."""
+    return cache.stats()
+
+
 @app.post("/synthesize", response_model=SynthesisResult)
 async def synthesize(request: SynthesisRequest):
     """Synthesize hardware architecture."""
+    key = cache_key(request.spec, request.constraints)
+    cached = cache.get(key)
+    if cached is not None:
+        return SynthesisResult(**cached)
+    
+    try:
+        result = _synthesize(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cache.put(key, result.model_dump())
+    return result
+
+
+def _synthesize(request: SynthesisRequest) -> SynthesisResult:
+    """Compute architecture, components and metrics for a request."""
     component = request.spec.get("component", "unknown")
     bit_width = request.spec.get("bit_width", 8)
     
@@ -66,18 +97,25 @@ async def synthesize(request: SynthesisRequest):
         }
     elif component == "fsm":
         states = request.spec.get("states", ["idle", "active"])
+        goal = request.constraints.get("optimization_goal", "area")
+        encoding = optimize_fsm_encoding(states, request.spec.get("transitions"), goal)
         architecture = {
             "type": "finite_state_machine",
             "num_states": len(states),
-            "states": states,
-            "encoding": "one_hot"
+            "state_names": states,
+            "transitions": request.spec.get("transitions"),
+            "encoding": encoding["encoding"],
+            "state_width": encoding["width"],
+            "state_encoding": encoding["codes"],
+            "encoding_candidates": encoding["candidates"],
         }
         components = ["state_register", "next_state_logic", "output_logic"]
         metrics = {
             "area_mm2": 0.01 * len(states),
             "power_mw": 0.2 * len(states),
             "latency_ns": 3.0,
-            "flip_flops": len(states),
+            "flip_flops": encoding["width"],
+            "logic_literals": encoding["cost"]["logic_literals"],
         }
     else:
         architecture = {
@@ -0,0 +1,212 @@
+"""Assembler for the SPARTA emulator ISA.
+
+Source format::
+
+    ; comments start with ';' or '#'
+    .data 0x100            ; optional base address (default 0x100)
+    count:  .word 10
+    table:  .word 1, 2, 3
+            .space 4       ; reserve zero-filled words
+    .text
+    start:  LOAD r1, count
+    loop:   ADDI r1, r1, -1
+            BNE  r1, r0, loop
+            HALT
+
+Programs are encoded little-endian as a 16-byte header
+(``magic "SPAS"``, version, flags, reserved, instruction count, data count),
+followed by 8-byte instructions (``opcode, rd, rs, rt, imm:i32``) and
+8-byte data words (``address:u32, value:i32``).
+"""
+import re
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+
+MAGIC = b"SPAS"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+INSTRUCTION = struct.Struct("<BBBBi")
+DATA_WORD = struct.Struct("<Ii")
+
+DEFAULT_DATA_BASE = 0x100
+NUM_REGISTERS = 32
+# Upper bound on data words per program (.space reserves them one by one)
+MAX_DATA_WORDS = 1 << 16
+
+# opcode -> (numeric code, operand kinds)
+# kinds: "r" register, "i" immediate, "a" address/label, "t" code label/target
+OPCODES: Dict[str, Tuple[int, Tuple[str, ...]]] = {
+    "NOP": (0, ()),
+    "ADD": (1, ("r", "r", "r")),
+    "SUB": (2, ("r", "r", "r")),
+    "LOAD": (3, ("r", "a")),
+    "STORE": (4, ("r", "a")),
+    "ADDI": (5, ("r", "r", "i")),
+    "JMP": (6, ("t",)),
+    "BEQ": (7, ("r", "r", "t")),
+    "BNE": (8, ("r", "r", "t")),
+    "HALT": (9, ()),
+}
+
+_LABEL = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*):")
+_REGISTER = re.compile(r"^r([0-9]+)$", re.IGNORECASE)
+
+
+class AssemblerError(ValueError):
+    """Raised for malformed assembly, with the offending line number."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+@dataclass
+class Program:
+    """Assembled program."""
+    instructions: List[Tuple[int, int, int, int, int]] = field(default_factory=list)
+    data: List[Tuple[int, int]] = field(default_factory=list)
+    labels: Dict[str, int] = field(default_factory=dict)
+
+    def encode(self) -> bytes:
+        """Serialize to the compact binary format loaded by the emulator."""
+        parts = [HEADER.pack(MAGIC, VERSION, 0, 0, len(self.instructions), len(self.data))]
+        parts.extend(INSTRUCTION.pack(*instr) for instr in self.instructions)
+        parts.extend(DATA_WORD.pack(addr, value) for addr, value in self.data)
+        return b"".join(parts)
+
+
+def _strip(line: str) -> str:
+    """Drop comments and surrounding whitespace."""
+    for marker in (";", "#"):
+        idx = line.find(marker)
+        if idx >= 0:
+            line = line[:idx]
+    return line.strip()
+
+
+def _split_operands(text: str) -> List[str]:
+    """Split a comma separated operand list."""
+    return [op.strip() for op in text.split(",") if op.strip()]
+
+
+def _parse_int(token: str, lineno: int) -> int:
+    """Parse a decimal/hex/binary literal."""
+    try:
+        return int(token, 0)
+    except ValueError:
+        raise AssemblerError(lineno, f"invalid integer literal '{token}'")
+
+
+def _check_word(value: int, lineno: int) -> int:
+    """Ensure a value fits the signed 32-bit immediate/data field."""
+    if not -(1 << 31) <= value < (1 << 31):
+        raise AssemblerError(lineno, f"value {value} does not fit in 32 bits")
+    return value
+
+
+def _check_address(address: int, lineno: int) -> int:
+    """Ensure a data address fits the unsigned 32-bit address field."""
+    if not 0 <= address < (1 << 32):
+        raise AssemblerError(lineno, f"address {address:#x} outside the 32-bit address space")
+    return address
+
+
+def _add_data(program: Program, address: int, value: int, lineno: int):
+    """Append one data word, enforcing the address range and the size limit."""
+    if len(program.data) >= MAX_DATA_WORDS:
+        raise AssemblerError(lineno, f"data section exceeds {MAX_DATA_WORDS} words")
+    program.data.append((_check_address(address, lineno), value))
+
+
+def assemble(source: str) -> Program:
+    """Assemble source text into a Program (two passes: layout, then encode)."""
+    program = Program()
+    pending: List[Tuple[int, str, List[str]]] = []
+    data_cursor = DEFAULT_DATA_BASE
+    section = "text"
+
+    # Pass 1: assign addresses to labels and lay out the data section
+    for lineno, raw in enumerate(source.splitlines(), start=1):
+        line = _strip(raw)
+        if not line:
+            continue
+
+        match = _LABEL.match(line)
+        while match:
+            label = match.group(1)
+            if label in program.labels:
+                raise AssemblerError(lineno, f"duplicate label '{label}'")
+            program.labels[label] = data_cursor if section == "data" else len(pending)
+            line = line[match.end():].strip()
+            match = _LABEL.match(line)
+        if not line:
+            continue
+
+        head, _, rest = line.replace("\t", " ").partition(" ")
+        directive = head.lower()
+
+        if directive == ".text":
+            section = "text"
+        elif directive == ".data":
+            section = "data"
+            if rest.strip():
+                data_cursor = _check_address(_parse_int(rest.strip(), lineno), lineno)
+        elif directive == ".word":
+            if section != "data":
+                raise AssemblerError(lineno, ".word outside .data section")
+            for token in _split_operands(rest):
+                _add_data(program, data_cursor, _check_word(_parse_int(token, lineno), lineno), lineno)
+                data_cursor += 1
+        elif directive == ".space":
+            if section != "data":
+                raise AssemblerError(lineno, ".space outside .data section")
+            count = _parse_int(rest.strip(), lineno)
+            if not 0 <= count <= MAX_DATA_WORDS - len(program.data):
+                raise AssemblerError(
+                    lineno, f".space {count} out of range (at most {MAX_DATA_WORDS} data words per program)"
+                )
+            for _ in range(count):
+                _add_data(program, data_cursor, 0, lineno)
+                data_cursor += 1
+        elif directive.startswith("."):
+            raise AssemblerError(lineno, f"unknown directive '{head}'")
+        else:
+            if section != "text":
+                raise AssemblerError(lineno, "instruction inside .data section")
+            pending.append((lineno, head.upper(), _split_operands(rest)))
+
+    # Pass 2: resolve operands and encode
+    for lineno, mnemonic, operands in pending:
+        if mnemonic not in OPCODES:
+            raise AssemblerError(lineno, f"unknown opcode '{mnemonic}'")
+        code, kinds = OPCODES[mnemonic]
+        if len(operands) != len(kinds):
+            raise AssemblerError(
+                lineno, f"{mnemonic} expects {len(kinds)} operands, got {len(operands)}"
+            )
+
+        registers: List[int] = []
+        imm = 0
+        for kind, token in zip(kinds, operands):
+            if kind == "r":
+                reg = _REGISTER.match(token)
+                if not reg or int(reg.group(1)) >= NUM_REGISTERS:
+                    raise AssemblerError(lineno, f"invalid register '{token}'")
+                registers.append(int(reg.group(1)))
+            elif token in program.labels:
+                imm = program.labels[token]
+            else:
+                # Numeric targets/addresses use the same literal syntax as immediates
+                try:
+                    imm = int(token, 0)
+                except ValueError:
+                    raise AssemblerError(lineno, f"undefined label '{token}'")
+
+        _check_word(imm, lineno)
+        registers += [0] * (3 - len(registers))
+        program.instructions.append((code, registers[0], registers[1], registers[2], imm))
+
+    return program
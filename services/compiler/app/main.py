@@ -1,5 +1,14 @@
 """Compiler Service main application."""
-from fastapi import FastAPI
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.assembler import HEADER, AssemblerError, assemble
 
 
 app = FastAPI(
@@ -7,8 +16,75 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Compiled programs keyed by program id (derived from the source hash)
+MAX_CACHED_PROGRAMS = int(os.getenv("COMPILER_CACHE_SIZE", "256"))
+program_cache: "OrderedDict[str, Tuple[bytes, Dict[str, int]]]" = OrderedDict()
+
+
+class CompileRequest(BaseModel):
+    """Assembly compile request."""
+    source: str
+
+
+class CompileResult(BaseModel):
+    """Assembly compile result."""
+    program_id: str
+    size_bytes: int
+    instruction_count: int
+    data_words: int
+    labels: Dict[str, int] = {}
+    cached: bool = False
+
+
+def program_id_for(source: str) -> str:
+    """Stable program id derived from the source text."""
+    return "prog-" + hashlib.sha256(source.encode("utf-8")).hexdigest()[:24]
+
+
+def _cache_program(program_id: str, binary: bytes, labels: Dict[str, int]):
+    """Store a compiled program, evicting the least recently used."""
+    program_cache[program_id] = (binary, labels)
+    program_cache.move_to_end(program_id)
+    while len(program_cache) > MAX_CACHED_PROGRAMS:
+        program_cache.popitem(last=False)
+
+
+def _describe(binary: bytes) -> Dict[str, int]:
+    """Read counts back out of an encoded program header."""
+    _, _, _, _, n_instr, n_data = HEADER.unpack_from(binary)
+    return {"size_bytes": len(binary), "instruction_count": n_instr, "data_words": n_data}
+
 
 @app.get("/health")
 async def health_check():
     """Health check."""
     return {"service": "Compiler", "status": "healthy"}
+
+
+@app.post("/compile", response_model=CompileResult)
+async def compile_program(request: CompileRequest):
+    """Assemble source into the emulator's binary format and cache it."""
+    program_id = program_id_for(request.source)
+    cached = program_cache.get(program_id)
+    if cached is not None:
+        program_cache.move_to_end(program_id)
+        binary, labels = cached
+        return CompileResult(program_id=program_id, labels=labels, cached=True, **_describe(binary))
+
+    try:
+        program = assemble(request.source)
+    except AssemblerError as e:
+        raise HTTPException(status_code=400, detail={"line": e.line, "error": e.message})
+
+    binary = program.encode()
+    _cache_program(program_id, binary, program.labels)
+    return CompileResult(program_id=program_id, labels=program.labels, **_describe(binary))
+
+
+@app.get("/programs/{program_id}")
+async def get_program(program_id: str):
+    """Fetch the encoded binary for a compiled program."""
+    cached = program_cache.get(program_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Program not found")
+    return Response(content=cached[0], media_type="application/octet-stream")
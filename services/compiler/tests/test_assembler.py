@@ -0,0 +1,99 @@
+"""Test Compiler Assembler."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.assembler import (
+    DATA_WORD,
+    HEADER,
+    INSTRUCTION,
+    MAGIC,
+    MAX_DATA_WORDS,
+    OPCODES,
+    AssemblerError,
+    assemble,
+)
+from app.main import app
+
+
+client = TestClient(app)
+
+SOURCE = """
+.data 0x200
+count:  .word 3
+table:  .word 1, -2
+        .space 2
+.text
+start:  LOAD r1, count
+loop:   ADDI r1, r1, -1
+        BNE  r1, r0, loop
+        HALT
+"""
+
+
+def _decode(binary: bytes):
+    """Unpack an encoded program back into (instructions, data)."""
+    magic, _, _, _, n_instr, n_data = HEADER.unpack_from(binary, 0)
+    assert magic == MAGIC
+    offset = HEADER.size
+    instructions = [INSTRUCTION.unpack_from(binary, offset + i * INSTRUCTION.size) for i in range(n_instr)]
+    offset += n_instr * INSTRUCTION.size
+    data = [DATA_WORD.unpack_from(binary, offset + i * DATA_WORD.size) for i in range(n_data)]
+    assert offset + n_data * DATA_WORD.size == len(binary)
+    return instructions, data
+
+
+def test_round_trip():
+    """Test encoded binary decodes back to the assembled program."""
+    program = assemble(SOURCE)
+    instructions, data = _decode(program.encode())
+    
+    assert instructions == program.instructions
+    assert data == [(0x200, 3), (0x201, 1), (0x202, -2), (0x203, 0), (0x204, 0)]
+    assert program.labels == {"count": 0x200, "table": 0x201, "start": 0, "loop": 1}
+    assert instructions[0] == (OPCODES["LOAD"][0], 1, 0, 0, 0x200)
+    assert instructions[2] == (OPCODES["BNE"][0], 1, 0, 0, 1)
+
+
+def test_numeric_targets_and_addresses():
+    """Test branch targets and addresses accept the same literals as immediates."""
+    program = assemble("JMP 0x10\nBEQ r1, r2, 3\nLOAD r1, 0x200\nSTORE r1, 0b101")
+    assert [instr[4] for instr in program.instructions] == [0x10, 3, 0x200, 5]
+
+
+@pytest.mark.parametrize("source, line", [
+    ("NOP\nFOO r1", 2),
+    ("NOP\n\nADD r1, r2", 3),
+    ("ADD r1, r2, r99", 1),
+    ("JMP nowhere", 1),
+    (".word 1", 1),
+    ("a: NOP\na: NOP", 2),
+    (".data\n.bogus 1", 2),
+])
+def test_error_line_numbers(source, line):
+    """Test errors report the offending source line."""
+    with pytest.raises(AssemblerError) as exc:
+        assemble(source)
+    assert exc.value.line == line
+
+
+@pytest.mark.parametrize("source", [
+    ".data -4\n.word 1",
+    ".data 0x100000000\n.word 1",
+    ".data 0xFFFFFFFF\n.word 1, 2",
+    ".data\n.word 0x80000000",
+    "ADDI r1, r1, 0x80000000",
+    ".data\n.space -1",
+    f".data\n.space {MAX_DATA_WORDS + 1}",
+    f".data\n.word 1\n.space {MAX_DATA_WORDS}",
+])
+def test_out_of_range_operands(source):
+    """Test values that do not fit the binary format are assembler errors."""
+    with pytest.raises(AssemblerError):
+        assemble(source)
+
+
+def test_compile_out_of_range_is_bad_request():
+    """Test out-of-range data is a 400 with the line number, not a 500."""
+    response = client.post("/compile", json={"source": "NOP\n.data -4\n.word 1"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["line"] == 2
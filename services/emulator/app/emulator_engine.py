@@ -1,9 +1,14 @@
 """Core emulator execution engine."""
 import asyncio
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional
 import numpy as np
 
 
+# Cycles between event-loop yields and wall-clock checks
+YIELD_EVERY = 1024
+
+
 class EmulatorEngine:
     """Cycle-accurate emulator engine."""
     
@@ -19,19 +24,25 @@ class EmulatorEngine:
         num_cycles: int,
         clock_period_ns: float,
         config: Dict[str, Any],
+        initial_memory: Optional[Dict[Any, int]] = None,
+        max_seconds: Optional[float] = None,
     ) -> Dict[str, Any]:
-        """Execute instructions cycle-accurate."""
+        """Execute instructions cycle-accurate, stopping after max_seconds of wall-clock time."""
         
         # Initialize state
         self._reset()
+        if initial_memory:
+            self.memory.update(initial_memory)
         
         cycles_executed = 0
         outputs = []
+        halted = False
+        timed_out = False
+        deadline = time.monotonic() + max_seconds if max_seconds else None
         
-        # Execute each instruction
-        for i, instr in enumerate(instructions):
-            if cycles_executed >= num_cycles:
-                break
+        # Execute from the program counter so branches can form loops
+        while self.pc < len(instructions) and cycles_executed < num_cycles:
+            instr = instructions[self.pc]
             
             # Decode instruction
             opcode = instr.opcode if hasattr(instr, 'opcode') else "NOP"
@@ -48,10 +59,17 @@ class EmulatorEngine:
             })
             
             cycles_executed += 1
-            self.pc += 1
+            if opcode == "HALT":
+                halted = True
+                break
+            self.pc = result.get("branch_target", self.pc + 1)
             
-            # Simulate clock delay
-            await asyncio.sleep(0.001)  # Small delay for simulation
+            # Let other requests run now and then instead of sleeping every cycle
+            if cycles_executed % YIELD_EVERY == 0:
+                if deadline is not None and time.monotonic() > deadline:
+                    timed_out = True
+                    break
+                await asyncio.sleep(0)
         
         # Calculate performance metrics
         metrics = self._calculate_metrics(cycles_executed, clock_period_ns)
@@ -60,6 +78,8 @@ class EmulatorEngine:
             "cycles_executed": cycles_executed,
             "outputs": outputs,
             "metrics": metrics,
+            "halted": halted,
+            "timed_out": timed_out,
             "waveform": None,  # Would contain VCD data in real implementation
         }
     
@@ -83,26 +103,55 @@ class EmulatorEngine:
                 self.registers[operands[0]] = self.registers.get(operands[1], 0) - self.registers.get(operands[2], 0)
                 return {"value": self.registers[operands[0]]}
         
+        elif opcode == "ADDI":
+            if len(operands) >= 3:
+                self.registers[operands[0]] = self.registers.get(operands[1], 0) + int(operands[2])
+                return {"value": self.registers[operands[0]]}
+        
         elif opcode == "LOAD":
             if len(operands) >= 2:
-                addr = operands[1]
+                addr = self._address(operands[1])
                 self.registers[operands[0]] = self.memory.get(addr, 0)
                 return {"value": self.registers[operands[0]]}
         
         elif opcode == "STORE":
             if len(operands) >= 2:
-                addr = operands[1]
+                addr = self._address(operands[1])
                 self.memory[addr] = self.registers.get(operands[0], 0)
                 return {"address": addr, "value": self.memory[addr]}
         
+        elif opcode == "JMP":
+            if len(operands) >= 1:
+                return {"branch_target": int(operands[0])}
+        
+        elif opcode in ("BEQ", "BNE"):
+            if len(operands) >= 3:
+                equal = self.registers.get(operands[0], 0) == self.registers.get(operands[1], 0)
+                if equal == (opcode == "BEQ"):
+                    return {"branch_target": int(operands[2])}
+                return {"branch_taken": False}
+        
         elif opcode == "NOP":
             return {"operation": "no-op"}
         
+        elif opcode == "HALT":
+            return {"operation": "halt"}
+        
         else:
             return {"error": f"Unknown opcode: {opcode}"}
         
         return {}
     
+    @staticmethod
+    def _address(operand: Any) -> Any:
+        """Normalize memory addresses so "0x100" and 256 hit the same cell."""
+        if isinstance(operand, str):
+            try:
+                return int(operand, 0)
+            except ValueError:
+                return operand
+        return operand
+    
     def _calculate_metrics(self, cycles: int, clock_period_ns: float) -> Dict[str, float]:
         """Calculate performance metrics."""
         
@@ -1,12 +1,17 @@
 """Emulator service main application."""
+import base64
+import os
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+import httpx
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 
 from app.emulator_engine import EmulatorEngine
+from app.program_loader import LoadedProgram, ProgramFormatError, decode_program
 
 
 app = FastAPI(
@@ -15,8 +20,16 @@ app = FastAPI(
     description="Cycle-accurate hardware emulation",
 )
 
-# Global emulator engine
-emulator = EmulatorEngine()
+# Decoded programs from the compiler service, keyed by program id
+COMPILER_URL = os.getenv("COMPILER_URL", "http://compiler:8023")
+MAX_LOADED_PROGRAMS = int(os.getenv("EMULATOR_PROGRAM_CACHE_SIZE", "128"))
+loaded_programs: "OrderedDict[str, LoadedProgram]" = OrderedDict()
+
+# Per-request limits: a tight loop stops at whichever is hit first. The cycle
+# cap keeps the long-standing API limit of 1000000; the wall-clock limit is
+# what actually bounds a request now
+MAX_CYCLES = int(os.getenv("EMULATOR_MAX_CYCLES", "1000000"))
+MAX_SECONDS = float(os.getenv("EMULATOR_MAX_SECONDS", "5"))
 
 
 class InstructionInput(BaseModel):
@@ -29,9 +42,11 @@ class InstructionInput(BaseModel):
 class EmulationRequest(BaseModel):
     """Emulation request model."""
     emulation_id: Optional[str] = None
-    instructions: List[InstructionInput]
+    instructions: List[InstructionInput] = Field(default_factory=list)
+    program_id: Optional[str] = Field(default=None, description="Compiled program id from the compiler service")
+    program: Optional[str] = Field(default=None, description="Base64-encoded compiled program binary")
     config: Dict[str, Any] = Field(default_factory=dict)
-    num_cycles: int = Field(default=1000, ge=1, le=1000000)
+    num_cycles: int = Field(default=1000, ge=1, le=MAX_CYCLES)
     clock_period_ns: float = Field(default=10.0, gt=0)
     trace_signals: List[str] = Field(default_factory=list)
 
@@ -59,20 +74,57 @@ async def health_check():
     }
 
 
+async def load_program(program_id: str) -> LoadedProgram:
+    """Resolve a program id, fetching and decoding it from the compiler on a miss."""
+    program = loaded_programs.get(program_id)
+    if program is not None:
+        loaded_programs.move_to_end(program_id)
+        return program
+    
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(f"{COMPILER_URL}/programs/{program_id}")
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Program {program_id} not found")
+    response.raise_for_status()
+    
+    program = decode_program(response.content)
+    loaded_programs[program_id] = program
+    while len(loaded_programs) > MAX_LOADED_PROGRAMS:
+        loaded_programs.popitem(last=False)
+    return program
+
+
 @app.post("/emulate", response_model=EmulationResult)
 async def run_emulation(request: EmulationRequest):
     """Run hardware emulation."""
     emulation_id = request.emulation_id or f"emu-{uuid.uuid4().hex[:12]}"
     
+    instructions: List[Any] = request.instructions
+    initial_memory = None
+    try:
+        if request.program_id:
+            loaded = await load_program(request.program_id)
+            instructions, initial_memory = loaded.instructions, loaded.memory
+        elif request.program:
+            loaded = decode_program(base64.b64decode(request.program))
+            instructions, initial_memory = loaded.instructions, loaded.memory
+    except (ProgramFormatError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid program: {e}")
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Compiler service unavailable: {e}")
+    
     try:
         start_time = datetime.utcnow()
         
-        # Execute emulation
-        result = await emulator.execute(
-            instructions=request.instructions,
+        # Execute emulation (own engine: runs yield to the loop, so concurrent
+        # requests must not share registers)
+        result = await EmulatorEngine().execute(
+            instructions=instructions,
             num_cycles=request.num_cycles,
             clock_period_ns=request.clock_period_ns,
             config=request.config,
+            initial_memory=initial_memory,
+            max_seconds=MAX_SECONDS,
         )
         
         end_time = datetime.utcnow()
@@ -103,12 +155,13 @@ Clock Period: {request.clock_period_ns} ns
         
         return EmulationResult(
             emulation_id=emulation_id,
-            status="completed",
+            status="timeout" if result["timed_out"] else "completed",
             cycles_executed=result["cycles_executed"],
             execution_time_ms=execution_time_ms,
             outputs=[{"simulation_log": sim_log, "test_status": "PASSED"}],
             performance_metrics=enhanced_metrics,
             waveform_data=waveform_ref,
+            errors=[f"Stopped after {MAX_SECONDS}s wall-clock limit"] if result["timed_out"] else None,
             completed_at=end_time,
         )
     
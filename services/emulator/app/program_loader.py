@@ -0,0 +1,69 @@
+"""Loader for binary programs produced by the compiler service."""
+import struct
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+
+MAGIC = b"SPAS"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+INSTRUCTION = struct.Struct("<BBBBi")
+DATA_WORD = struct.Struct("<Ii")
+
+# numeric code -> (mnemonic, operand kinds); must match the compiler's assembler
+OPCODES: Dict[int, Tuple[str, Tuple[str, ...]]] = {
+    0: ("NOP", ()),
+    1: ("ADD", ("r", "r", "r")),
+    2: ("SUB", ("r", "r", "r")),
+    3: ("LOAD", ("r", "a")),
+    4: ("STORE", ("r", "a")),
+    5: ("ADDI", ("r", "r", "i")),
+    6: ("JMP", ("t",)),
+    7: ("BEQ", ("r", "r", "t")),
+    8: ("BNE", ("r", "r", "t")),
+    9: ("HALT", ()),
+}
+
+
+class ProgramFormatError(ValueError):
+    """Raised when a binary program cannot be decoded."""
+
+
+class LoadedInstruction(NamedTuple):
+    """Decoded instruction with the same shape the engine reads from JSON input."""
+    opcode: str
+    operands: List[Any]
+
+
+class LoadedProgram(NamedTuple):
+    """Decoded program: instruction stream plus initial memory image."""
+    instructions: List[LoadedInstruction]
+    memory: Dict[int, int]
+
+
+def decode_program(binary: bytes) -> LoadedProgram:
+    """Decode a compiler-service binary into engine instructions."""
+    if len(binary) < HEADER.size:
+        raise ProgramFormatError("program shorter than header")
+    magic, version, _, _, n_instr, n_data = HEADER.unpack_from(binary)
+    if magic != MAGIC:
+        raise ProgramFormatError("bad magic")
+    if version != VERSION:
+        raise ProgramFormatError(f"unsupported program version {version}")
+    expected = HEADER.size + n_instr * INSTRUCTION.size + n_data * DATA_WORD.size
+    if len(binary) != expected:
+        raise ProgramFormatError(f"expected {expected} bytes, got {len(binary)}")
+
+    instructions = []
+    for code, rd, rs, rt, imm in INSTRUCTION.iter_unpack(
+        binary[HEADER.size:HEADER.size + n_instr * INSTRUCTION.size]
+    ):
+        if code not in OPCODES:
+            raise ProgramFormatError(f"unknown opcode {code}")
+        mnemonic, kinds = OPCODES[code]
+        registers = iter((rd, rs, rt))
+        operands = [f"r{next(registers)}" if kind == "r" else imm for kind in kinds]
+        instructions.append(LoadedInstruction(mnemonic, operands))
+
+    data_start = HEADER.size + n_instr * INSTRUCTION.size
+    memory = {addr: value for addr, value in DATA_WORD.iter_unpack(binary[data_start:])}
+    return LoadedProgram(instructions, memory)
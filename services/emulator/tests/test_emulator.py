@@ -1,7 +1,12 @@
 """Test Emulator Service."""
+import asyncio
+import base64
+import struct
+
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from app.emulator_engine import EmulatorEngine
+from app.main import MAX_CYCLES, EmulationRequest, InstructionInput, app
 
 
 client = TestClient(app)
@@ -54,5 +59,60 @@ def test_emulation_with_different_opcodes():
     assert len(data["outputs"]) == 3
 
 
+def test_emulation_with_compiled_program():
+    """Test loading a binary program with a data section and a loop."""
+    # LOAD r1, 0x100 ; loop: ADDI r1, r1, -1 ; BNE r1, r0, loop ; HALT
+    instructions = [(3, 1, 0, 0, 0x100), (5, 1, 1, 0, -1), (8, 1, 0, 0, 1), (9, 0, 0, 0, 0)]
+    binary = struct.pack("<4sBBHII", b"SPAS", 1, 0, 0, len(instructions), 1)
+    binary += b"".join(struct.pack("<BBBBi", *instr) for instr in instructions)
+    binary += struct.pack("<Ii", 0x100, 3)
+    
+    emulation_request = {
+        "program": base64.b64encode(binary).decode("ascii"),
+        "num_cycles": 100,
+        "clock_period_ns": 10.0,
+    }
+    response = client.post("/emulate", json=emulation_request)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    # LOAD + 3 x (ADDI, BNE) + HALT
+    assert data["cycles_executed"] == 8
+
+
+def test_emulation_rejects_malformed_program():
+    """Test that a corrupt program binary is rejected."""
+    response = client.post("/emulate", json={"program": base64.b64encode(b"junk").decode("ascii")})
+    assert response.status_code == 400
+
+
+def test_emulation_tight_loop_is_bounded():
+    """Test that an endless loop runs its cycles without per-cycle delays."""
+    emulation_request = {
+        "instructions": [{"opcode": "JMP", "operands": [0]}],
+        "num_cycles": 100000,
+    }
+    response = client.post("/emulate", json=emulation_request)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["cycles_executed"] == 100000
+    
+    assert MAX_CYCLES == 1000000
+    assert EmulationRequest(num_cycles=MAX_CYCLES).num_cycles == MAX_CYCLES
+    
+    emulation_request["num_cycles"] = MAX_CYCLES + 1
+    response = client.post("/emulate", json=emulation_request)
+    assert response.status_code == 422
+
+
+def test_engine_stops_at_wall_clock_limit():
+    """Test that the engine reports a time-out instead of running on."""
+    instructions = [InstructionInput(opcode="JMP", operands=[0])]
+    result = asyncio.run(EmulatorEngine().execute(instructions, 10**9, 10.0, {}, max_seconds=0.05))
+    assert result["timed_out"]
+    assert 0 < result["cycles_executed"] < 10**9
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
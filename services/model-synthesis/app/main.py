@@ -1,5 +1,13 @@
 """Model Synthesis Service main application."""
-from fastapi import FastAPI
+import asyncio
+import os
+from typing import Dict, Any, List, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+from app.systolic import DTYPES, explore_tilings
 
 
 app = FastAPI(
@@ -7,8 +15,107 @@ app = FastAPI(
     version="0.1.0",
 )
 
+RTL_GENERATOR_URL = os.getenv("RTL_GENERATOR_URL", "http://rtl-generator:8021")
+
+
+class LayerSpec(BaseModel):
+    """Neural-network layer description."""
+    type: str = Field(default="dense", description="dense or conv")
+    batch: int = Field(default=1, ge=1)
+    in_features: Optional[int] = Field(default=None, ge=1)
+    out_features: Optional[int] = Field(default=None, ge=1)
+    in_channels: Optional[int] = Field(default=None, ge=1)
+    out_channels: Optional[int] = Field(default=None, ge=1)
+    kernel: int = Field(default=3, ge=1)
+    stride: int = Field(default=1, ge=1)
+    padding: int = Field(default=0, ge=0)
+    height: Optional[int] = Field(default=None, ge=1)
+    width: Optional[int] = Field(default=None, ge=1)
+
+
+class AcceleratorRequest(BaseModel):
+    """Accelerator exploration request."""
+    layer: LayerSpec
+    dtype: str = "int8"
+    dsp_budget: int = Field(default=256, ge=1)
+    clock_mhz: float = Field(default=200.0, gt=0)
+    buffer_budget_kb: Optional[float] = Field(default=None, gt=0)
+    architecture: str = "systolic"
+    max_dim: int = Field(default=128, ge=1, le=1024)
+    top_k: int = Field(default=5, ge=1, le=50)
+
+
+class AcceleratorResult(BaseModel):
+    """Accelerator exploration result."""
+    gemm: Dict[str, int]
+    dtype: str
+    architecture: str
+    dsp_budget: int
+    best: Dict[str, Any]
+    top: List[Dict[str, Any]] = []
+    tilings_evaluated: int
+    feasible_tilings: int
+    search_time_ms: float
+    rtl: Optional[Dict[str, Any]] = None
+    errors: Optional[List[str]] = None
+
+
+def _explore(request: AcceleratorRequest) -> Dict[str, Any]:
+    """Run the tiling search, mapping bad shapes/budgets to HTTP 400."""
+    layer = request.layer.model_dump(exclude_none=True)
+    try:
+        return explore_tilings(
+            layer,
+            dtype=request.dtype,
+            dsp_budget=request.dsp_budget,
+            clock_mhz=request.clock_mhz,
+            buffer_budget_kb=request.buffer_budget_kb,
+            architecture=request.architecture,
+            max_dim=request.max_dim,
+            top_k=request.top_k,
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Layer is missing field {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid accelerator request: {e}")
+
 
 @app.get("/health")
 async def health_check():
     """Health check."""
     return {"service": "Model Synthesis", "status": "healthy"}
+
+
+@app.post("/accelerator/explore", response_model=AcceleratorResult)
+async def explore_accelerator(request: AcceleratorRequest):
+    """Find the array size that maximizes throughput for a layer under the DSP budget."""
+    return AcceleratorResult(**await asyncio.to_thread(_explore, request))
+
+
+@app.post("/accelerator/generate", response_model=AcceleratorResult)
+async def generate_accelerator(request: AcceleratorRequest):
+    """Explore, then generate RTL for the best configuration via the RTL generator."""
+    result = await asyncio.to_thread(_explore, request)
+    best = result["best"]
+    spec = {
+        "type": "systolic_array" if request.architecture == "systolic" else "mac_array",
+        "rows": best["rows"],
+        "cols": best["cols"],
+        "data_width": 8 * int(DTYPES[request.dtype]["bytes"]),
+        "acc_width": 8 * int(DTYPES[request.dtype]["acc_bytes"]),
+        "dtype": request.dtype,
+    }
+
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(
+                f"{RTL_GENERATOR_URL}/generate",
+                json={"spec": spec, "language": "systemverilog"},
+            )
+            response.raise_for_status()
+            result["rtl"] = response.json()
+    except httpx.HTTPError as e:
+        result["errors"] = [f"RTL generation failed: {e}"]
+
+    return AcceleratorResult(**result)
+
@@ -0,0 +1,209 @@
+"""Analytical systolic/MAC-array model with a vectorized tiling search."""
+import math
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+
+# Bytes per operand and accumulator, and DSP slices consumed per MAC
+DTYPES: Dict[str, Dict[str, float]] = {
+    "int8": {"bytes": 1, "acc_bytes": 4, "dsp_per_mac": 0.5},
+    "int16": {"bytes": 2, "acc_bytes": 4, "dsp_per_mac": 1.0},
+    "fp16": {"bytes": 2, "acc_bytes": 4, "dsp_per_mac": 2.0},
+    "fp32": {"bytes": 4, "acc_bytes": 4, "dsp_per_mac": 3.0},
+}
+
+ARCHITECTURES = ("systolic", "mac_array")
+
+
+def layer_to_gemm(layer: Dict[str, Any]) -> Dict[str, int]:
+    """Lower a dense or conv layer to GEMM dimensions (M x K) @ (K x N)."""
+    kind = layer.get("type", "dense")
+    batch = int(layer.get("batch", 1))
+
+    if kind == "dense":
+        return {
+            "M": batch,
+            "K": int(layer["in_features"]),
+            "N": int(layer["out_features"]),
+        }
+
+    if kind == "conv":
+        kernel = int(layer.get("kernel", 3))
+        stride = int(layer.get("stride", 1))
+        padding = int(layer.get("padding", 0))
+        height = int(layer["height"])
+        width = int(layer.get("width", height))
+        out_h = (height + 2 * padding - kernel) // stride + 1
+        out_w = (width + 2 * padding - kernel) // stride + 1
+        if out_h <= 0 or out_w <= 0:
+            raise ValueError("convolution output is empty for the given shape")
+        # im2col: one GEMM row per output pixel
+        return {
+            "M": batch * out_h * out_w,
+            "K": int(layer["in_channels"]) * kernel * kernel,
+            "N": int(layer["out_channels"]),
+        }
+
+    raise ValueError(f"unsupported layer type '{kind}'")
+
+
+# Grid cells scored per chunk: bounds the search's temporaries to a few tens of
+# MB however large max_dim and the GEMM are
+CHUNK_CELLS = 1 << 18
+
+
+def _buffers_kb(R: np.ndarray, C: np.ndarray, T: np.ndarray, props: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """On-chip buffer sizes (KB) for a batch of configurations."""
+    input_kb = T * R * props["bytes"] / 1024.0
+    weight_kb = 2 * R * C * props["bytes"] / 1024.0  # double buffered
+    output_kb = T * C * props["acc_bytes"] / 1024.0
+    return {"input": input_kb, "weight": weight_kb, "output": output_kb, "total": input_kb + weight_kb + output_kb}
+
+
+def _score(
+    R: np.ndarray,
+    C: np.ndarray,
+    T: np.ndarray,
+    gemm: Dict[str, int],
+    props: Dict[str, float],
+    clock_mhz: float,
+    architecture: str,
+) -> Dict[str, np.ndarray]:
+    """Cost model for a batch of (rows, cols, m_tile) configurations."""
+    M, K, N = gemm["M"], gemm["K"], gemm["N"]
+    tiles_k = -(-K // R)
+    tiles_n = -(-N // C)
+    tiles_m = -(-M // T)
+    if architecture == "systolic":
+        # Weight load + stream + pipeline fill/drain per tile
+        per_tile = R + T + R + C - 1
+        freq = np.full(R.shape, clock_mhz, dtype=np.float64)
+    else:
+        # Broadcast MAC array: adder-tree latency, fmax derates with fan-out
+        per_tile = R + T + np.ceil(np.log2(R + 1)).astype(np.int64)
+        freq = clock_mhz / (1.0 + 0.05 * np.log2(R * C))
+    cycles = tiles_m * tiles_k * tiles_n * per_tile
+
+    macs = float(M) * K * N
+    latency_us = cycles / freq
+    return {
+        "cycles": cycles,
+        "freq": freq,
+        "latency_us": latency_us,
+        "throughput_gops": 2.0 * macs / (latency_us * 1e3),
+        "utilization": macs / (cycles * R * C),
+    }
+
+
+def _top(candidates: Dict[str, np.ndarray], top_k: int) -> Dict[str, np.ndarray]:
+    """Best throughput first; smaller arrays and buffers break ties."""
+    throughput = candidates["throughput_gops"]
+    if throughput.size > top_k:
+        # Only configurations at or above the k-th best throughput can rank
+        cutoff = np.partition(throughput, throughput.size - top_k)[throughput.size - top_k]
+        keep = throughput >= cutoff
+        candidates = {name: values[keep] for name, values in candidates.items()}
+    order = np.lexsort((candidates["buffer_kb"], candidates["R"] * candidates["C"], -candidates["throughput_gops"]))
+    return {name: values[order[:top_k]] for name, values in candidates.items()}
+
+
+def explore_tilings(
+    layer: Dict[str, Any],
+    dtype: str = "int8",
+    dsp_budget: int = 256,
+    clock_mhz: float = 200.0,
+    buffer_budget_kb: Optional[float] = None,
+    architecture: str = "systolic",
+    max_dim: int = 128,
+    top_k: int = 5,
+) -> Dict[str, Any]:
+    """
+    Evaluate every (rows, cols, m_tile) array configuration and rank by throughput.
+
+    Rows map the reduction dimension K, columns map the output dimension N and
+    m_tile is how many GEMM rows are streamed per weight tile (bounds the
+    input/output buffers). Weight-stationary dataflow is assumed.
+
+    The grid is scored a block of rows at a time (vectorized within the block)
+    and only the running top_k is kept, so memory stays at CHUNK_CELLS cells
+    rather than rows x cols x m_tiles. Columns that cannot fit the DSP budget
+    next to a block's smallest row count are never built.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"unsupported dtype '{dtype}'")
+    if architecture not in ARCHITECTURES:
+        raise ValueError(f"unsupported architecture '{architecture}'")
+
+    started = time.perf_counter()
+    gemm = layer_to_gemm(layer)
+    M, K, N = gemm["M"], gemm["K"], gemm["N"]
+    props = DTYPES[dtype]
+
+    # Candidate grid; no point in being larger than the matrix itself
+    rows = np.arange(1, min(max_dim, K) + 1, dtype=np.int64)
+    cols = np.arange(1, min(max_dim, N) + 1, dtype=np.int64)
+    m_tiles = 2 ** np.arange(0, int(math.log2(max(M, 1))) + 1, dtype=np.int64)
+    m_tiles = np.unique(np.append(m_tiles, M))
+    evaluated = rows.size * cols.size * m_tiles.size
+
+    step = max(1, CHUNK_CELLS // (cols.size * m_tiles.size))
+    best: Optional[Dict[str, np.ndarray]] = None
+    feasible_count = 0
+    for start in range(0, rows.size, step):
+        block = rows[start:start + step]
+        # ceil(R * C * dsp_per_mac) <= budget  <=>  C <= budget / (R * dsp_per_mac)
+        max_cols = int(dsp_budget // (block[0] * props["dsp_per_mac"]))
+        if max_cols < 1:
+            break  # rows only grow from here
+        R, C, T = (g.ravel() for g in np.meshgrid(block, cols[:max_cols], m_tiles, indexing="ij"))
+
+        feasible = np.ceil(R * C * props["dsp_per_mac"]) <= dsp_budget
+        buffer_kb = _buffers_kb(R, C, T, props)["total"]
+        if buffer_budget_kb is not None:
+            feasible &= buffer_kb <= buffer_budget_kb
+        count = int(feasible.sum())
+        if count == 0:
+            continue
+        feasible_count += count
+
+        candidates = {"R": R, "C": C, "T": T, "buffer_kb": buffer_kb}
+        if count < R.size:
+            candidates = {name: values[feasible] for name, values in candidates.items()}
+        candidates.update(_score(candidates["R"], candidates["C"], candidates["T"], gemm, props, clock_mhz, architecture))
+        if best is not None:
+            candidates = {name: np.concatenate((best[name], values)) for name, values in candidates.items()}
+        best = _top(candidates, top_k)
+
+    if best is None:
+        raise ValueError("no array configuration fits the DSP/buffer budget")
+
+    buffers = _buffers_kb(best["R"], best["C"], best["T"], props)
+
+    def describe(i: int) -> Dict[str, Any]:
+        return {
+            "rows": int(best["R"][i]),
+            "cols": int(best["C"][i]),
+            "m_tile": int(best["T"][i]),
+            "dsp_used": int(math.ceil(best["R"][i] * best["C"][i] * props["dsp_per_mac"])),
+            "cycles": int(best["cycles"][i]),
+            "clock_mhz": round(float(best["freq"][i]), 2),
+            "latency_us": round(float(best["latency_us"][i]), 3),
+            "throughput_gops": round(float(best["throughput_gops"][i]), 3),
+            "utilization": round(float(best["utilization"][i]), 4),
+            "buffers_kb": {name: round(float(values[i]), 2) for name, values in buffers.items()},
+        }
+
+    ranked: List[Dict[str, Any]] = [describe(i) for i in range(best["R"].size)]
+    return {
+        "gemm": gemm,
+        "dtype": dtype,
+        "architecture": architecture,
+        "dsp_budget": dsp_budget,
+        "best": ranked[0],
+        "top": ranked,
+        "tilings_evaluated": int(evaluated),
+        "feasible_tilings": feasible_count,
+        "search_time_ms": round((time.perf_counter() - started) * 1000.0, 3),
+    }
@@ -0,0 +1,104 @@
+"""Test Accelerator Tiling Search."""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import systolic
+from app.main import app
+from app.systolic import DTYPES, _score, explore_tilings, layer_to_gemm
+
+
+client = TestClient(app)
+
+DENSE = {"type": "dense", "in_features": 4, "out_features": 4}
+CONV = {"type": "conv", "in_channels": 16, "out_channels": 24, "kernel": 3, "height": 10, "padding": 1, "batch": 2}
+
+
+def test_layer_to_gemm():
+    """Test dense and conv layers lower to the expected GEMM shapes."""
+    assert layer_to_gemm({**DENSE, "batch": 8}) == {"M": 8, "K": 4, "N": 4}
+    assert layer_to_gemm(CONV) == {"M": 2 * 10 * 10, "K": 16 * 9, "N": 24}
+    with pytest.raises(ValueError):
+        layer_to_gemm({"type": "conv", "in_channels": 1, "out_channels": 1, "kernel": 5, "height": 3})
+
+
+def test_cost_model():
+    """Test cycles, latency and utilization for a single weight tile."""
+    one = np.array([1])
+    scores = _score(one * 4, one * 4, one, {"M": 1, "K": 4, "N": 4}, DTYPES["int8"], 200.0, "systolic")
+    # load 4 + stream 1 + fill/drain 4 + 4 - 1
+    assert scores["cycles"][0] == 12
+    assert scores["latency_us"][0] == pytest.approx(12 / 200.0)
+    assert scores["utilization"][0] == pytest.approx(16 / (12 * 16))
+
+
+def test_best_tiling_small_case():
+    """Test a budget that fits the whole 4x4 matrix picks the full array."""
+    result = explore_tilings(DENSE, dsp_budget=8)
+    best = result["best"]
+    assert (best["rows"], best["cols"], best["m_tile"]) == (4, 4, 1)
+    assert best["cycles"] == 12
+    assert best["dsp_used"] == 8
+    assert result["tilings_evaluated"] == 16
+
+    # Half the budget: the winner may not overspend it
+    assert explore_tilings(DENSE, dsp_budget=4)["best"]["dsp_used"] <= 4
+
+
+def _brute_force(layer, dsp_budget, architecture):
+    """Exhaustive Python loop over the same grid, as a reference."""
+    gemm = layer_to_gemm(layer)
+    props = DTYPES["int8"]
+    m_tiles = sorted({2 ** i for i in range(int(np.log2(gemm["M"])) + 1)} | {gemm["M"]})
+    best = None
+    for r in range(1, gemm["K"] + 1):
+        for c in range(1, gemm["N"] + 1):
+            if np.ceil(r * c * props["dsp_per_mac"]) > dsp_budget:
+                continue
+            for t in m_tiles:
+                one = np.array([1])
+                gops = _score(one * r, one * c, one * t, gemm, props, 200.0, architecture)["throughput_gops"][0]
+                if best is None or gops > best[0] + 1e-9:
+                    best = (gops, r, c, t)
+    return best
+
+
+@pytest.mark.parametrize("architecture", ["systolic", "mac_array"])
+def test_chunked_search_matches_exhaustive(monkeypatch, architecture):
+    """Test scoring in small blocks finds the same optimum as a full scan."""
+    monkeypatch.setattr(systolic, "CHUNK_CELLS", 64)
+    result = explore_tilings(CONV, dsp_budget=64, architecture=architecture, top_k=3)
+    gops, _, _, _ = _brute_force(CONV, 64, architecture)
+    assert result["best"]["throughput_gops"] == pytest.approx(gops, rel=1e-3)
+
+    monkeypatch.setattr(systolic, "CHUNK_CELLS", 1 << 18)
+    unchunked = explore_tilings(CONV, dsp_budget=64, architecture=architecture, top_k=3)
+    assert unchunked["top"] == result["top"]
+    assert unchunked["feasible_tilings"] == result["feasible_tilings"]
+
+
+def test_max_dim_cap():
+    """Test max_dim above the cap is rejected and an infeasible budget is a 400."""
+    request = {"layer": DENSE, "max_dim": 1025}
+    assert client.post("/accelerator/explore", json=request).status_code == 422
+
+    request = {"layer": DENSE, "dtype": "fp32", "dsp_budget": 2}
+    assert client.post("/accelerator/explore", json=request).status_code == 400
+
+
+def test_large_search_is_chunked(monkeypatch):
+    """Test a max_dim=1024 search never scores more than CHUNK_CELLS cells at once."""
+    sizes = []
+    score = systolic._score
+
+    def recording(R, *args):
+        sizes.append(R.size)
+        return score(R, *args)
+
+    monkeypatch.setattr(systolic, "_score", recording)
+    layer = {"type": "dense", "in_features": 2048, "out_features": 2048, "batch": 16}
+    response = client.post("/accelerator/explore", json={"layer": layer, "dsp_budget": 1 << 20, "max_dim": 1024})
+    assert response.status_code == 200
+    assert response.json()["tilings_evaluated"] == 1024 * 1024 * 5
+    assert len(sizes) > 1
+    assert max(sizes) <= systolic.CHUNK_CELLS
@@ -0,0 +1,115 @@
+"""SystemVerilog for a state machine from its states, transitions and state assignment."""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Ports and signals the generated module already declares
+_RESERVED = {"clk", "rst_n", "current_state", "next_state", "active", "finished"}
+
+
+def fsm_edges(states: List[str], transitions: Optional[List[Any]]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    (src, dst, condition) for every transition between known states; a ring
+    S0 -> S1 -> ... -> S0 when the spec gives none. Transitions are (src, dst),
+    (src, dst, condition) or {"from", "to", "condition"}.
+    """
+    if not transitions:
+        return [(s, states[(i + 1) % len(states)], None) for i, s in enumerate(states)]
+    edges = []
+    for t in transitions:
+        if isinstance(t, dict):
+            src, dst, cond = t.get("from"), t.get("to"), t.get("condition")
+        else:
+            src, dst, cond = t[0], t[1], (t[2] if len(t) > 2 else None)
+        if src in states and dst in states:
+            edges.append((src, dst, cond))
+    return edges
+
+
+def condition_inputs(edges: List[Tuple[str, str, Optional[str]]], states: List[str]) -> List[str]:
+    """Signals named in transition conditions, in first-use order; each becomes a 1-bit input"""
+    names: List[str] = []
+    for _, _, cond in edges:
+        for name in _IDENT.findall(cond or ""):
+            if name not in names and name not in states and name not in _RESERVED:
+                names.append(name)
+    return names
+
+
+def _case_item(state: str, edges: List[Tuple[str, str, Optional[str]]]) -> str:
+    """One case item of the next-state logic; a transition without a condition is taken unconditionally"""
+    branches: List[str] = []
+    for src, dst, cond in edges:
+        if src != state or dst == state:
+            continue
+        if cond:
+            keyword = "if" if not branches else "else if"
+            branches.append(f"{keyword} ({cond}) next_state = {dst};")
+        else:
+            branches.append(f"{'else ' if branches else ''}next_state = {dst};")
+            break
+    if not branches:
+        return f"{state}: next_state = {state};"
+    return f"{state}: begin " + " ".join(branches) + " end"
+
+
+def generate_fsm(
+    states: List[str],
+    transitions: Optional[List[Any]] = None,
+    codes: Optional[Dict[str, int]] = None,
+    width: Optional[int] = None,
+    encoding: Optional[str] = None,
+    module_name: str = "fsm",
+) -> Dict[str, Any]:
+    """
+    Module with the given state assignment (binary when none is given). The
+    first state is the reset state; `active` is high outside it and `finished`
+    in the last state.
+    """
+    if not codes or not width:
+        width = max(1, (len(states) - 1).bit_length())
+        codes, encoding = {s: i for i, s in enumerate(states)}, "binary"
+    width = int(width)
+    edges = fsm_edges(states, transitions)
+
+    ports = ["input  logic clk, rst_n,"]
+    ports += [f"input  logic {name}," for name in condition_inputs(edges, states)]
+    ports += [f"output logic [{width-1}:0] current_state,", "output logic active, finished"]
+    port_list = "\n    ".join(ports)
+    state_params = "\n    ".join(
+        f"localparam logic [{width-1}:0] {s} = {width}'b{int(codes[s]):0{width}b};" for s in states
+    )
+    case_items = "\n            ".join(_case_item(s, edges) for s in states)
+
+    code = f"""module {module_name} (
+    {port_list}
+);
+    // State encoding: {encoding}
+    {state_params}
+
+    logic [{width-1}:0] next_state;
+
+    // State register
+    always_ff @(posedge clk or negedge rst_n) begin
+        if (!rst_n)
+            current_state <= {states[0]};
+        else
+            current_state <= next_state;
+    end
+
+    // Next state logic
+    always_comb begin
+        next_state = current_state;
+        case (current_state)
+            {case_items}
+            default: next_state = {states[0]};
+        endcase
+    end
+
+    // Output logic
+    assign active = (current_state != {states[0]});
+    assign finished = (current_state == {states[-1]});
+endmodule"""
+    return {"code": code, "module_name": module_name, "encoding": encoding}
@@ -3,6 +3,8 @@ from typing import Dict, Any
 from fastapi import FastAPI
 from pydantic import BaseModel
 
+from app.fsm_rtl import generate_fsm
+
 
 app = FastAPI(
     title="SPARTA RTL Generator",
@@ -76,52 +78,18 @@ endmodule
 endmodule
 """
     elif component == "finite_state_machine":
-        states = request.spec.get("states", ["idle", "active"])
-        module_name = "traffic_light_fsm"
-        rtl_code = f"""module {module_name} (
-    input  logic clk,
-    input  logic rst_n,
-    output logic red,
-    output logic yellow,
-    output logic green
-);
-    
-    typedef enum logic [1:0] {{
-        RED    = 2'b00,
-        GREEN  = 2'b01,
-        YELLOW = 2'b10
-    }} state_t;
-    
-    state_t state, next_state;
-    logic [3:0] counter;
-    
-    always_ff @(posedge clk or negedge rst_n) begin
-        if (!rst_n) begin
-            state <= RED;
-            counter <= '0;
-        end else begin
-            state <= next_state;
-            counter <= counter + 1;
-        end
-    end
-    
-    always_comb begin
-        next_state = state;
-        if (counter == 15) begin
-            case (state)
-                RED:    next_state = GREEN;
-                GREEN:  next_state = YELLOW;
-                YELLOW: next_state = RED;
-            endcase
-        end
-    end
-    
-    assign red    = (state == RED);
-    assign yellow = (state == YELLOW);
-    assign green  = (state == GREEN);
-    
-endmodule
-"""
+        # Same keys as the synthesis agent's architecture, so its encoding is kept
+        fsm = generate_fsm(
+            request.spec.get("state_names", ["IDLE", "ACTIVE"]),
+            request.spec.get("transitions"),
+            request.spec.get("state_encoding"),
+            request.spec.get("state_width"),
+            request.spec.get("encoding"),
+            request.spec.get("module_name", "fsm"),
+        )
+        module_name, rtl_code = fsm["module_name"], fsm["code"] + "\n"
+    elif component in ("systolic_array", "mac_array"):
+        module_name, rtl_code = _generate_array(component, request.spec)
     else:
         module_name = f"{component}_design"
         rtl_code = f"""module {module_name} (
@@ -150,3 +118,150 @@ endmodule
         module_name=module_name,
         language=request.language,
     )
+
+
+def _generate_array(component: str, spec: Dict[str, Any]):
+    """Parameterized weight-stationary systolic array or broadcast MAC array."""
+    rows = int(spec.get("rows", 8))
+    cols = int(spec.get("cols", 8))
+    data_w = int(spec.get("data_width", 8))
+    acc_w = int(spec.get("acc_width", 32))
+    module_name = f"{component}_{rows}x{cols}"
+    
+    if component == "systolic_array":
+        rtl_code = f"""module mac_pe #(
+    parameter int DATA_W = {data_w},
+    parameter int ACC_W  = {acc_w}
+) (
+    input  logic                     clk,
+    input  logic                     rst_n,
+    input  logic                     load_w,
+    input  logic signed [DATA_W-1:0] a_in,
+    input  logic signed [ACC_W-1:0]  psum_in,
+    output logic signed [DATA_W-1:0] a_out,
+    output logic signed [ACC_W-1:0]  psum_out
+);
+    
+    logic signed [DATA_W-1:0] weight;
+    
+    always_ff @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            weight   <= '0;
+            a_out    <= '0;
+            psum_out <= '0;
+        end else begin
+            // a_out also carries weights along the row while load_w is high
+            a_out <= a_in;
+            if (load_w)
+                weight   <= a_in;
+            else
+                psum_out <= psum_in + a_in * weight;
+        end
+    end
+    
+endmodule
+
+module {module_name} #(
+    parameter int ROWS   = {rows},
+    parameter int COLS   = {cols},
+    parameter int DATA_W = {data_w},
+    parameter int ACC_W  = {acc_w}
+) (
+    input  logic                     clk,
+    input  logic                     rst_n,
+    input  logic                     load_w,
+    input  logic signed [DATA_W-1:0] a_in  [ROWS],
+    output logic signed [ACC_W-1:0]  y_out [COLS]
+);
+    
+    // Activations flow left-to-right, partial sums top-to-bottom.
+    // Weight load: hold load_w for COLS cycles, driving a_in[r] with row r's
+    // weights last column first; they shift into place through a_out.
+    // Compute: present one activation vector per cycle on a_in; row r is
+    // delayed r cycles and column c's sum COLS-1-c cycles, so y_out holds
+    // a whole result vector ROWS+COLS-1 cycles after its input.
+    logic signed [DATA_W-1:0] a_bus  [ROWS][COLS+1];
+    logic signed [ACC_W-1:0]  p_bus  [ROWS+1][COLS];
+    logic signed [DATA_W-1:0] a_skew [ROWS][ROWS];
+    logic signed [ACC_W-1:0]  y_skew [COLS][COLS];
+    
+    genvar r, c, k;
+    generate
+        for (r = 0; r < ROWS; r++) begin : g_row_in
+            assign a_skew[r][0] = a_in[r];
+            for (k = 1; k <= r; k++) begin : g_skew
+                always_ff @(posedge clk or negedge rst_n)
+                    if (!rst_n) a_skew[r][k] <= '0;
+                    else        a_skew[r][k] <= a_skew[r][k-1];
+            end
+            assign a_bus[r][0] = load_w ? a_in[r] : a_skew[r][r];
+        end
+        for (c = 0; c < COLS; c++) begin : g_col_io
+            assign p_bus[0][c]  = '0;
+            assign y_skew[c][0] = p_bus[ROWS][c];
+            for (k = 1; k < COLS - c; k++) begin : g_deskew
+                always_ff @(posedge clk or negedge rst_n)
+                    if (!rst_n) y_skew[c][k] <= '0;
+                    else        y_skew[c][k] <= y_skew[c][k-1];
+            end
+            assign y_out[c] = y_skew[c][COLS-1-c];
+        end
+        for (r = 0; r < ROWS; r++) begin : g_r
+            for (c = 0; c < COLS; c++) begin : g_c
+                mac_pe #(.DATA_W(DATA_W), .ACC_W(ACC_W)) u_pe (
+                    .clk      (clk),
+                    .rst_n    (rst_n),
+                    .load_w   (load_w),
+                    .a_in     (a_bus[r][c]),
+                    .psum_in  (p_bus[r][c]),
+                    .a_out    (a_bus[r][c+1]),
+                    .psum_out (p_bus[r+1][c])
+                );
+            end
+        end
+    endgenerate
+    
+endmodule
+"""
+    else:
+        rtl_code = f"""module {module_name} #(
+    parameter int ROWS   = {rows},
+    parameter int COLS   = {cols},
+    parameter int DATA_W = {data_w},
+    parameter int ACC_W  = {acc_w}
+) (
+    input  logic                     clk,
+    input  logic                     rst_n,
+    input  logic                     load_w,
+    input  logic                     clear,
+    input  logic [$clog2(ROWS > 1 ? ROWS : 2)-1:0] w_row,
+    input  logic signed [DATA_W-1:0] w_in  [COLS],
+    input  logic signed [DATA_W-1:0] a_in  [ROWS],
+    output logic signed [ACC_W-1:0]  y_out [COLS]
+);
+    
+    logic signed [DATA_W-1:0] weight [ROWS][COLS];
+    
+    always_ff @(posedge clk) begin
+        if (load_w)
+            for (int c = 0; c < COLS; c++)
+                weight[w_row][c] <= w_in[c];
+    end
+    
+    // One adder tree per column, activations broadcast across columns
+    always_ff @(posedge clk or negedge rst_n) begin
+        if (!rst_n) begin
+            for (int c = 0; c < COLS; c++) y_out[c] <= '0;
+        end else begin
+            for (int c = 0; c < COLS; c++) begin
+                automatic logic signed [ACC_W-1:0] sum = clear ? '0 : y_out[c];
+                for (int r = 0; r < ROWS; r++)
+                    sum += a_in[r] * weight[r][c];
+                y_out[c] <= sum;
+            end
+        end
+    end
+    
+endmodule
+"""
+    return module_name, rtl_code
@@ -0,0 +1,48 @@
+"""Test RTL Generator FSM Output."""
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _generate(spec):
+    response = client.post("/generate", json={"spec": {"type": "finite_state_machine", **spec}})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_fsm_uses_synthesized_encoding():
+    """Test the state codes chosen by the synthesis agent appear in the RTL."""
+    result = _generate({
+        "state_names": ["IDLE", "BUSY", "DONE"],
+        "state_encoding": {"IDLE": 1, "BUSY": 2, "DONE": 4},
+        "state_width": 3,
+        "encoding": "one_hot",
+    })
+    code = result["code"]
+    assert result["module_name"] == "fsm"
+    assert "// State encoding: one_hot" in code
+    assert "localparam logic [2:0] IDLE = 3'b001;" in code
+    assert "localparam logic [2:0] DONE = 3'b100;" in code
+    assert "traffic_light" not in code
+
+
+def test_fsm_transitions_and_conditions():
+    """Test transition conditions become inputs and drive the next-state logic."""
+    code = _generate({
+        "state_names": ["A", "B"],
+        "transitions": [["A", "B", "go && ready"], ["B", "A"]],
+    })["code"]
+    assert "input  logic go," in code
+    assert "input  logic ready," in code
+    assert "A: begin if (go && ready) next_state = B; end" in code
+    assert "B: begin next_state = A; end" in code
+
+
+def test_fsm_without_encoding_is_binary():
+    """Test a spec without a state assignment falls back to binary codes."""
+    code = _generate({"state_names": ["S0", "S1", "S2", "S3", "S4"]})["code"]
+    assert "// State encoding: binary" in code
+    assert "localparam logic [2:0] S4 = 3'b100;" in code
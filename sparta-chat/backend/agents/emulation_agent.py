@@ -1,18 +1,26 @@
 """Emulation/Simulation Agent"""
-from typing import Dict, Any
-import httpx
+from typing import Dict, Any, Optional
+
+from utils.circuit_breaker import breakers
+from utils.http_clients import HTTPClientRegistry, http_clients
 
 
 class EmulationAgent:
     """Hardware emulation and simulation"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[HTTPClientRegistry] = None):
         self.emulator_url = "http://emulator:8020"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.http = http or http_clients
+        self.breaker = breakers.register("emulator", self.emulator_url)
+    
+    @property
+    def client(self):
+        """Pooled client for the service (shared registry, keep-alive across turns)"""
+        return self.http.get("emulator")
     
     async def simulate(self, rtl_result: Dict[str, Any]) -> Dict[str, Any]:
         """Run simulation on RTL code"""
-        try:
+        async def call_service():
             response = await self.client.post(
                 f"{self.emulator_url}/emulate",
                 json={
@@ -23,8 +31,8 @@ class EmulationAgent:
             )
             response.raise_for_status()
             return response.json()
-        except Exception:
-            return self._inline_simulate(rtl_result)
+        
+        return await self.breaker.call(call_service, lambda: self._inline_simulate(rtl_result))
     
     def _inline_simulate(self, rtl: Dict[str, Any]) -> Dict[str, Any]:
         """Inline simulation with component-specific test patterns"""
@@ -4,30 +4,48 @@ Supports multiple backends with automatic fallback
 """
 import os
 import asyncio
-import httpx
 from typing import Dict, Any, Optional
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 from datetime import datetime
-import numpy as np
 import hashlib
 
+from utils.http_clients import HTTPClientRegistry, http_clients
+from utils.lexicon import scan
+from utils.render_pool import RENDER_WAIT_TIMEOUT, RenderJob, RenderQueueFull, render_pool
+from utils.request_analysis import RequestAnalysis
+from utils.shared_state import SharedState, shared_state
+from utils.startup import lazy_import
+
+# Only the _draw_* methods need these, and they run in render workers
+plt = lazy_import("matplotlib.pyplot")
+patches = lazy_import("matplotlib.patches")
+np = lazy_import("numpy")
+
+# automatic1111 webui, probed once after startup
+SD_LOCAL_URL = os.getenv("SD_LOCAL_URL", "http://localhost:7860")
+
 
 class ImageAgent:
     """Agent for generating images, diagrams, and visualizations"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[HTTPClientRegistry] = None, state: Optional[SharedState] = None):
+        self.http = http or http_clients
+        # Filename counter lives here so workers never hand out the same number
+        self.state = state or shared_state
         self.output_dir = "static/generated"
         os.makedirs(self.output_dir, exist_ok=True)
         
-        # Available models (in priority order)
+        # Available models (in priority order); local Stable Diffusion is
+        # added by probe_local_models() once the app is up
         self.available_models = self._detect_available_models()
         self.max_retries = 3
-        
-        # Image counter for unique filenames
-        self.image_counter = 0
+        self._probe_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Probe the local Stable Diffusion webui in the background (startup hook)"""
+        if self._probe_task is None:
+            self._probe_task = asyncio.create_task(self.probe_local_models())
     
-    def _detect_available_models(self) -> list:
+    def _detect_available_models(self, local_sd: bool = False) -> list:
         """Detect which image generation models are available"""
         models = []
         
@@ -40,26 +58,36 @@ class ImageAgent:
             models.append("replicate")
         
         # Check for local Stable Diffusion
-        try:
-            # Ping automatic1111 webui
-            response = httpx.get("http://localhost:7860", timeout=1)
-            if response.status_code == 200:
-                models.append("stable_diffusion_local")
-        except:
-            pass
+        if local_sd:
+            models.append("stable_diffusion_local")
         
         # Always have matplotlib fallback
         models.append("matplotlib")
         
         return models
     
+    async def probe_local_models(self) -> list:
+        """Ping the local Stable Diffusion webui (background task after startup)"""
+        try:
+            response = await self.http.get("health-probe").get(SD_LOCAL_URL, timeout=1)
+            local_sd = response.status_code == 200
+        except Exception:
+            local_sd = False
+        self.available_models = self._detect_available_models(local_sd)
+        return self.available_models
+    
     def choose_model(self) -> str:
         """Choose the best available model"""
         if not self.available_models:
             return "matplotlib"
         return self.available_models[0]
     
-    async def generate_image(self, prompt: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def generate_image(
+        self,
+        prompt: str,
+        context: Dict[str, Any] = None,
+        analysis: Optional[RequestAnalysis] = None
+    ) -> Dict[str, Any]:
         """
         Generate image from text prompt with automatic model selection and fallback
         
@@ -77,20 +105,19 @@ class ImageAgent:
         
         # ALWAYS use web image search for ANY hardware/circuit design
         # Detect hardware keywords in prompt OR in context
-        keywords = ["adder", "alu", "counter", "fsm", "breadboard", "schematic", "circuit", "register", "uart", "mux", "demux", "flip-flop", "logic gate", "hardware", "design", "bit", "fpga", "asic", "rtl", "verilog"]
-        is_hardware = any(kw in prompt.lower() for kw in keywords)
+        # (the turn's shared analysis usually answers this without another scan)
+        is_hardware = (analysis is not None and analysis.matches.has("hardware")) or scan(prompt).has("hardware")
         
         # Also check context for hardware indicators
         if context and not is_hardware:
-            context_str = str(context).lower()
-            is_hardware = any(kw in context_str for kw in ["hardware", "rtl", "verilog", "circuit", "fpga"])
+            is_hardware = scan(str(context)).has("hardware_context")
         
         if is_hardware:
             # Force breadboard diagram generation instead of web search
             try:
-                filename = self._generate_filename("breadboard")
+                filename = await self._generate_filename("breadboard")
                 filepath = os.path.join(self.output_dir, filename)
-                self._draw_breadboard_diagram(filepath, prompt, context)
+                await self._render_to_file("_draw_breadboard_diagram", filepath, prompt, context)
                 print(f"[ImageAgent] ✅ Breadboard diagram generated: {filepath}")
                 return {
                     "status": "success",
@@ -131,7 +158,17 @@ class ImageAgent:
                     sanitized_prompt = self.refine_prompt(sanitized_prompt, str(e))
 
         # Final fallback to matplotlib diagram
-        return await self.fallback_diagram(prompt, context)
+        try:
+            return await self.fallback_diagram(prompt, context)
+        except RenderQueueFull as e:
+            print(f"[ImageAgent] ⚠️ Diagram skipped: {e}")
+            return {
+                "status": "error",
+                "image_path": None,
+                "model_used": "matplotlib_fallback",
+                "prompt_used": prompt,
+                "metadata": {"error": str(e)}
+            }
     
     def sanitize_prompt(self, prompt: str) -> str:
         """Sanitize and optimize prompt for image generation"""
@@ -139,8 +176,7 @@ class ImageAgent:
         sanitized = prompt.strip()
         
         # Add technical diagram keywords if needed
-        keywords = ["diagram", "schematic", "architecture", "flowchart", "circuit", "block diagram"]
-        has_visual_keyword = any(kw in sanitized.lower() for kw in keywords)
+        has_visual_keyword = scan(sanitized).has("visual")
         
         if not has_visual_keyword:
             sanitized = f"technical diagram showing {sanitized}"
@@ -179,15 +215,14 @@ class ImageAgent:
         image_url = response.data[0].url
         
         # Download image
-        async with httpx.AsyncClient() as http_client:
-            img_response = await http_client.get(image_url)
-            img_response.raise_for_status()
-            
-            filename = self._generate_filename("openai")
-            filepath = os.path.join(self.output_dir, filename)
-            
-            with open(filepath, "wb") as f:
-                f.write(img_response.content)
+        img_response = await self.http.get("images").get(image_url)
+        img_response.raise_for_status()
+        
+        filename = await self._generate_filename("openai")
+        filepath = os.path.join(self.output_dir, filename)
+        
+        with open(filepath, "wb") as f:
+            f.write(img_response.content)
         
         return {
             "status": "success",
@@ -207,15 +242,14 @@ class ImageAgent:
         )
         
         # Download the image
-        async with httpx.AsyncClient() as http_client:
-            img_response = await http_client.get(output[0])
-            img_response.raise_for_status()
-            
-            filename = self._generate_filename("replicate")
-            filepath = os.path.join(self.output_dir, filename)
-            
-            with open(filepath, "wb") as f:
-                f.write(img_response.content)
+        img_response = await self.http.get("images").get(output[0])
+        img_response.raise_for_status()
+        
+        filename = await self._generate_filename("replicate")
+        filepath = os.path.join(self.output_dir, filename)
+        
+        with open(filepath, "wb") as f:
+            f.write(img_response.content)
         
         return {
             "status": "success",
@@ -227,31 +261,31 @@ class ImageAgent:
     
     async def _generate_sd_local(self, prompt: str) -> Dict[str, Any]:
         """Generate image using local Stable Diffusion (automatic1111)"""
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                "http://localhost:7860/sdapi/v1/txt2img",
-                json={
-                    "prompt": prompt,
-                    "steps": 20,
-                    "width": 512,
-                    "height": 512,
-                    "cfg_scale": 7
-                }
-            )
-            response.raise_for_status()
-            
-            import base64
-            from PIL import Image
-            from io import BytesIO
-            
-            result = response.json()
-            image_data = base64.b64decode(result["images"][0])
-            
-            filename = self._generate_filename("sd_local")
-            filepath = os.path.join(self.output_dir, filename)
-            
-            image = Image.open(BytesIO(image_data))
-            image.save(filepath)
+        client = self.http.get("stable-diffusion")
+        response = await client.post(
+            f"{SD_LOCAL_URL}/sdapi/v1/txt2img",
+            json={
+                "prompt": prompt,
+                "steps": 20,
+                "width": 512,
+                "height": 512,
+                "cfg_scale": 7
+            }
+        )
+        response.raise_for_status()
+        
+        import base64
+        from PIL import Image
+        from io import BytesIO
+        
+        result = response.json()
+        image_data = base64.b64decode(result["images"][0])
+        
+        filename = await self._generate_filename("sd_local")
+        filepath = os.path.join(self.output_dir, filename)
+        
+        image = Image.open(BytesIO(image_data))
+        image.save(filepath)
         
         return {
             "status": "success",
@@ -263,22 +297,22 @@ class ImageAgent:
     
     async def _generate_matplotlib(self, prompt: str, context: Dict = None) -> Dict[str, Any]:
         """Generate diagram using matplotlib (fallback)"""
-        filename = self._generate_filename("matplotlib")
+        filename = await self._generate_filename("matplotlib")
         filepath = os.path.join(self.output_dir, filename)
         
         # Detect diagram type from prompt
-        prompt_lower = prompt.lower()
-        
-        if "architecture" in prompt_lower or "system" in prompt_lower:
-            self._draw_architecture_diagram(filepath, context)
-        elif "flowchart" in prompt_lower or "flow" in prompt_lower:
-            self._draw_flowchart(filepath, context)
-        elif "circuit" in prompt_lower or "schematic" in prompt_lower:
-            self._draw_circuit_diagram(filepath, context)
-        elif "block" in prompt_lower:
-            self._draw_block_diagram(filepath, context)
+        matches = scan(prompt)
+        
+        if matches.has("diagram_architecture"):
+            await self._render_to_file("_draw_architecture_diagram", filepath, context)
+        elif matches.has("diagram_flowchart"):
+            await self._render_to_file("_draw_flowchart", filepath, context)
+        elif matches.has("diagram_circuit"):
+            await self._render_to_file("_draw_circuit_diagram", filepath, context)
+        elif matches.has("diagram_block"):
+            await self._render_to_file("_draw_block_diagram", filepath, context)
         else:
-            self._draw_generic_diagram(filepath, prompt, context)
+            await self._render_to_file("_draw_generic_diagram", filepath, prompt, context)
         
         return {
             "status": "fallback",
@@ -292,13 +326,25 @@ class ImageAgent:
         """Final fallback - simple matplotlib diagram"""
         return await self._generate_matplotlib(prompt, context)
     
-    def _generate_filename(self, prefix: str) -> str:
+    async def _render_to_file(self, method: str, filepath: str, *args) -> str:
+        """
+        Run one of the static _draw_* methods in the render pool; returns the file path
+        Raises RenderQueueFull when no slot frees up within RENDER_WAIT_TIMEOUT
+        """
+        await render_pool.render(
+            RenderJob(f"agents.image_agent:ImageAgent.{method}", (filepath, *args)),
+            wait_timeout=RENDER_WAIT_TIMEOUT,
+        )
+        return filepath
+    
+    async def _generate_filename(self, prefix: str) -> str:
         """Generate unique filename for image"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.image_counter += 1
-        return f"{prefix}_{timestamp}_{self.image_counter:03d}.png"
+        image_id = await asyncio.to_thread(self.state.next_id, "image")
+        return f"{prefix}_{timestamp}_{image_id:03d}.png"
     
-    def _draw_architecture_diagram(self, filepath: str, context: Dict = None):
+    @staticmethod
+    def _draw_architecture_diagram(filepath: str, context: Dict = None):
         """Draw multi-agent system architecture"""
         fig, ax = plt.subplots(figsize=(12, 8))
         ax.set_xlim(0, 10)
@@ -356,7 +402,8 @@ class ImageAgent:
         plt.savefig(filepath, dpi=150, bbox_inches='tight')
         plt.close()
     
-    def _draw_flowchart(self, filepath: str, context: Dict = None):
+    @staticmethod
+    def _draw_flowchart(filepath: str, context: Dict = None):
         """Draw flowchart diagram"""
         fig, ax = plt.subplots(figsize=(10, 10))
         ax.set_xlim(0, 10)
@@ -392,7 +439,8 @@ class ImageAgent:
         plt.savefig(filepath, dpi=150, bbox_inches='tight')
         plt.close()
     
-    def _draw_circuit_diagram(self, filepath: str, context: Dict = None):
+    @staticmethod
+    def _draw_circuit_diagram(filepath: str, context: Dict = None):
         """Draw basic circuit schematic"""
         fig, ax = plt.subplots(figsize=(10, 6))
         ax.set_xlim(0, 10)
@@ -429,7 +477,8 @@ class ImageAgent:
         plt.savefig(filepath, dpi=150, bbox_inches='tight')
         plt.close()
     
-    def _draw_block_diagram(self, filepath: str, context: Dict = None):
+    @staticmethod
+    def _draw_block_diagram(filepath: str, context: Dict = None):
         """Draw block diagram"""
         fig, ax = plt.subplots(figsize=(12, 6))
         ax.set_xlim(0, 12)
@@ -464,7 +513,8 @@ class ImageAgent:
         plt.savefig(filepath, dpi=150, bbox_inches='tight')
         plt.close()
     
-    def _draw_generic_diagram(self, filepath: str, prompt: str, context: Dict = None):
+    @staticmethod
+    def _draw_generic_diagram(filepath: str, prompt: str, context: Dict = None):
         """Draw generic conceptual diagram"""
         fig, ax = plt.subplots(figsize=(10, 8))
         ax.set_xlim(0, 10)
@@ -502,7 +552,8 @@ class ImageAgent:
         plt.savefig(filepath, dpi=150, bbox_inches='tight')
         plt.close()
 
-    def _draw_breadboard_diagram(self, filepath: str, prompt: str, context: Dict = None):
+    @staticmethod
+    def _draw_breadboard_diagram(filepath: str, prompt: str, context: Dict = None):
         """Draw realistic breadboard with proper hole grid, components, and wire routing."""
         fig, ax = plt.subplots(figsize=(14, 8))
         ax.set_xlim(0, 14)
@@ -550,13 +601,11 @@ class ImageAgent:
             'demux': ('Demux', '74HC138', 16),
             'flip-flop': ('D Flip-Flop', '74LS74', 14),
         }
-        lower_prompt = prompt.lower()
         # Match in priority order (specific before generic)
         matched = None
-        for k, v in kw_map.items():
-            if k in lower_prompt:
-                matched = (k, v)
-                break
+        part = scan(prompt).first("breadboard_part", kw_map)
+        if part:
+            matched = (part, kw_map[part])
         if not matched:
             matched = ('logic', ('Logic IC', '74HC00', 14))
         main_ic = matched[1]
@@ -9,9 +9,11 @@ class PCBAgent:
     def __init__(self, service_url: Optional[str] = None):
         self.service_url = service_url
     
-    async def design_pcb(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
+    async def design_pcb(self, requirements: Dict[str, Any], manufacturing: bool = True) -> Dict[str, Any]:
         """
-        Generate complete PCB design from requirements
+        Generate complete PCB design from requirements. With manufacturing=False
+        the layout and Gerber files are left out (the download endpoints route
+        them on demand)
         """
         purpose = requirements.get("purpose", "general circuit")
         voltage = requirements.get("voltage", "5V")
@@ -23,22 +25,23 @@ class PCBAgent:
         # Select components
         bom = await self._generate_bom(purpose, voltage)
         
-        # Route PCB
-        layout = await self._route_pcb(schematic, bom)
-        
-        # Generate manufacturing files
-        gerber = await self._generate_gerber(layout)
-        
-        return {
+        design = {
             "schematic": schematic,
             "bom": bom,
-            "layout": layout,
-            "gerber_files": gerber,
             "board_size": {"width": 100, "height": 80, "unit": "mm"},
             "layers": 2,
             "trace_width": "0.25mm",
             "clearance": "0.2mm"
         }
+        
+        if manufacturing:
+            # Route PCB
+            design["layout"] = await self._route_pcb(schematic, bom)
+            
+            # Generate manufacturing files
+            design["gerber_files"] = await self._generate_gerber(design["layout"])
+        
+        return design
     
     async def _generate_schematic(self, purpose: str, components: list) -> str:
         """Generate circuit schematic"""
@@ -1,20 +1,28 @@
 """Planning Agent - breaks down hardware design tasks into steps"""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from utils.request_analysis import RequestAnalysis, analyze_request
 
 
 class PlanningAgent:
     """Agent that creates execution plans for hardware design tasks"""
     
-    async def create_plan(self, user_message: str, context: List[Dict]) -> Dict[str, Any]:
+    async def create_plan(
+        self,
+        user_message: str,
+        context: List[Dict],
+        analysis: Optional[RequestAnalysis] = None
+    ) -> Dict[str, Any]:
         """
         Analyze user request and create step-by-step plan
         """
-        message_lower = user_message.lower()
+        analysis = analysis or analyze_request(user_message)
+        matches = analysis.matches
         
         steps = []
         
         # Determine design intent
-        if any(word in message_lower for word in ["create", "design", "build", "generate"]):
+        if matches.has("plan_design"):
             steps.append({
                 "step": 1,
                 "action": "parse_requirements",
@@ -36,7 +44,7 @@ class PlanningAgent:
                 "description": "Run functional simulation and verify behavior"
             })
         
-        elif any(word in message_lower for word in ["optimize", "improve", "refine"]):
+        elif matches.has("plan_optimize"):
             steps.append({
                 "step": 1,
                 "action": "load_previous_design",
@@ -58,7 +66,7 @@ class PlanningAgent:
                 "description": "Compare before/after metrics"
             })
         
-        elif any(word in message_lower for word in ["simulate", "test", "verify"]):
+        elif matches.has("plan_verify"):
             steps.append({
                 "step": 1,
                 "action": "load_design",
@@ -94,23 +102,8 @@ class PlanningAgent:
             })
         
         return {
-            "intent": self._detect_intent(message_lower),
+            "intent": analysis.intent,
             "steps": steps,
             "estimated_time": len(steps) * 2,  # seconds
             "complexity": "simple" if len(steps) <= 3 else "moderate"
         }
-    
-    def _detect_intent(self, message: str) -> str:
-        """Detect primary user intent"""
-        if any(word in message for word in ["pcb", "board", "circuit board", "led matrix", "sensor board", "motor controller"]):
-            return "pcb_design"
-        elif any(word in message for word in ["create", "design", "build"]):
-            return "design_creation"
-        elif "optimize" in message or "improve" in message:
-            return "optimization"
-        elif "simulate" in message or "test" in message:
-            return "verification"
-        elif "explain" in message or "how" in message:
-            return "explanation"
-        else:
-            return "general_query"
@@ -1,26 +1,36 @@
 """RTL Generation Agent"""
-from typing import Dict, Any
-import httpx
+from typing import Dict, Any, Optional
+
+from utils.circuit_breaker import breakers
+from utils.http_clients import HTTPClientRegistry, http_clients
+from utils.fsm_encoding import optimize_fsm_encoding
+from utils.fsm_rtl import generate_fsm
 
 
 class RTLAgent:
     """RTL/Verilog code generation"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[HTTPClientRegistry] = None):
         self.rtl_service_url = "http://rtl-generator:8021"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.http = http or http_clients
+        self.breaker = breakers.register("rtl-generator", self.rtl_service_url)
+    
+    @property
+    def client(self):
+        """Pooled client for the service (shared registry, keep-alive across turns)"""
+        return self.http.get("rtl-generator")
     
     async def generate(self, architecture: Dict[str, Any]) -> Dict[str, Any]:
         """Generate RTL code from architecture"""
-        try:
+        async def call_service():
             response = await self.client.post(
                 f"{self.rtl_service_url}/generate",
                 json={"spec": architecture, "language": "systemverilog"}
             )
             response.raise_for_status()
             return response.json()
-        except Exception:
-            return self._inline_generate(architecture)
+        
+        return await self.breaker.call(call_service, lambda: self._inline_generate(architecture))
     
     def _inline_generate(self, arch: Dict[str, Any]) -> Dict[str, Any]:
         """Generate RTL inline"""
@@ -78,45 +88,22 @@ endmodule"""
         
         elif comp_type == "finite_state_machine":
             states = arch.get("state_names", ["IDLE", "ACTIVE", "DONE"])
-            num_states = len(states)
-            state_bits = (num_states - 1).bit_length()
             
-            state_params = "\\n    ".join([f"localparam {s} = {i};" for i, s in enumerate(states)])
-            code = f"""module fsm (
-    input  logic clk, rst_n,
-    input  logic start, done_signal,
-    output logic [{state_bits-1}:0] current_state,
-    output logic active, finished
-);
-    {state_params}
-    
-    logic [{state_bits-1}:0] next_state;
-    
-    // State register
-    always_ff @(posedge clk or negedge rst_n) begin
-        if (!rst_n)
-            current_state <= {states[0]};
-        else
-            current_state <= next_state;
-    end
-    
-    // Next state logic
-    always_comb begin
-        next_state = current_state;
-        case (current_state)
-            {states[0]}: if (start) next_state = {states[1] if len(states) > 1 else states[0]};
-            {states[1] if len(states) > 1 else states[0]}: next_state = {states[2] if len(states) > 2 else states[0]};
-            {states[2] if len(states) > 2 else states[0]}: if (done_signal) next_state = {states[3] if len(states) > 3 else states[0]};
-            {states[3] if len(states) > 3 else states[0]}: next_state = {states[0]};
-            default: next_state = {states[0]};
-        endcase
-    end
-    
-    // Output logic
-    assign active = (current_state != {states[0]});
-    assign finished = (current_state == {states[-1]});
-endmodule"""
-            return {"code": code, "module_name": "fsm", "language": "systemverilog"}
+            # Use the state assignment chosen during synthesis, or pick one now
+            codes = arch.get("state_encoding")
+            state_bits = arch.get("state_width")
+            encoding = arch.get("encoding")
+            if not codes or not state_bits:
+                goal = arch.get("optimization_goal", "area")
+                try:
+                    chosen = optimize_fsm_encoding(states, arch.get("transitions"), goal)
+                    codes, state_bits, encoding = chosen["codes"], chosen["width"], chosen["encoding"]
+                except ValueError:
+                    # Too many states to search: generate_fsm falls back to binary
+                    codes = state_bits = encoding = None
+            
+            result = generate_fsm(states, arch.get("transitions"), codes, state_bits, encoding)
+            return {**result, "language": "systemverilog"}
         
         elif comp_type == "uart_transmitter":
             data_bits = arch.get("data_bits", 8)
@@ -1,27 +1,74 @@
 """Synthesis Agent - creates hardware architecture"""
-from typing import Dict, Any
-import httpx
+import asyncio
+import os
+from typing import Dict, Any, Optional
+
+from utils.circuit_breaker import breakers
+from utils.http_clients import HTTPClientRegistry, http_clients
+from utils.synthesis_cache import SynthesisCache, cache_key
+from utils.fsm_encoding import MAX_FSM_STATES, optimize_fsm_encoding
 
 
 class SynthesisAgent:
     """Hardware synthesis and architecture generation"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[HTTPClientRegistry] = None):
         self.synthesis_service_url = "http://synthesis-agent:8011"
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.http = http or http_clients
+        self.breaker = breakers.register("synthesis-agent", self.synthesis_service_url)
+        # Repeated designs and exploration re-visits skip synthesis entirely
+        self.cache = SynthesisCache(
+            max_entries=int(os.getenv("SYNTHESIS_CACHE_SIZE", "512")),
+            db_path=os.getenv("SYNTHESIS_CACHE_DB")
+        )
+    
+    @property
+    def client(self):
+        """Pooled client for the service (shared registry, keep-alive across turns)"""
+        return self.http.get("synthesis-agent")
     
     async def synthesize(self, spec: Dict[str, Any]) -> Dict[str, Any]:
         """Create hardware architecture from specification"""
-        try:
+        constraints = spec.get("constraints", {})
+        key = cache_key(spec, constraints)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._from_service(cached)
+        
+        async def call_service():
             response = await self.client.post(
                 f"{self.synthesis_service_url}/synthesize",
-                json={"spec": spec, "constraints": spec.get("constraints", {})}
+                json={"spec": spec, "constraints": constraints}
             )
             response.raise_for_status()
             return response.json()
-        except Exception as e:
-            # Inline synthesis fallback
-            return self._inline_synthesis(spec)
+        
+        result = await self.breaker.call(call_service, lambda: None)
+        if result is None:
+            # Inline synthesis fallback: a degraded estimate, never cached, so the
+            # service's answer replaces it once the service recovers. The FSM
+            # encoding search is CPU-bound, so it runs off the event loop
+            return await asyncio.to_thread(self._inline_synthesis, spec)
+        
+        result = self._from_service(result)
+        if not result.get("error"):
+            self.cache.put(key, result)
+        return result
+    
+    @staticmethod
+    def _from_service(result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Flatten the service's {"architecture", "components", "estimated_metrics"}
+        into the architecture dict the inline fallback returns, which is what the
+        RTL agent and the formatters read
+        """
+        if "architecture" not in result:
+            return result
+        return {
+            **result["architecture"],
+            "components": result.get("components", []),
+            "estimated_metrics": result.get("estimated_metrics", {}),
+        }
     
     def _inline_synthesis(self, spec: Dict[str, Any]) -> Dict[str, Any]:
         """Inline synthesis when service unavailable"""
@@ -56,12 +103,22 @@ class SynthesisAgent:
         elif component == "fsm":
             num_states = spec.get("num_states", 4)
             states = spec.get("states", ["IDLE", "ACTIVE", "DONE"])
+            goal = spec.get("constraints", {}).get("optimization_goal", "area")
+            if len(states) > MAX_FSM_STATES:
+                return {"error": f"FSM has {len(states)} states; at most {MAX_FSM_STATES} are supported"}
+            encoding = optimize_fsm_encoding(states, spec.get("transitions"), goal)
             return {
                 "type": "finite_state_machine",
                 "num_states": num_states,
                 "state_names": states,
+                "transitions": spec.get("transitions"),
+                "encoding": encoding["encoding"],
+                "state_width": encoding["width"],
+                "state_encoding": encoding["codes"],
+                "encoding_cost": encoding["cost"],
                 "components": ["state_register", "next_state_logic", "output_logic"],
                 "estimated_metrics": {
+                    "flip_flops": encoding["width"],
                     "area_mm2": 0.03 * num_states,
                     "power_mw": 0.8 * num_states,
                     "latency_ns": 2.5,
@@ -2,6 +2,9 @@ import os
 import httpx
 from typing import Optional
 
+from utils.http_clients import http_clients
+from utils.lexicon import scan
+
 
 KEYWORD_IMAGE_MAP = {
     # Deterministic, topic-relevant images (schematics, breadboards, logic)
@@ -42,7 +45,11 @@ KEYWORD_IMAGE_MAP = {
 }
 
 
-async def fetch_first_image(query: str, output_dir: str = "static/generated") -> Optional[str]:
+async def fetch_first_image(
+    query: str,
+    output_dir: str = "static/generated",
+    client: Optional[httpx.AsyncClient] = None
+) -> Optional[str]:
     """
     Deterministically fetch an image relevant to the hardware keyword.
     - If a known keyword is present, use its curated URLs (schematics/breadboards).
@@ -51,16 +58,7 @@ async def fetch_first_image(query: str, output_dir: str = "static/generated") ->
     # Ensure output dir exists
     os.makedirs(output_dir, exist_ok=True)
 
-    q = query.lower()
-    matched_key = None
-    for key in KEYWORD_IMAGE_MAP.keys():
-        if key in q:
-            matched_key = key
-            break
-
-    # Special handling: detect "adder" variants like "4-bit adder"
-    if not matched_key and "adder" in q:
-        matched_key = "adder"
+    matched_key = scan(query).first("image_topic", KEYWORD_IMAGE_MAP) or None
 
     if not matched_key:
         print(f"[WebImageSearch] No keyword match in query: {query}")
@@ -69,29 +67,29 @@ async def fetch_first_image(query: str, output_dir: str = "static/generated") ->
     urls = KEYWORD_IMAGE_MAP[matched_key]
     print(f"[WebImageSearch] Keyword '{matched_key}' matched. Trying {len(urls)} URLs...")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for url in urls:
-            try:
-                print(f"[WebImageSearch] Downloading: {url}")
-                resp = await client.get(url, follow_redirects=True)
-                if resp.status_code == 200 and len(resp.content) > 1000:
-                    # Decide extension
-                    ext = ".jpg"
-                    if url.endswith(".svg"):
-                        ext = ".svg"
-                    elif url.endswith(".png"):
-                        ext = ".png"
+    client = client or http_clients.get("images")
+    for url in urls:
+        try:
+            print(f"[WebImageSearch] Downloading: {url}")
+            resp = await client.get(url, follow_redirects=True)
+            if resp.status_code == 200 and len(resp.content) > 1000:
+                # Decide extension
+                ext = ".jpg"
+                if url.endswith(".svg"):
+                    ext = ".svg"
+                elif url.endswith(".png"):
+                    ext = ".png"
 
-                    filename = f"web_{matched_key}_{abs(hash(url))}{ext}"
-                    path = os.path.join(output_dir, filename)
-                    with open(path, "wb") as f:
-                        f.write(resp.content)
-                    print(f"[WebImageSearch] ✅ Saved: {path}")
-                    return path
-                else:
-                    print(f"[WebImageSearch] Skipped (status {resp.status_code} / small payload)")
-            except Exception as e:
-                print(f"[WebImageSearch] Error fetching {url}: {e}")
+                filename = f"web_{matched_key}_{abs(hash(url))}{ext}"
+                path = os.path.join(output_dir, filename)
+                with open(path, "wb") as f:
+                    f.write(resp.content)
+                print(f"[WebImageSearch] ✅ Saved: {path}")
+                return path
+            else:
+                print(f"[WebImageSearch] Skipped (status {resp.status_code} / small payload)")
+        except Exception as e:
+            print(f"[WebImageSearch] Error fetching {url}: {e}")
 
     print(f"[WebImageSearch] ❌ All curated URLs failed for '{matched_key}'")
     return None
@@ -1,60 +1,62 @@
-"""Download endpoints for RTL files, reports, PCB files"""
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+"""Download endpoints for RTL files, reports, PCB files
+
+Nothing is built when a turn finishes: save_session_design only records a
+manifest of recipes (generator, generator version, which design fields it
+reads). Each artifact is rendered on its first download and cached under a
+digest of its recipe, so repeat downloads - and other sessions with the same
+design - are served from memory.
+"""
+import asyncio
+import hashlib
+import inspect
+import json
 import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+
+from agents.pcb_agent import PCBAgent
+from utils.artifact_store import etag_matches
+from utils.hdl_artifacts import generate_testbench, generate_vcd
+from utils.shared_state import shared_state
 
 router = APIRouter()
 
-# Store design data temporarily (will be populated by chat endpoint)
-session_designs = {}
+# Kept in shared state so a download works on any worker; expires after SESSION_TTL seconds
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))
 
-def save_session_design(session_id: str, design_data: dict):
-    """Save design data for downloads"""
-    session_designs[session_id] = design_data
+# Store design data (will be populated by chat endpoint)
+session_designs = shared_state.mapping("session_designs", SESSION_TTL)
 
-@router.get("/download/rtl/{session_id}")
-async def download_rtl(session_id: str):
-    """Download RTL Verilog code"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
-    rtl_code = design.get("rtl_code", "// No RTL code available")
-    
-    return Response(
-        content=rtl_code,
-        media_type="text/plain",
-        headers={"Content-Disposition": f"attachment; filename=rtl_{session_id[:8]}.v"}
-    )
+# Per-session artifact recipes, rebuilt whenever the session's design changes
+session_manifests = shared_state.mapping("download_manifests", SESSION_TTL)
 
-@router.get("/download/testbench/{session_id}")
-async def download_testbench(session_id: str):
-    """Download testbench code"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
-    testbench = design.get("testbench", "// No testbench available")
-    
-    return Response(
-        content=testbench,
-        media_type="text/plain",
-        headers={"Content-Disposition": f"attachment; filename=testbench_{session_id[:8]}.v"}
-    )
+# Bump when any generator's output changes so cached renders are not reused
+GENERATOR_VERSION = 2
 
-@router.get("/download/report/{session_id}")
-async def download_report(session_id: str):
-    """Download design report"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
+
+def _render_rtl(session_id: str, design: dict) -> str:
+    return design.get("rtl_code") or "// No RTL code available"
+
+
+def _render_testbench(session_id: str, design: dict) -> str:
+    # The RTL service may ship its own; otherwise derive one from the port list
+    return design.get("testbench") or generate_testbench(design.get("rtl_code", ""))
+
+
+def _render_vcd(session_id: str, design: dict) -> str:
+    return generate_vcd(design.get("rtl_code", ""))
+
+
+def _render_report(session_id: str, design: dict) -> str:
     parsed_spec = design.get("parsed_spec", {})
     architecture = design.get("architecture", {})
     simulation = design.get("simulation", {})
-    
-    # Generate report
-    report = f"""# HARDWARE DESIGN REPORT
+
+    return f"""# HARDWARE DESIGN REPORT
 # Session: {session_id}
 
 ## COMPONENT SPECIFICATION
@@ -82,79 +84,52 @@ async def download_report(session_id: str):
 ## FILES GENERATED
 - RTL Code: /download/rtl/{session_id}
 - Testbench: /download/testbench/{session_id}
+- Waveform (VCD): /download/vcd/{session_id}
 - Report: This file
 
 ---
 Generated by SPARTA Hardware Design Assistant v2.0
 """
-    
-    return Response(
-        content=report,
-        media_type="text/plain",
-        headers={"Content-Disposition": f"attachment; filename=report_{session_id[:8]}.txt"}
-    )
 
-@router.get("/download/pcb/schematic/{session_id}")
-async def download_pcb_schematic(session_id: str):
-    """Download PCB schematic as text file"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
-    pcb_design = design.get("pcb_design", {})
-    schematic = pcb_design.get("schematic", "No schematic available")
-    
-    return Response(
-        content=schematic,
-        media_type="text/plain",
-        headers={"Content-Disposition": f"attachment; filename=schematic_{session_id[:8]}.txt"}
-    )
 
-@router.get("/download/pcb/bom/{session_id}")
-async def download_pcb_bom(session_id: str):
-    """Download BOM as CSV"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
-    pcb_design = design.get("pcb_design", {})
-    bom = pcb_design.get("bom", [])
-    
-    # Generate CSV
+def _render_pcb_schematic(session_id: str, design: dict) -> str:
+    return design.get("pcb_design", {}).get("schematic", "No schematic available")
+
+
+def _render_bom(session_id: str, design: dict) -> str:
+    bom = design.get("pcb_design", {}).get("bom", [])
+
     csv_lines = ["Component,Value,Package,Quantity,Price"]
     for item in bom:
         csv_lines.append(
             f"{item.get('component', 'N/A')},{item.get('value', 'N/A')},"
             f"{item.get('package', 'N/A')},{item.get('qty', 1)},${item.get('price', '0.00')}"
         )
-    
-    bom_csv = "\\n".join(csv_lines)
-    
-    return Response(
-        content=bom_csv,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=bom_{session_id[:8]}.csv"}
-    )
 
-@router.get("/download/pcb/gerber/{session_id}")
-async def download_gerber_info(session_id: str):
-    """Download Gerber file information as text"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
+    return "\n".join(csv_lines)
+
+
+async def _pcb_layout(pcb_design: dict) -> dict:
+    """Layout from the design, routed now if the turn skipped it"""
+    if "layout" in pcb_design:
+        return pcb_design["layout"]
+    return await PCBAgent()._route_pcb(pcb_design.get("schematic", ""), pcb_design.get("bom", []))
+
+
+async def _render_gerber(session_id: str, design: dict) -> str:
     pcb_design = design.get("pcb_design", {})
-    gerber = pcb_design.get("gerber_files", {})
-    
-    # Generate Gerber file listing
+    gerber = pcb_design.get("gerber_files")
+    if gerber is None:
+        gerber = await PCBAgent()._generate_gerber(await _pcb_layout(pcb_design))
+
     gerber_info = f"""# Gerber Files for PCB Manufacturing
 # Session: {session_id}
 
 ## Files Included:
 """
     for layer, filename in gerber.items():
-        gerber_info += f"- {layer}: {filename}\\n"
-    
+        gerber_info += f"- {layer}: {filename}\n"
+
     gerber_info += f"""
 ## Board Specifications:
 - Size: {pcb_design.get('board_size', {}).get('width', 100)}mm x {pcb_design.get('board_size', {}).get('height', 80)}mm
@@ -165,24 +140,13 @@ async def download_gerber_info(session_id: str):
 ## Manufacturing Notes:
 Send these files to your PCB manufacturer (JLCPCB, PCBWay, etc.)
 """
-    
-    return Response(
-        content=gerber_info,
-        media_type="text/plain",
-        headers={"Content-Disposition": f"attachment; filename=gerber_info_{session_id[:8]}.txt"}
-    )
+    return gerber_info
 
-@router.get("/download/pcb/layout/{session_id}")
-async def download_pcb_layout(session_id: str):
-    """Download PCB layout information as text"""
-    if session_id not in session_designs:
-        raise HTTPException(status_code=404, detail="Design not found")
-    
-    design = session_designs[session_id]
-    pcb_design = design.get("pcb_design", {})
-    layout = pcb_design.get("layout", {})
-    
-    layout_info = f"""# PCB Layout Information
+
+async def _render_layout(session_id: str, design: dict) -> str:
+    layout = await _pcb_layout(design.get("pcb_design", {}))
+
+    return f"""# PCB Layout Information
 # Session: {session_id}
 
 ## Board Specifications:
@@ -200,9 +164,177 @@ async def download_pcb_layout(session_id: str):
 - Strategy: {layout.get('component_placement', 'N/A')}
 - Silkscreen: {layout.get('silkscreen', 'N/A')}
 """
-    
-    return Response(
-        content=layout_info,
-        media_type="text/plain",
-        headers={"Content-Disposition": f"attachment; filename=layout_{session_id[:8]}.txt"}
-    )
+
+
+@dataclass(frozen=True)
+class ArtifactRecipe:
+    """How to build one download: the design fields it reads and its generator"""
+    filename: str
+    media_type: str
+    inputs: Tuple[str, ...]
+    render: Callable[[str, dict], Any]
+    # Output mentions the session id, so it can't be shared across sessions
+    per_session: bool = False
+
+
+ARTIFACTS: Dict[str, ArtifactRecipe] = {
+    "rtl": ArtifactRecipe("rtl_{sid}.v", "text/plain", ("rtl_code",), _render_rtl),
+    "testbench": ArtifactRecipe("testbench_{sid}.v", "text/plain", ("testbench", "rtl_code"), _render_testbench),
+    "vcd": ArtifactRecipe("waveform_{sid}.vcd", "text/plain", ("rtl_code",), _render_vcd),
+    "report": ArtifactRecipe("report_{sid}.txt", "text/plain", ("parsed_spec", "architecture", "simulation"), _render_report, True),
+    "pcb_schematic": ArtifactRecipe("schematic_{sid}.txt", "text/plain", ("pcb_design",), _render_pcb_schematic),
+    "bom": ArtifactRecipe("bom_{sid}.csv", "text/csv", ("pcb_design",), _render_bom),
+    "gerber": ArtifactRecipe("gerber_info_{sid}.txt", "text/plain", ("pcb_design",), _render_gerber, True),
+    "layout": ArtifactRecipe("layout_{sid}.txt", "text/plain", ("pcb_design",), _render_layout, True),
+}
+
+
+class MaterializedCache:
+    """LRU of rendered downloads keyed by recipe digest"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str) -> Optional[bytes]:
+        content = self._entries.get(digest)
+        if content is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return content
+
+    def put(self, digest: str, content: bytes):
+        self._entries[digest] = content
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+materialized = MaterializedCache(int(os.getenv("DOWNLOAD_CACHE_SIZE", "256")))
+
+
+def save_session_design(session_id: str, design_data: dict):
+    """Save design data for downloads and record which artifacts it can produce"""
+    session_designs[session_id] = design_data
+    session_manifests[session_id] = {
+        name: {
+            "generator": f"{recipe.render.__name__}@v{GENERATOR_VERSION}",
+            "inputs": [key for key in recipe.inputs if key in design_data],
+            "digest": None,
+            "materialized": False,
+        }
+        for name, recipe in ARTIFACTS.items()
+        if any(key in design_data for key in recipe.inputs)
+    }
+
+
+def _recipe_digest(session_id: str, name: str, entry: Dict[str, Any], design: dict) -> str:
+    payload = {
+        "artifact": name,
+        "generator": entry["generator"],
+        "inputs": {key: design.get(key) for key in entry["inputs"]},
+        "session": session_id if ARTIFACTS[name].per_session else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+
+def _load_session(session_id: str) -> Tuple[Optional[dict], Dict[str, Any]]:
+    """Design and manifest of a session from shared state (blocking)"""
+    return session_designs.get(session_id), session_manifests.get(session_id, {})
+
+
+async def materialize(session_id: str, name: str) -> Tuple[bytes, str]:
+    """Rendered artifact and its digest; renders on first request, then from cache"""
+    design, manifest = await asyncio.to_thread(_load_session, session_id)
+    if design is None:
+        raise HTTPException(status_code=404, detail="Design not found")
+    entry = manifest.get(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"No {name} for this design")
+    digest = entry["digest"] or _recipe_digest(session_id, name, entry, design)
+
+    content = materialized.get(digest)
+    if content is None:
+        result = ARTIFACTS[name].render(session_id, design)
+        if inspect.isawaitable(result):
+            result = await result
+        content = result.encode("utf-8")
+        materialized.put(digest, content)
+    if not entry["materialized"]:
+        entry.update(digest=digest, materialized=True)
+        await asyncio.to_thread(session_manifests.__setitem__, session_id, manifest)
+    return content, digest
+
+
+async def _serve(session_id: str, name: str, request: Request) -> Response:
+    content, digest = await materialize(session_id, name)
+    recipe = ARTIFACTS[name]
+    headers = {
+        "Content-Disposition": f"attachment; filename={recipe.filename.format(sid=session_id[:8])}",
+        "ETag": f'"{digest}"',
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=recipe.media_type, headers=headers)
+
+
+@router.get("/download/manifest/{session_id}")
+async def download_manifest(session_id: str):
+    """Artifacts available for a session's design and whether each is built yet"""
+    design, manifest = await asyncio.to_thread(_load_session, session_id)
+    if design is None:
+        raise HTTPException(status_code=404, detail="Design not found")
+    return {"session_id": session_id, "artifacts": manifest, "cache": materialized.stats()}
+
+@router.get("/download/rtl/{session_id}")
+async def download_rtl(session_id: str, request: Request):
+    """Download RTL Verilog code"""
+    return await _serve(session_id, "rtl", request)
+
+@router.get("/download/testbench/{session_id}")
+async def download_testbench(session_id: str, request: Request):
+    """Download testbench code"""
+    return await _serve(session_id, "testbench", request)
+
+@router.get("/download/vcd/{session_id}")
+async def download_vcd(session_id: str, request: Request):
+    """Download the testbench stimulus as a VCD waveform"""
+    return await _serve(session_id, "vcd", request)
+
+@router.get("/download/report/{session_id}")
+async def download_report(session_id: str, request: Request):
+    """Download design report"""
+    return await _serve(session_id, "report", request)
+
+@router.get("/download/pcb/schematic/{session_id}")
+async def download_pcb_schematic(session_id: str, request: Request):
+    """Download PCB schematic as text file"""
+    return await _serve(session_id, "pcb_schematic", request)
+
+@router.get("/download/pcb/bom/{session_id}")
+async def download_pcb_bom(session_id: str, request: Request):
+    """Download BOM as CSV"""
+    return await _serve(session_id, "bom", request)
+
+@router.get("/download/pcb/gerber/{session_id}")
+async def download_gerber_info(session_id: str, request: Request):
+    """Download Gerber file information as text"""
+    return await _serve(session_id, "gerber", request)
+
+@router.get("/download/pcb/layout/{session_id}")
+async def download_pcb_layout(session_id: str, request: Request):
+    """Download PCB layout information as text"""
+    return await _serve(session_id, "layout", request)
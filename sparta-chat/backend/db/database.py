@@ -1,6 +1,6 @@
 """Database Manager - SQLite chat history storage"""
 import aiosqlite
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
 import os
@@ -59,6 +59,24 @@ class DatabaseManager:
         )
         await self.conn.commit()
     
+    async def save_messages(self, rows: List[Tuple[str, str, str, str, Optional[Dict[str, Any]]]]):
+        """Save a batch of (session_id, timestamp, role, message, metadata) rows in one transaction"""
+        try:
+            await self.conn.executemany(
+                """
+                INSERT INTO chat_history (session_id, timestamp, role, message, metadata)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (session_id, timestamp, role, message, json.dumps(metadata) if metadata else None)
+                    for session_id, timestamp, role, message, metadata in rows
+                ]
+            )
+            await self.conn.commit()
+        except Exception:
+            await self.conn.rollback()
+            raise
+    
     async def get_messages(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Retrieve chat history for a session"""
         cursor = await self.conn.execute(
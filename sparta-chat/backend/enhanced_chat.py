@@ -40,45 +40,85 @@ async def enhanced_chat_endpoint(message: ChatMessage):
             if domain == "pcb" or intent == "pcb_design":
                 return await handle_pcb_design(session_id, user_message, internal_notes)
             
-            # RTL Design flow
-            parsed_spec = await nlp_agent.parse(user_message, plan)
-            internal_notes.append(f"✓ Parsed: {parsed_spec.get('component')}")
+            # RTL Design flow as a stage DAG (StageGraph from utils.stage_graph):
+            # every visualization starts as soon as the result it renders exists
+            async def spec():
+                return await nlp_agent.parse(user_message, plan)
+            
+            async def architecture(spec):
+                result = await synthesis_agent.synthesize(spec)
+                if result.get("error"):
+                    raise StageRetry("Synthesis error")
+                return result
             
-            architecture = await synthesis_agent.synthesize(parsed_spec)
-            if architecture.get("error"):
-                internal_notes.append(f"⚠️ Synthesis error, retrying...")
-                continue
+            async def rtl(architecture):
+                result = await rtl_agent.generate(architecture)
+                if result.get("error"):
+                    raise StageRetry("RTL error")
+                return result
             
-            rtl_result = await rtl_agent.generate(architecture)
-            if rtl_result.get("error"):
-                internal_notes.append(f"⚠️ RTL error, retrying...")
-                continue
+            async def simulation(rtl):
+                result = await emulation_agent.simulate(rtl)
+                if result.get("error"):
+                    raise StageRetry("Simulation error")
+                return result
             
-            sim_result = await emulation_agent.simulate(rtl_result)
-            if sim_result.get("error"):
-                internal_notes.append(f"⚠️ Simulation error, retrying...")
-                continue
+            async def response_text(spec, architecture, rtl, simulation):
+                # 1. Format response
+                return format_response(spec, architecture, rtl.get("code"), simulation)
             
-            # Success! Generate all visualizations
-            internal_notes.append("✅ Design complete, generating visualizations...")
+            async def visualization(simulation):
+                # 2. Static waveform
+                return await create_visualization(simulation.get("waveform_data", ""), session_id)
             
-            # 1. Format response
-            response_text = format_response(parsed_spec, architecture, rtl_result.get("code"), sim_result)
+            async def block_diagram(architecture, spec):
+                # 3. Block diagram
+                return await block_diagram_gen.generate_diagram(architecture, spec)
             
-            # 2. Static waveform
-            visualization = await create_visualization(sim_result.get("waveform_data", ""), session_id)
+            async def interactive_waveform(simulation):
+                # 4. Interactive waveform (Plotly)
+                return await waveform_gen.create_interactive_waveform(simulation)
             
-            # 3. Block diagram
-            block_diagram = await block_diagram_gen.generate_diagram(architecture, parsed_spec)
+            async def highlighted_code(rtl):
+                # 5. Syntax highlighted code
+                return code_highlighter.highlight_rtl(rtl.get("code", ""), "systemverilog")
             
-            # 4. Interactive waveform (Plotly)
-            interactive_waveform = await waveform_gen.create_interactive_waveform(sim_result)
+            async def complexity(rtl):
+                # 6. Code complexity analysis
+                return code_highlighter.get_complexity_score(rtl.get("code", ""))
             
-            # 5. Syntax highlighted code
-            highlighted_code = code_highlighter.highlight_rtl(rtl_result.get("code", ""), "systemverilog")
+            graph = StageGraph()
+            graph.add("spec", spec, resource="network", timeout=STAGE_TIMEOUTS["spec"])
+            graph.add("architecture", architecture, ("spec",), "network", STAGE_TIMEOUTS["architecture"])
+            graph.add("rtl", rtl, ("architecture",), "network", STAGE_TIMEOUTS["rtl"])
+            graph.add("simulation", simulation, ("rtl",), "network", STAGE_TIMEOUTS["simulation"])
+            graph.add("response_text", response_text, ("spec", "architecture", "rtl", "simulation"), "cpu")
+            graph.add("visualization", visualization, ("simulation",), "cpu", STAGE_TIMEOUTS["render"], optional=True)
+            graph.add("block_diagram", block_diagram, ("architecture", "spec"), "cpu", STAGE_TIMEOUTS["render"], optional=True)
+            graph.add("interactive_waveform", interactive_waveform, ("simulation",), "cpu", STAGE_TIMEOUTS["render"], optional=True)
+            graph.add("highlighted_code", highlighted_code, ("rtl",), "cpu", optional=True)
+            graph.add("complexity", complexity, ("rtl",), "cpu", optional=True)
             
-            # 6. Code complexity analysis
-            complexity = code_highlighter.get_complexity_score(rtl_result.get("code", ""))
+            try:
+                results = await graph.run()
+            except StageError as e:
+                if isinstance(e.error, StageRetry) and attempts < max_attempts:
+                    internal_notes.append(f"⚠️ {e.error}, retrying...")
+                    continue
+                raise
+            
+            parsed_spec = results["spec"]
+            internal_notes.append(f"✓ Parsed: {parsed_spec.get('component')}")
+            architecture = results["architecture"]
+            rtl_result = results["rtl"]
+            sim_result = results["simulation"]
+            response_text = results["response_text"]
+            visualization = results["visualization"]
+            block_diagram = results["block_diagram"]
+            interactive_waveform = results["interactive_waveform"]
+            highlighted_code = results["highlighted_code"]
+            complexity = results["complexity"]
+            internal_notes.append("✅ Design complete, visualizations generated")
             
             # 7. Create download links
             download_links = {
@@ -4,11 +4,19 @@ Multi-agent hardware design system with memory and self-correction
 Supports: RTL design, PCB design, optimization, visualization
 """
 import asyncio
+import copy
+import json
+import os
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
-from fastapi import FastAPI, HTTPException
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Boot time is measured from here (the breakdown is logged once startup completes)
+_boot_started = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import uvicorn
@@ -26,7 +34,23 @@ from utils.formatting import format_response, create_visualization
 from utils.block_diagram import BlockDiagramGenerator
 from utils.interactive_waveform import InteractiveWaveformGenerator
 from utils.code_highlighter import CodeHighlighter
-from api.downloads import save_session_design
+from utils.request_analysis import analyze_request, load_classifier, normalize_text
+from utils.response_cache import ResponseCache, relink, response_key
+from utils.single_flight import SingleFlight
+from utils.admission import AdmissionController, AdmissionRejected, TaskPriority, resolve_priority
+from utils.circuit_breaker import breakers
+from utils.http_clients import http_clients
+from utils.stage_graph import StageCheckpoint, StageError, StageGraph
+from utils.render_pool import render_pool
+from utils.persistence import PersistenceQueue
+from utils.tracing import tracer
+from utils.artifact_store import artifact_store, etag_matches
+from utils.shared_state import shared_state
+from utils.startup import StartupProfile, env_modules, preload_in_background
+from api.downloads import save_session_design, session_designs
+
+startup_profile = StartupProfile(_boot_started)
+startup_profile.mark("imports")
 
 app = FastAPI(title="SPARTA Chat Backend", version="2.0.0")
 
@@ -45,20 +69,51 @@ app.add_middleware(
 # Initialize managers
 memory_manager = MemoryManager()
 db_manager = DatabaseManager()
+# Chat history and design library writes go through here, batched off the request path
+persistence = PersistenceQueue(db_manager, memory_manager)
 
-# Initialize agents
+# Initialize agents (service clients come from the shared pooled registry)
 planning_agent = PlanningAgent()
-nlp_agent = NLPAgent()
-synthesis_agent = SynthesisAgent()
-rtl_agent = RTLAgent()
-emulation_agent = EmulationAgent()
+nlp_agent = NLPAgent(http=http_clients)
+synthesis_agent = SynthesisAgent(http=http_clients)
+rtl_agent = RTLAgent(http=http_clients)
+emulation_agent = EmulationAgent(http=http_clients)
 pcb_agent = PCBAgent()
-image_agent = ImageAgent()
+image_agent = ImageAgent(http=http_clients)
+
+# Identical requests are answered from here without rerunning the pipeline
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("CHAT_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("CHAT_CACHE_TTL", "3600"))
+)
+
+# Concurrent identical requests share one pipeline run
+in_flight = SingleFlight()
+
+# Bounded number of pipelines at once; the rest queue by priority or get 429/503
+admission = AdmissionController()
 
 # Initialize utilities
 block_diagram_gen = BlockDiagramGenerator()
 waveform_gen = InteractiveWaveformGenerator()
 code_highlighter = CodeHighlighter()
+startup_profile.mark("init")
+
+
+# Stage event sink: emit(event_type, payload)
+Emit = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Per-stage timeouts (seconds) for the design graph
+STAGE_TIMEOUTS = {
+    "spec": 45.0,
+    "architecture": 45.0,
+    "rtl": 45.0,
+    "simulation": 45.0,
+    "image": 60.0,
+    "render": 30.0,
+}
 
 
 class ChatMessage(BaseModel):
@@ -66,6 +121,8 @@ class ChatMessage(BaseModel):
     session_id: str
     message: str
     context: Optional[Dict[str, Any]] = None
+    bypass_cache: bool = False
+    priority: TaskPriority = TaskPriority.MEDIUM
 
 
 class ChatResponse(BaseModel):
@@ -84,15 +141,36 @@ class ChatResponse(BaseModel):
 @app.on_event("startup")
 async def startup():
     """Initialize database and memory on startup"""
-    await db_manager.initialize()
-    await memory_manager.initialize()
+    with startup_profile.phase("database"):
+        await db_manager.initialize()
+    with startup_profile.phase("memory"):
+        await memory_manager.initialize()
+        persistence.start()
+    with startup_profile.phase("classifier"):
+        if load_classifier(os.getenv("INTENT_MODEL_PATH", "backend/db/intent_model.npz")):
+            print("✅ Intent classifier loaded")
+    with startup_profile.phase("services"):
+        http_clients.start()
+        render_pool.start()
+        breakers.start()
+        # Network probes and optional warm-up run after we are ready, not before
+        image_agent.start()
+        preload_in_background(env_modules("WARM_IMPORTS"))
     print("✅ SPARTA Chat Backend initialized")
+    print(startup_profile.ready())
 
 
 @app.on_event("shutdown")
 async def shutdown():
     """Cleanup on shutdown"""
+    await breakers.stop()
+    await http_clients.aclose()
+    render_pool.shutdown()
+    await persistence.stop()
     await db_manager.close()
+    synthesis_agent.cache.close()
+    shared_state.close()
+    tracer.close()
     print("👋 SPARTA Chat Backend shutdown")
 
 
@@ -102,17 +180,82 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "SPARTA Chat Backend",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "services": breakers.snapshot(),
+        "admission": admission.snapshot(),
+        "persistence": persistence.snapshot(),
+        "startup": startup_profile.snapshot()
     }
 
 
-@app.get("/search")
-async def search_designs(query: str, limit: int = 5):
+@app.get("/cache/stats")
+async def cache_stats():
     """
-    Search previous designs in memory
+    Hit/miss counters for backend caches
     """
-    results = memory_manager.search(query, limit=limit)
-    return {"query": query, "results": results}
+    return {
+        "synthesis": synthesis_agent.cache.stats(),
+        "responses": response_cache.stats(),
+        "coalescing": in_flight.snapshot()
+    }
+
+
+def _metric_samples():
+    """Gauges for /metrics beyond the span histograms"""
+    samples = []
+    for name, stats in (("responses", response_cache.stats()), ("synthesis", synthesis_agent.cache.stats())):
+        samples.append(("sparta_cache_hit_ratio", "Cache hit ratio", {"cache": name}, stats["hit_ratio"]))
+        samples.append(("sparta_cache_entries", "Cache entries", {"cache": name}, stats["entries"]))
+    load = admission.snapshot()
+    samples.append(("sparta_pipelines_running", "Chat pipelines running", {}, load["running"]))
+    samples.append(("sparta_admission_queue_depth", "Chat requests waiting for a slot", {}, load["queue_depth"]))
+    samples.append(("sparta_coalesced_waiters", "Callers waiting on in-flight identical requests", {}, sum(in_flight.waiters().values())))
+    samples.append(("sparta_persistence_pending", "Writes queued for persistence", {}, persistence.snapshot()["pending"]))
+    for name, state in breakers.states().items():
+        samples.append(("sparta_service_up", "1 when the service circuit is closed", {"service": name}, 1 if state == "closed" else 0))
+    return samples
+
+
+tracer.register_collector(_metric_samples)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: span latency histograms, in-flight counts, cache and queue gauges"""
+    return PlainTextResponse(tracer.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/traces")
+async def traces(limit: int = 200, trace_id: Optional[str] = None):
+    """Most recent finished spans, optionally one request's tree (trace_id from chat metadata)"""
+    return {"spans": tracer.ring.recent(limit, trace_id)}
+
+
+@app.get("/artifacts/{name}")
+async def get_artifact(name: str, request: Request):
+    """
+    Rendered diagrams by content hash: immutable, so cached for a year and
+    revalidated by ETag (304 when the client already has it)
+    """
+    path = artifact_store.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    headers = {
+        "ETag": artifact_store.etag(name),
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/png" if name.endswith(".png") else "image/svg+xml", headers=headers)
+
+
+async def inline_artifacts(response: Optional[ChatResponse]) -> Optional[ChatResponse]:
+    """Swap artifact URLs for data URIs, for clients that can't fetch them"""
+    if response is None:
+        return None
+    response.visualization = await asyncio.to_thread(artifact_store.inline, response.visualization)
+    response.block_diagram = await asyncio.to_thread(artifact_store.inline, response.block_diagram)
+    return response
 
 
 @app.post("/generate_image")
@@ -136,8 +279,8 @@ async def generate_image_endpoint(request: dict):
 async def handle_pcb_design_quick(session_id: str, user_message: str, internal_notes: list):
     """Quick PCB design handler for better performance"""
     try:
-        # Use PCB agent
-        pcb_design = await pcb_agent.design_pcb({"purpose": user_message})
+        # Use PCB agent; layout and Gerbers are built on first download
+        pcb_design = await pcb_agent.design_pcb({"purpose": user_message}, manufacturing=False)
         
         # Format response
         response = f"""💬 **PCB Design Complete!**
@@ -163,20 +306,20 @@ async def handle_pcb_design_quick(session_id: str, user_message: str, internal_n
 """
         
         # Save to DB
-        await db_manager.save_message(session_id, "assistant", response, {
+        await persistence.save_message(session_id, "assistant", response, {
             "type": "pcb",
             "component_count": len(pcb_design['bom']),
             "board_size": pcb_design['board_size']
         })
         
         # Save to memory
-        await memory_manager.save_design(session_id, {
+        await persistence.save_design(session_id, {
             "query": user_message,
             "pcb_design": pcb_design
         })
         
         # Save for downloads
-        save_session_design(session_id, {"pcb_design": pcb_design})
+        await asyncio.to_thread(save_session_design, session_id, {"pcb_design": pcb_design})
         
         return ChatResponse(
             session_id=session_id,
@@ -203,17 +346,95 @@ async def handle_pcb_design_quick(session_id: str, user_message: str, internal_n
         raise
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage):
+class StageRetry(Exception):
+    """Stage produced an error result; the whole attempt is retried"""
+
+
+def build_design_graph(
+    user_message: str,
+    plan: Dict[str, Any],
+    analysis,
+    session_id: str,
+    internal_notes: list
+) -> StageGraph:
+    """RTL design flow as a stage DAG (spec -> architecture -> rtl -> simulation, renders alongside)"""
+    
+    async def spec():
+        return await nlp_agent.parse(user_message, plan, analysis)
+    
+    async def architecture(spec):
+        result = await synthesis_agent.synthesize(spec)
+        if result.get("error"):
+            raise StageRetry("Error")
+        return result
+    
+    async def rtl(architecture):
+        result = await rtl_agent.generate(architecture)
+        if result.get("error"):
+            raise StageRetry("RTL error")
+        return result
+    
+    async def simulation(rtl):
+        result = await emulation_agent.simulate(rtl)
+        if result.get("error"):
+            raise StageRetry("Sim error")
+        return result
+    
+    async def image(spec, architecture):
+        # Generate diagram for EVERY design
+        internal_notes.append(f"🖼️ Generating diagram...")
+        try:
+            result = await image_agent.generate_image(
+                f"Technical diagram showing {spec.get('component', 'hardware design')}: {user_message}",
+                {"plan": plan, "architecture": architecture, "spec": spec},
+                analysis
+            )
+        except Exception as e:
+            internal_notes.append(f"⚠️ Image generation failed: {e}")
+            return None
+        return result if result["status"] in ["success", "fallback"] else None
+    
+    async def block_diagram(architecture, spec):
+        return await block_diagram_gen.generate_diagram(architecture, spec)
+    
+    async def visualization(simulation):
+        return await create_visualization(simulation.get("waveform_data", ""), session_id)
+    
+    async def response_text(spec, architecture, rtl, simulation):
+        return format_response(
+            parsed_spec=spec,
+            architecture=architecture,
+            rtl_code=rtl.get("code"),
+            simulation=simulation
+        )
+    
+    graph = StageGraph()
+    graph.add("spec", spec, resource="network", timeout=STAGE_TIMEOUTS["spec"])
+    graph.add("architecture", architecture, ("spec",), "network", STAGE_TIMEOUTS["architecture"])
+    graph.add("rtl", rtl, ("architecture",), "network", STAGE_TIMEOUTS["rtl"])
+    graph.add("simulation", simulation, ("rtl",), "network", STAGE_TIMEOUTS["simulation"])
+    graph.add("image", image, ("spec", "architecture"), "cpu", STAGE_TIMEOUTS["image"], optional=True)
+    graph.add("block_diagram", block_diagram, ("architecture", "spec"), "cpu", STAGE_TIMEOUTS["render"], optional=True)
+    graph.add("visualization", visualization, ("simulation",), "cpu", STAGE_TIMEOUTS["render"], optional=True)
+    graph.add("response_text", response_text, ("spec", "architecture", "rtl", "simulation"), "cpu")
+    return graph
+
+
+async def _no_emit(event: str, data: Dict[str, Any]):
+    """Default event sink for the non-streaming endpoint"""
+
+
+async def run_chat_pipeline(message: ChatMessage, emit: Emit = _no_emit) -> ChatResponse:
     """
-    Main chat endpoint - orchestrates multi-agent workflow with self-correction
-    Optimized with parallel visualization generation
+    Orchestrates multi-agent workflow with self-correction
+    Optimized with parallel visualization generation; emit() receives each
+    stage result as soon as it is available
     """
     session_id = message.session_id
     user_message = message.message
     
     # Store user message in DB
-    await db_manager.save_message(session_id, "user", user_message)
+    await persistence.save_message(session_id, "user", user_message)
     
     # Load recent context from memory
     recent_context = await memory_manager.load_recent_messages(session_id, n=5)
@@ -223,79 +444,74 @@ async def chat(message: ChatMessage):
     max_attempts = 2  # Reduced from 3 to speed up
     success = False
     
+    # Analyze the message once per turn; every agent and retry reuses it
+    analysis = analyze_request(user_message)
+    plan = None
+    # Stage results survive a failed attempt, so a retry resumes at the failed stage
+    checkpoint = StageCheckpoint()
+    
     while not success and attempts < max_attempts:
         attempts += 1
         internal_notes.append(f"🔄 Attempt {attempts}/{max_attempts}")
+        if checkpoint.failed:
+            reused = ", ".join(checkpoint.results) or "nothing"
+            internal_notes.append(f"♻️ Resuming at {checkpoint.failed} (reusing {reused})")
         
         try:
             # Step 1: Planning agent breaks down the task
-            plan = await planning_agent.create_plan(user_message, recent_context)
-            internal_notes.append(f"✓ Plan: {len(plan.get('steps', []))} steps")
+            if plan is None:
+                with tracer.span("agent.plan"):
+                    plan = await planning_agent.create_plan(user_message, recent_context, analysis)
+                internal_notes.append(f"✓ Plan: {len(plan.get('steps', []))} steps")
+                await emit("plan", plan)
             
             # Detect PCB design first
-            intent = plan.get("intent", "")
-            if "pcb" in intent.lower() or any(kw in user_message.lower() for kw in ["pcb", "board", "circuit board"]):
+            if analysis.is_pcb:
                 # Quick PCB design response
-                return await handle_pcb_design_quick(session_id, user_message, internal_notes)
+                with tracer.span("agent.pcb"):
+                    return await handle_pcb_design_quick(session_id, user_message, internal_notes)
             
-            # Step 2: NLP agent parses hardware requirements
-            parsed_spec = await nlp_agent.parse(user_message, plan)
-            internal_notes.append(f"✓ Parsed: {parsed_spec.get('component')}")
+            # Steps 2-5 and the renders run as a stage DAG: the diagram and block
+            # diagram start once the architecture exists, the waveform once the
+            # simulation does; only spec -> architecture -> RTL -> simulation is serial
+            graph = build_design_graph(user_message, plan, analysis, session_id, internal_notes)
             
-            # Step 3: Synthesis agent creates architecture
-            architecture = await synthesis_agent.synthesize(parsed_spec)
+            async def on_stage(name: str, result: Any):
+                if name == "spec":
+                    internal_notes.append(f"✓ Parsed: {result.get('component')}")
+                    await emit("spec", result)
+                elif name in ("architecture", "rtl", "simulation"):
+                    await emit(name, result)
+                elif name == "image":
+                    internal_notes.append(f"✓ Diagram: {result['model_used']}")
+                    await emit("image", {
+                        "image_path": result["image_path"],
+                        "model_used": result.get("model_used"),
+                        "status": result.get("status")
+                    })
+                elif name in ("visualization", "block_diagram"):
+                    await emit(name, {name: result})
             
-            if architecture.get("error"):
-                internal_notes.append(f"⚠️ Error, retrying...")
-                continue
-            
-            # Generate diagram for EVERY design (always, in parallel with other work)
-            internal_notes.append(f"🖼️ Generating diagram...")
-            image_task = asyncio.create_task(
-                image_agent.generate_image(
-                    f"Technical diagram showing {parsed_spec.get('component', 'hardware design')}: {user_message}", 
-                    {"plan": plan, "architecture": architecture, "spec": parsed_spec}
-                )
-            )
-            
-            # Step 4: RTL generation
-            rtl_result = await rtl_agent.generate(architecture)
-            
-            if rtl_result.get("error"):
-                internal_notes.append(f"⚠️ RTL error, retrying...")
-                continue
-            
-            # Step 5: Simulation (lightweight)
-            sim_result = await emulation_agent.simulate(rtl_result)
-            
-            if sim_result.get("error"):
-                internal_notes.append(f"⚠️ Sim error, retrying...")
-                continue
+            try:
+                results = await graph.run(on_complete=on_stage, checkpoint=checkpoint)
+            except StageError as e:
+                if isinstance(e.error, StageRetry) and attempts < max_attempts:
+                    internal_notes.append(f"⚠️ {e.error}, retrying...")
+                    continue
+                raise
             
             internal_notes.append(f"✓ All stages completed!")
             success = True
             
-            # Wait for image generation to complete
-            try:
-                image_result = await image_task
-                if image_result["status"] in ["success", "fallback"]:
-                    generated_image = image_result["image_path"]
-                    internal_notes.append(f"✓ Diagram: {image_result['model_used']}")
-                else:
-                    generated_image = None
-                    image_result = None
-            except Exception as e:
-                internal_notes.append(f"⚠️ Image generation failed: {e}")
-                generated_image = None
-                image_result = None
-            
-            # Format response
-            response_text = format_response(
-                parsed_spec=parsed_spec,
-                architecture=architecture,
-                rtl_code=rtl_result.get("code"),
-                simulation=sim_result
-            )
+            parsed_spec = results["spec"]
+            architecture = results["architecture"]
+            rtl_result = results["rtl"]
+            sim_result = results["simulation"]
+            image_result = results["image"]
+            generated_image = image_result["image_path"] if image_result else None
+            visualization = results["visualization"]
+            block_diagram = results["block_diagram"]
+            response_text = results["response_text"]
             
             # Add image to response (ALWAYS shown if generated)
             if generated_image and image_result:
@@ -312,21 +528,8 @@ async def chat(message: ChatMessage):
 {response_text}
 """
             
-            # Generate visualizations in parallel (faster!)
-            visualization, block_diagram = await asyncio.gather(
-                create_visualization(sim_result.get("waveform_data", ""), session_id),
-                block_diagram_gen.generate_diagram(architecture, parsed_spec),
-                return_exceptions=True
-            )
-            
-            # Handle exceptions from parallel tasks
-            if isinstance(visualization, Exception):
-                visualization = None
-            if isinstance(block_diagram, Exception):
-                block_diagram = None
-            
             # Save design data for downloads
-            save_session_design(session_id, {
+            await asyncio.to_thread(save_session_design, session_id, {
                 "rtl_code": rtl_result.get("code"),
                 "testbench": rtl_result.get("testbench", ""),
                 "parsed_spec": parsed_spec,
@@ -334,21 +537,21 @@ async def chat(message: ChatMessage):
                 "simulation": sim_result
             })
             
-            # Save to memory (async, don't wait)
-            asyncio.create_task(memory_manager.save_design(session_id, {
+            # Save to memory (write-behind)
+            await persistence.save_design(session_id, {
                 "query": user_message,
                 "spec": parsed_spec,
                 "architecture": architecture,
                 "rtl": rtl_result.get("code"),
                 "simulation": sim_result
-            }))
+            })
             
-            # Save to DB (async, don't wait)
-            asyncio.create_task(db_manager.save_message(session_id, "assistant", response_text, {
+            # Save to DB (write-behind)
+            await persistence.save_message(session_id, "assistant", response_text, {
                 "plan": plan,
                 "spec": parsed_spec,
                 "metrics": architecture.get("estimated_metrics")
-            }))
+            })
             
             return ChatResponse(
                 session_id=session_id,
@@ -366,7 +569,9 @@ async def chat(message: ChatMessage):
                     "component": parsed_spec.get("component"),
                     "metrics": architecture.get("estimated_metrics"),
                     "simulation_status": sim_result.get("status"),
-                    "attempts": attempts
+                    "attempts": attempts,
+                    "classification": analysis.to_dict()["classification"],
+                    "services": breakers.states()
                 },
                 internal_notes="\n".join(internal_notes)
             )
@@ -376,20 +581,176 @@ async def chat(message: ChatMessage):
             if attempts >= max_attempts:
                 # Final failure
                 error_response = f"⚠️ Unable to complete design after {max_attempts} attempts.\n\nLast error: {str(e)}\n\nPlease try rephrasing your request or breaking it into smaller steps."
-                await db_manager.save_message(session_id, "assistant", error_response, {"error": str(e)})
+                await persistence.save_message(session_id, "assistant", error_response, {"error": str(e)})
                 
                 return ChatResponse(
                     session_id=session_id,
                     response=error_response,
                     visualization=None,
-                    metadata={"error": str(e), "attempts": attempts},
+                    metadata={"error": str(e), "attempts": attempts, "services": breakers.states()},
                     internal_notes="\n".join(internal_notes)
                 )
+        
+        finally:
+            if success or attempts >= max_attempts:
+                # Nothing will resume this turn: drop any work still held for a retry
+                checkpoint.discard()
+
+
+async def answer_chat(message: ChatMessage, emit: Emit = _no_emit) -> Optional[ChatResponse]:
+    """
+    Serve from the response cache when possible. Otherwise run the pipeline,
+    or join an identical one already running, and cache its answer
+    """
+    with tracer.span("chat", session_id=message.session_id, priority=message.priority.value) as span:
+        response = await _answer_chat(message, emit)
+        if response is not None:
+            span.set(source=next((k for k in ("cached", "coalesced") if response.metadata.get(k)), "pipeline"))
+            response.metadata["trace_id"] = span.trace_id
+        return response
+
+
+async def _answer_chat(message: ChatMessage, emit: Emit) -> Optional[ChatResponse]:
+    key = response_key(normalize_text(message.message), message.context)
+    
+    if not message.bypass_cache:
+        entry = response_cache.get(key)
+        if entry is not None:
+            return await replay_cached_response(message, entry, emit)
+    
+    async def execute(broadcast: Emit):
+        async with admission.slot(message.priority):
+            with tracer.span("pipeline"):
+                response = await run_chat_pipeline(message, broadcast)
+        design = await asyncio.to_thread(session_designs.get, message.session_id)
+        if response is not None and "error" not in response.metadata and design is not None:
+            response_cache.put(key, message.session_id, response.model_dump(), design)
+        return response, design
+    
+    (response, design), shared = await in_flight.do(key, execute, emit)
+    if not shared or response is None:
+        return response
+    # Joined an identical request already running: rebind its answer to this session
+    entry = {"session_id": response.session_id, "response": response.model_dump(), "design": design}
+    return await replay_cached_response(message, entry, emit, source="coalesced")
+
+
+async def replay_cached_response(
+    message: ChatMessage,
+    entry: Dict[str, Any],
+    emit: Emit,
+    source: str = "cached"
+) -> ChatResponse:
+    """Relink a cached or coalesced answer (downloads, session id) to the requesting session"""
+    session_id = message.session_id
+    response = relink(entry["response"], entry["session_id"], session_id)
+    response["metadata"] = {**response.get("metadata", {}), source: True, f"{source}_from": entry["session_id"]}
+    if source == "cached":
+        response["internal_notes"] = "⚡ Served from response cache"
+    else:
+        response["internal_notes"] = f"⚡ Shared an identical in-flight request\n{response.get('internal_notes', '')}"
+    
+    if entry["design"] is not None:
+        await asyncio.to_thread(save_session_design, session_id, copy.deepcopy(entry["design"]))
+    await persistence.save_message(session_id, "user", message.message)
+    await persistence.save_message(session_id, "assistant", response["response"], {f"{source}_from": entry["session_id"]})
+    
+    result = ChatResponse(**response)
+    await emit(source, {f"{source}_from": entry["session_id"]})
+    return result
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(
+    message: ChatMessage,
+    inline_images: bool = False,
+    x_priority_key: Optional[str] = Header(default=None)
+):
+    """
+    Main chat endpoint - orchestrates multi-agent workflow with self-correction
+    Set bypass_cache to force a fresh run; priority orders the wait queue under
+    load and is honoured only with a valid X-Priority-Key.
+    Diagrams come back as /artifacts URLs unless ?inline_images=true
+    """
+    message.priority = resolve_priority(message.priority, x_priority_key)
+    try:
+        response = await answer_chat(message)
+        return await inline_artifacts(response) if inline_images else response
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(
+    message: ChatMessage,
+    inline_images: bool = False,
+    x_priority_key: Optional[str] = Header(default=None)
+):
+    """
+    Same pipeline as /chat, streamed as server-sent events: plan, spec,
+    architecture, rtl, simulation, image, visualization and block_diagram as
+    each stage finishes, then a final "response" event with the full ChatResponse
+    """
+    message.priority = resolve_priority(message.priority, x_priority_key)
+    # Turn away up front while the HTTP status can still say so
+    try:
+        admission.check(message.priority)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def emit(event: str, data: Dict[str, Any]):
+        await queue.put((event, data))
+    
+    async def run():
+        try:
+            result = await answer_chat(message, emit)
+            if result is None:
+                await queue.put(("error", {"error": "Pipeline finished without a response"}))
+            else:
+                if inline_images:
+                    result = await inline_artifacts(result)
+                await queue.put(("response", result.model_dump()))
+        except AdmissionRejected as e:
+            await queue.put(("error", {"error": str(e), "status": e.status_code, "retry_after": e.retry_after}))
+        except Exception as e:
+            await queue.put(("error", {"error": str(e)}))
+        await queue.put(None)
+    
+    # The turn runs to completion (and is saved) even if the client disconnects
+    task = asyncio.create_task(run())
+    
+    async def events():
+        yield _sse("start", {"session_id": message.session_id})
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+        await task
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/history/{session_id}")
 async def get_history(session_id: str, limit: int = 50):
     """Retrieve chat history for a session"""
+    # Read-your-writes: let queued messages land first
+    await persistence.flush()
     messages = await db_manager.get_messages(session_id, limit)
     return {"session_id": session_id, "messages": messages}
 
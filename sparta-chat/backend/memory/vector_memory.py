@@ -1,71 +1,394 @@
 """Memory Manager - Vector memory and design storage"""
+import asyncio
 import json
+import math
 import os
-from typing import Dict, Any, List
+import threading
+import zlib
+from array import array
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
+from utils.intent_classifier import ngrams
+from utils.shared_state import SharedState, shared_state
+
+
+# Spelled-out names for spec component ids, so "state machine" finds an "fsm"
+COMPONENT_TERMS = {
+    "adder": "adder arithmetic",
+    "alu": "alu arithmetic logic unit",
+    "multiplier": "multiplier arithmetic",
+    "fsm": "fsm finite state machine controller",
+    "uart_tx": "uart serial transmitter",
+    "shift_register": "shift register",
+    "counter": "counter",
+    "fifo": "fifo first-in first-out queue buffer",
+}
+
+
+def design_text(design: Dict[str, Any]) -> str:
+    """The searchable text of a library entry: request, spec and module name"""
+    spec = design.get("spec") if isinstance(design.get("spec"), dict) else {}
+    architecture = design.get("architecture") if isinstance(design.get("architecture"), dict) else {}
+    parts = [
+        design.get("query"),
+        COMPONENT_TERMS.get(spec.get("component"), spec.get("component")),
+        spec.get("description"),
+        " ".join(str(op) for op in spec.get("operations") or []),
+        f"{spec['bit_width']}-bit" if spec.get("bit_width") else None,
+        architecture.get("module_name"),
+    ]
+    return " ".join(str(part) for part in parts if part)
+
+
+class DesignIndex:
+    """
+    Sparse hashed n-gram TF-IDF index over the design library. Rows are the
+    designs' library positions; the index keeps no payloads, only:
+    - a forward index: each row's (bucket, weight) entries, with weights the
+      L2-normalized sublinear term frequencies stored as float16
+    - an inverted index: the rows containing each bucket, plus its document
+      frequency. Each posting keeps its `budget` highest-weight rows with their
+      weights, in a packed sorted array; rows added since the last compaction
+      sit in a small per-bucket tail that is merged in once it grows past 1/8
+      of the index.
+
+    A search takes the query's rarest n-grams (by document frequency) until
+    `budget` posting rows are read, keeps the `candidates` rows with the
+    largest partial dot product over those n-grams, and scores them exactly by
+    cosine similarity against the forward index. Candidate selection is
+    approximate: a row that only matches through common n-grams, or that fell
+    outside a truncated posting, is not scored. Common n-grams still count in
+    the final score. IDF is applied to the query, which is what lets designs be
+    added one at a time without re-weighting the rows already stored.
+    """
+    
+    TAIL_MIN = 1024
+    
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        min_score: Optional[float] = None,
+        budget: Optional[int] = None,
+        candidates: Optional[int] = None,
+    ):
+        self.dim = dim or int(os.getenv("MEMORY_INDEX_DIM", str(1 << 20)))
+        self.min_score = min_score if min_score is not None else float(os.getenv("MEMORY_MIN_SCORE", "0.1"))
+        self.budget = budget or int(os.getenv("MEMORY_SEARCH_BUDGET", "10000"))
+        self.candidates = candidates or int(os.getenv("MEMORY_SEARCH_CANDIDATES", "200"))
+        # Forward index: row i's entries are offsets[i]:offsets[i + 1]
+        self._buckets = array("i")
+        self._weights = array("H")  # float16 bit patterns
+        self._offsets = array("q", [0])
+        # Inverted index over rows [0, _packed_rows): bucket keys (sorted),
+        # posting slices into _rows/_row_weights, and the full document frequency
+        self._packed_rows = 0
+        self._keys = np.zeros(0, dtype=np.int32)
+        self._ptr = np.zeros(1, dtype=np.int64)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._row_weights = np.zeros(0, dtype=np.float16)
+        self._df = np.zeros(0, dtype=np.int32)
+        # Postings of rows added since then: bucket -> (rows, weights)
+        self._tail: Dict[int, Tuple[array, array]] = {}
+        self._local = threading.local()
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index"""
+        packed = sum(a.nbytes for a in (self._keys, self._ptr, self._rows, self._row_weights, self._df))
+        forward = len(self._buckets) * 4 + len(self._weights) * 2 + len(self._offsets) * 8
+        return packed + forward + sum(len(rows) * 8 for rows, _ in self._tail.values())
+    
+    def embed(self, text: str) -> Dict[int, float]:
+        """Hashed word/bigram/char-trigram counts, log-scaled: {bucket: weight}"""
+        counts: Dict[int, int] = {}
+        for gram in ngrams(text):
+            # crc32 is stable across processes, so every worker builds the same buckets
+            bucket = zlib.crc32(gram.encode()) % self.dim
+            counts[bucket] = counts.get(bucket, 0) + 1
+        return {bucket: math.log1p(count) for bucket, count in counts.items()}
+    
+    def add(self, design: Dict[str, Any]) -> int:
+        """Index a design; returns its row (the next library position)"""
+        row = len(self)
+        vec = self.embed(design_text(design))
+        buckets = sorted(vec)
+        weights = np.array([vec[b] for b in buckets], dtype=np.float32)
+        norm = float(np.linalg.norm(weights))
+        if norm:
+            weights /= norm
+        self._buckets.extend(buckets)
+        self._weights.frombytes(weights.astype(np.float16).tobytes())
+        self._offsets.append(len(self._buckets))
+        for bucket, weight in zip(buckets, weights.tolist()):
+            posting = self._tail.get(bucket)
+            if posting is None:
+                posting = self._tail[bucket] = (array("i"), array("f"))
+            posting[0].append(row)
+            posting[1].append(weight)
+        if len(self) - self._packed_rows > max(self.TAIL_MIN, self._packed_rows // 8):
+            self._compact()
+        return row
+    
+    def _compact(self):
+        """
+        Merge the tail into the packed postings. Each posting is ordered by
+        weight, highest first, and keeps its best `budget` rows; the tail's
+        entries are read back from the forward index
+        """
+        if not self._tail:
+            return
+        offsets = np.frombuffer(self._offsets, dtype=np.int64)
+        start = int(offsets[self._packed_rows])
+        tail_keys = np.frombuffer(self._buckets, dtype=np.int32)[start:]
+        tail_weights = np.frombuffer(self._weights, dtype=np.float16)[start:]
+        tail_rows = np.repeat(np.arange(self._packed_rows, len(self), dtype=np.int32), np.diff(offsets[self._packed_rows:]))
+        keys = np.concatenate((np.repeat(self._keys, np.diff(self._ptr)), tail_keys))
+        rows = np.concatenate((self._rows, tail_rows))
+        weights = np.concatenate((self._row_weights, tail_weights))
+        order = np.lexsort((rows, -weights, keys))
+        keys, rows, weights = keys[order], rows[order], weights[order]
+        
+        new_keys, starts, lengths = np.unique(keys, return_index=True, return_counts=True)
+        kept = np.minimum(lengths, self.budget)
+        keep = np.arange(keys.size) - np.repeat(starts, lengths) < self.budget
+        df = lengths.astype(np.int32)
+        # Rows already truncated away still count towards the frequency
+        df[np.searchsorted(new_keys, self._keys)] += self._df - np.diff(self._ptr).astype(np.int32)
+        
+        self._keys = new_keys.astype(np.int32)
+        self._rows = rows[keep]
+        self._row_weights = weights[keep]
+        self._ptr = np.concatenate(([0], np.cumsum(kept)))
+        self._df = df
+        self._tail = {}
+        self._packed_rows = len(self)
+    
+    def _postings(self, buckets: List[int]) -> List[Tuple[int, List[Tuple[np.ndarray, np.ndarray]]]]:
+        """(document frequency, posting parts) per bucket; parts are (rows, weights) views, not copies"""
+        keys = np.array(buckets, dtype=np.int32)
+        # One vectorized lookup: a scalar searchsorted would cast the whole key array
+        at = np.searchsorted(self._keys, keys)
+        found = np.zeros(len(buckets), dtype=bool)
+        inside = at < self._keys.size
+        found[inside] = self._keys[at[inside]] == keys[inside]
+        result = []
+        for bucket, i, packed in zip(buckets, at.tolist(), found.tolist()):
+            parts, df = [], 0
+            if packed:
+                lo, hi = self._ptr[i], self._ptr[i + 1]
+                parts.append((self._rows[lo:hi], self._row_weights[lo:hi]))
+                df = int(self._df[i])
+            tail = self._tail.get(bucket)
+            if tail is not None:
+                parts.append((np.frombuffer(tail[0], dtype=np.int32), np.frombuffer(tail[1], dtype=np.float32)))
+                df += len(tail[0])
+            result.append((df, parts))
+        return result
+    
+    def _candidates(self, terms: List[Tuple[int, int, list]], weights: Dict[int, float]) -> np.ndarray:
+        """
+        Rows with the largest dot product with the query over its rarest
+        n-grams, read rarest first until the posting budget is spent (the first
+        n-gram always, down to its best rows)
+        """
+        rows, products, read = [], [], 0
+        for df, bucket, parts in sorted(terms, key=lambda term: term[0]):
+            if read and read + min(df, self.budget) > self.budget:
+                break
+            for part_rows, part_weights in parts:
+                part_rows = part_rows[:self.budget - read]
+                rows.append(part_rows)
+                products.append(part_weights[:part_rows.size].astype(np.float32) * weights[bucket])
+                read += part_rows.size
+        candidates, inverse = np.unique(np.concatenate(rows), return_inverse=True)
+        if candidates.size > self.candidates:
+            partial = np.bincount(inverse, np.concatenate(products))
+            candidates = candidates[np.argpartition(-partial, self.candidates)[:self.candidates]]
+        return candidates
+    
+    def _scratch(self) -> np.ndarray:
+        """A zeroed dim-sized vector per thread, reused across searches"""
+        dense = getattr(self._local, "dense", None)
+        if dense is None:
+            dense = self._local.dense = np.zeros(self.dim, dtype=np.float32)
+        return dense
+    
+    def search(self, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """Top-k (row, score) by cosine similarity, best first, above min_score"""
+        n = len(self)
+        if n == 0 or limit <= 0:
+            return []
+        vec = self.embed(query)
+        terms = []
+        weights: Dict[int, float] = {}
+        for (bucket, weight), (df, parts) in zip(vec.items(), self._postings(list(vec))):
+            weights[bucket] = weight * (math.log((1.0 + n) / (1.0 + df)) + 1.0)
+            if df:
+                terms.append((df, bucket, parts))
+        if not terms:
+            return []
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        
+        if n <= self.candidates:
+            # Small library: score every row
+            candidates = np.arange(n)
+        else:
+            candidates = self._candidates(terms, weights)
+        
+        # Exact cosine for the candidates from their forward entries
+        offsets = np.frombuffer(self._offsets, dtype=np.int64)
+        candidates = candidates[offsets[candidates + 1] > offsets[candidates]]
+        if candidates.size == 0:
+            return []
+        starts, stops = offsets[candidates], offsets[candidates + 1]
+        ends = np.cumsum(stops - starts)
+        # Entry positions as a running sum: +1 within a row, a jump to the next row's start between rows
+        steps = np.ones(int(ends[-1]), dtype=np.int64)
+        steps[0] = starts[0]
+        steps[ends[:-1]] = starts[1:] - stops[:-1] + 1
+        entries = np.cumsum(steps)
+        query_buckets = np.array([b for _, b, _ in terms], dtype=np.int64)
+        # The query as a dense vector, so each entry's weight is a single gather
+        dense = self._scratch()
+        dense[query_buckets] = [weights[b] / norm for b in query_buckets.tolist()]
+        try:
+            buckets = np.frombuffer(self._buckets, dtype=np.int32)[entries]
+            contributions = np.frombuffer(self._weights, dtype=np.float16)[entries] * dense[buckets]
+        finally:
+            dense[query_buckets] = 0.0
+        scores = np.add.reduceat(contributions, ends - (stops - starts))
+        
+        k = min(limit, candidates.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(candidates[i]), float(scores[i])) for i in top if scores[i] > self.min_score]
+
 
 class MemoryManager:
-    """Manages short-term and long-term memory for design sessions"""
+    """
+    Manages short-term and long-term memory for design sessions. Both live in
+    shared state so every worker reads and appends the same lists; the JSON
+    file is an export of the library (and seeds an empty store). Each worker
+    keeps a DesignIndex over the library, catching up on designs other
+    workers added whenever the shared design counter moves. Shared state
+    calls block, so the async methods run them in a thread; the index lock
+    keeps those threads from updating the index at the same time
+    """
     
-    def __init__(self, memory_file="backend/memory/local_memory.json"):
+    def __init__(self, memory_file="backend/memory/local_memory.json", state: Optional[SharedState] = None):
         self.memory_file = memory_file
-        self.session_memory: Dict[str, List[Dict]] = {}  # Short-term RAM
-        self.design_library: List[Dict] = []  # Long-term storage
+        self.state = state or shared_state
+        self.index = DesignIndex()
+        self._index_version: Optional[int] = None
+        self._index_lock = threading.Lock()
+    
+    @property
+    def design_library(self) -> List[Dict]:
+        """Long-term storage: every recorded design, oldest first"""
+        return self.state.list_range("memory", "design_library")
     
     async def initialize(self):
         """Load existing memory from disk"""
+        await asyncio.to_thread(self._load)
+        print("✅ Memory manager initialized")
+    
+    def _load(self):
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
         
-        if os.path.exists(self.memory_file):
+        # Only the first worker to start imports the file
+        if os.path.exists(self.memory_file) and self.state.add("memory", "library_seeded", True):
             with open(self.memory_file, "r") as f:
                 data = json.load(f)
-                self.design_library = data.get("designs", [])
-        print("✅ Memory manager initialized")
+            if self.state.list_length("memory", "design_library") == 0:
+                for design in data.get("designs", []):
+                    self._append(design)
+        # Libraries written before the counter existed: start it at their length
+        self.state.add("memory", "design_count", self.state.list_length("memory", "design_library"))
+        self._sync_index()
     
     async def load_recent_messages(self, session_id: str, n: int = 5) -> List[Dict]:
         """Load recent messages for context"""
-        return self.session_memory.get(session_id, [])[-n:]
+        return await asyncio.to_thread(self.state.list_range, "session_memory", session_id, -n, -1)
     
     async def save_design(self, session_id: str, design_data: Dict[str, Any]):
         """Save completed design to long-term memory"""
+        await asyncio.to_thread(self.record_design, session_id, design_data)
+        await self.persist()
+    
+    def record_design(self, session_id: str, design_data: Dict[str, Any], timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Add a design to the shared library without writing it to disk yet (blocking)"""
         design_entry = {
             "session_id": session_id,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp or datetime.utcnow().isoformat(),
             **design_data
         }
         
-        self.design_library.append(design_entry)
-        
-        # Persist to disk
-        with open(self.memory_file, "w") as f:
-            json.dump({"designs": self.design_library}, f, indent=2)
+        length, version = self._append(design_entry)
+        with self._index_lock:
+            if length == len(self.index) + 1 and version == length:
+                # Nobody else appended since our last sync: index the entry directly
+                self.index.add(design_entry)
+                self._index_version = version
+                return design_entry
+        self._sync_index()
+        return design_entry
+    
+    def _append(self, design_entry: Dict[str, Any]) -> Tuple[int, int]:
+        length = self.state.append("memory", "design_library", design_entry)
+        return length, self.state.incr("memory", "design_count")
+    
+    def _sync_index(self):
+        """Index designs other workers added since the last sync"""
+        with self._index_lock:
+            version = self.state.get("memory", "design_count")
+            if version is not None and version == self._index_version:
+                return
+            total = self.state.list_length("memory", "design_library")
+            if total > len(self.index):
+                for design in self.state.list_range("memory", "design_library", len(self.index), total - 1):
+                    self.index.add(design)
+            self._index_version = version
+    
+    async def persist(self):
+        """Write the whole library to disk (off the event loop)"""
+        await asyncio.to_thread(lambda: self._write_file({"designs": self.design_library}))
+    
+    def _write_file(self, data: Dict[str, Any]):
+        # Write then rename so a crash mid-write never truncates the library;
+        # per-process temp name because every worker may export at once
+        tmp_path = f"{self.memory_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, self.memory_file)
     
     async def search(self, query: str, limit: int = 5) -> List[Dict]:
         """
         Search design library for similar designs
-        Simple keyword matching - could be upgraded to embeddings
+        Cosine similarity over hashed n-gram TF-IDF vectors, best match first
         """
-        query_lower = query.lower()
-        results = []
-        
-        for design in self.design_library:
-            spec = design.get("spec", {})
-            component = spec.get("component", "")
-            description = spec.get("description", "")
-            
-            if query_lower in component.lower() or query_lower in description.lower():
-                results.append(design)
-        
-        return results[:limit]
+        return await asyncio.to_thread(self._search, query, limit)
+    
+    def _search(self, query: str, limit: int) -> List[Dict]:
+        self._sync_index()
+        with self._index_lock:
+            hits = self.index.search(query, limit)
+        # Index rows are library positions; only the hits are loaded
+        return [
+            design
+            for row, _ in hits
+            for design in self.state.list_range("memory", "design_library", row, row)
+        ]
     
     def add_message_to_session(self, session_id: str, role: str, content: str):
         """Add message to session memory"""
-        if session_id not in self.session_memory:
-            self.session_memory[session_id] = []
-        
-        self.session_memory[session_id].append({
+        self.state.append("session_memory", session_id, {
             "role": role,
             "content": content,
             "timestamp": datetime.utcnow().isoformat()
@@ -0,0 +1,15 @@
+"""Backend test setup: import path and throwaway state"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Module-level singletons read these at import, so set them before any backend import
+_state_dir = tempfile.mkdtemp(prefix="sparta-tests-")
+os.environ.setdefault("SHARED_STATE_URL", f"sqlite:///{os.path.join(_state_dir, 'shared_state.db')}")
+os.environ.setdefault("ARTIFACT_DIR", os.path.join(_state_dir, "artifacts"))
+os.environ.setdefault("RENDER_WORKERS", "0")
+os.environ.setdefault("BREAKER_PROBE_INTERVAL", "0")
@@ -0,0 +1,102 @@
+"""Test admission control."""
+import asyncio
+
+import pytest
+
+from utils.admission import AdmissionController, AdmissionRejected, TaskPriority, resolve_priority
+
+
+def test_waiters_are_admitted_by_priority():
+    """Queued requests get the slot highest priority first, FIFO within a level."""
+    order = []
+
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=8, queue_timeout=5)
+        gate = asyncio.Event()
+
+        async def job(name, priority):
+            async with admission.slot(priority):
+                order.append(name)
+                if name == "first":
+                    await gate.wait()
+
+        first = asyncio.create_task(job("first", TaskPriority.MEDIUM))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(job(name, priority)) for name, priority in [
+                ("low", TaskPriority.LOW),
+                ("high-1", TaskPriority.HIGH),
+                ("urgent", TaskPriority.URGENT),
+                ("high-2", TaskPriority.HIGH),
+            ]
+        ]
+        await asyncio.sleep(0)
+        assert admission.depth == 4
+        gate.set()
+        await asyncio.gather(first, *waiters)
+        assert admission.running == 0
+
+    asyncio.run(scenario())
+    assert order == ["first", "urgent", "high-1", "high-2", "low"]
+
+
+def test_full_queue_rejects_or_bumps():
+    """A full queue turns away equal priority (429) but a higher one bumps the lowest."""
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        gate = asyncio.Event()
+
+        async def job(priority):
+            async with admission.slot(priority):
+                await gate.wait()
+
+        running = asyncio.create_task(job(TaskPriority.MEDIUM))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(job(TaskPriority.LOW))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            admission.check(TaskPriority.LOW)
+        assert exc.value.status_code == 429 and exc.value.retry_after >= 1
+
+        bumper = asyncio.create_task(job(TaskPriority.HIGH))
+        await asyncio.sleep(0)
+        gate.set()
+        with pytest.raises(AdmissionRejected):
+            await queued
+        await asyncio.gather(running, bumper)
+        assert admission.stats["bumped"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_503():
+    """Waiting longer than queue_timeout gives up with a 503."""
+    async def scenario():
+        admission = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+        gate = asyncio.Event()
+
+        async def hold():
+            async with admission.slot():
+                await gate.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            async with admission.slot():
+                pass
+        assert exc.value.status_code == 503
+        gate.set()
+        await holder
+        assert admission.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_client_priority_needs_the_key():
+    """Without the configured key every request runs at MEDIUM."""
+    assert resolve_priority(TaskPriority.URGENT, None, key="") == TaskPriority.MEDIUM
+    assert resolve_priority(TaskPriority.URGENT, "guess", key="") == TaskPriority.MEDIUM
+    assert resolve_priority(TaskPriority.URGENT, "wrong", key="secret") == TaskPriority.MEDIUM
+    assert resolve_priority(TaskPriority.URGENT, "secret", key="secret") == TaskPriority.URGENT
+    assert resolve_priority(TaskPriority.LOW, "secret", key="secret") == TaskPriority.LOW
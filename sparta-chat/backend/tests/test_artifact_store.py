@@ -0,0 +1,63 @@
+"""Test the content-addressed artifact store and its ETag handling."""
+import hashlib
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.artifact_store import ArtifactStore, artifact_store, etag_matches
+
+
+def test_put_is_content_addressed(tmp_path):
+    """Identical bytes map to one URL and one file; different bytes do not."""
+    store = ArtifactStore(str(tmp_path))
+    url = store.put(b"<svg/>", "svg")
+    assert url == f"/artifacts/{hashlib.sha256(b'<svg/>').hexdigest()[:32]}.svg"
+    assert store.put(b"<svg/>", "svg") == url
+    assert store.put(b"<svg></svg>", "svg") != url
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_resolve_rejects_unknown_and_malformed_names(tmp_path):
+    """Only existing hash-named png/svg files resolve to a path."""
+    store = ArtifactStore(str(tmp_path))
+    name = store.put(b"png bytes").rsplit("/", 1)[-1]
+    assert store.resolve(name) == str(tmp_path / name)
+    assert store.resolve("0" * 32 + ".png") is None
+    assert store.resolve("../" + name) is None
+    assert store.resolve(name.replace(".png", ".txt")) is None
+
+
+def test_inline_returns_data_uri(tmp_path):
+    """Artifact URLs become data URIs; anything else passes through."""
+    store = ArtifactStore(str(tmp_path))
+    url = store.put(b"<svg/>", "svg")
+    assert store.inline(url) == "data:image/svg+xml;base64,PHN2Zy8+"
+    assert store.inline("/static/generated/old.png") == "/static/generated/old.png"
+    assert store.inline(None) is None
+
+
+def test_etag_matches():
+    """If-None-Match uses weak comparison and accepts lists and the wildcard."""
+    etag = ArtifactStore.etag("abc.png")
+    assert etag == '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"other", "abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_artifact_route_revalidates_with_etag():
+    """The /artifacts route serves immutable files and answers 304 for a matching ETag."""
+    name = artifact_store.put(b"<svg>route</svg>", "svg").rsplit("/", 1)[-1]
+    client = TestClient(app)
+
+    first = client.get(f"/artifacts/{name}")
+    assert first.status_code == 200
+    assert first.content == b"<svg>route</svg>"
+    assert "immutable" in first.headers["cache-control"]
+
+    again = client.get(f"/artifacts/{name}", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert client.get("/artifacts/" + "0" * 32 + ".svg").status_code == 404
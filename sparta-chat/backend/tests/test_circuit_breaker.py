@@ -0,0 +1,137 @@
+"""Test circuit breaker state transitions."""
+import asyncio
+
+import httpx
+import pytest
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def _breaker():
+    return CircuitBreaker("svc", "http://svc", failure_threshold=2, reset_timeout=30.0)
+
+
+async def _ok():
+    return "ok"
+
+
+async def _down():
+    raise httpx.ConnectError("connection refused")
+
+
+def _fallback():
+    return "fallback"
+
+
+def _expire(breaker):
+    """Pretend the reset timeout has passed."""
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def test_closed_open_half_open_closed():
+    """Failures open the breaker, and a successful trial after the timeout closes it."""
+    async def scenario():
+        breaker = _breaker()
+        assert await breaker.call(_down, _fallback) == "fallback"
+        assert breaker.state == CLOSED
+        assert await breaker.call(_down, _fallback) == "fallback"
+        assert breaker.state == OPEN
+
+        # Open: no call is attempted
+        calls = []
+
+        async def counted():
+            calls.append(1)
+            return "ok"
+
+        assert await breaker.call(counted, _fallback) == "fallback"
+        assert calls == [] and breaker.stats["short_circuits"] == 1
+
+        _expire(breaker)
+        assert await breaker.call(counted, _fallback) == "ok"
+        assert calls == [1]
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0 and not breaker.trial_in_flight
+
+
+def test_failed_trial_reopens():
+    """A failing half-open trial reopens the breaker for another reset period."""
+    async def scenario():
+        breaker = _breaker()
+        for _ in range(2):
+            await breaker.call(_down, _fallback)
+        _expire(breaker)
+        opened_at = breaker.opened_at
+        assert await breaker.call(_down, _fallback) == "fallback"
+        assert breaker.state == OPEN and breaker.opened_at > opened_at
+        assert await breaker.call(_ok, _fallback) == "fallback"
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.stats["short_circuits"] == 1
+
+
+def test_single_trial_while_half_open():
+    """Only one call goes through while the trial is in flight."""
+    async def scenario():
+        breaker = _breaker()
+        for _ in range(2):
+            await breaker.call(_down, _fallback)
+        _expire(breaker)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "ok"
+
+        trial = asyncio.create_task(breaker.call(slow, _fallback))
+        await asyncio.sleep(0)
+        assert breaker.state == HALF_OPEN and breaker.trial_in_flight
+        assert await breaker.call(_ok, _fallback) == "fallback"
+        release.set()
+        assert await trial == "ok"
+        return breaker
+
+    assert asyncio.run(scenario()).state == CLOSED
+
+
+def test_cancelled_trial_allows_another():
+    """A trial cancelled mid-call does not leave the breaker stuck half-open."""
+    async def scenario():
+        breaker = _breaker()
+        for _ in range(2):
+            await breaker.call(_down, _fallback)
+        _expire(breaker)
+
+        trial = asyncio.create_task(breaker.call(asyncio.Event().wait, _fallback))
+        await asyncio.sleep(0)
+        assert breaker.trial_in_flight
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert breaker.state == HALF_OPEN and not breaker.trial_in_flight
+        assert await breaker.call(_ok, _fallback) == "ok"
+        return breaker
+
+    assert asyncio.run(scenario()).state == CLOSED
+
+
+def test_client_errors_do_not_count():
+    """A 4xx is the caller's fault: it falls back but does not open the breaker."""
+    async def scenario():
+        breaker = _breaker()
+        request = httpx.Request("POST", "http://svc/x")
+
+        async def bad_request():
+            response = httpx.Response(422, request=request)
+            response.raise_for_status()
+
+        for _ in range(3):
+            assert await breaker.call(bad_request, _fallback) == "fallback"
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == CLOSED and breaker.failures == 0
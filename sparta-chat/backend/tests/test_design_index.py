@@ -0,0 +1,110 @@
+"""Test design library search."""
+import time
+
+import pytest
+
+from memory.vector_memory import DesignIndex, design_text
+
+
+LIBRARY = [
+    {"query": "design a traffic light controller", "spec": {"component": "fsm", "description": "Traffic Light Controller FSM"}},
+    {"query": "vending machine", "spec": {"component": "fsm", "description": "Vending Machine FSM"}},
+    {"query": "8-bit ripple carry adder", "spec": {"component": "adder", "bit_width": 8, "description": "Arithmetic adder circuit"}},
+    {"query": "16-bit ALU with add sub and xor", "spec": {
+        "component": "alu", "bit_width": 16, "operations": ["ADD", "SUB", "XOR"], "description": "Arithmetic Logic Unit"}},
+    {"query": "UART transmitter 115200 baud", "spec": {"component": "uart_tx", "description": "UART Transmitter"}},
+    {"query": "synchronous FIFO 32 deep", "spec": {"component": "fifo", "description": "FIFO Buffer"}},
+    {"query": "4-bit up counter with enable", "spec": {"component": "counter", "bit_width": 4, "description": "Up Counter"}},
+    {"query": "8x8 multiplier", "spec": {"component": "multiplier", "bit_width": 8, "description": "Integer multiplier"}},
+]
+
+
+@pytest.fixture
+def index():
+    index = DesignIndex()
+    for design in LIBRARY:
+        index.add(design)
+    return index
+
+
+def found(index, query, limit=5):
+    """Queries of the designs a search returns, best first."""
+    return [LIBRARY[row]["query"] for row, _ in index.search(query, limit)]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("state machine", "design a traffic light controller"),
+    ("traffic light", "design a traffic light controller"),
+    ("fsm", "vending machine"),
+    ("adder", "8-bit ripple carry adder"),
+    ("alu with xor", "16-bit ALU with add sub and xor"),
+    ("serial transmitter", "UART transmitter 115200 baud"),
+    ("fifo queue", "synchronous FIFO 32 deep"),
+    ("up counter", "4-bit up counter with enable"),
+])
+def test_recall_on_fixture_library(index, query, expected):
+    """Each query finds its design among the top three."""
+    assert expected in found(index, query, 3)
+
+
+def test_best_match_first_and_unrelated_query_empty(index):
+    """Results are ordered by score; nothing similar means no results."""
+    hits = index.search("traffic light controller", 3)
+    assert found(index, "traffic light controller", 3)[0] == "design a traffic light controller"
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+    assert index.search("zzqx", 5) == []
+    assert DesignIndex().search("adder") == []
+
+
+def test_component_ids_are_spelled_out():
+    """A design's text carries the long name of its component."""
+    assert "finite state machine" in design_text(LIBRARY[0])
+
+
+def test_compaction_keeps_earlier_rows():
+    """Rows survive being merged from the tail into the packed postings."""
+    index = DesignIndex()
+    for i in range(DesignIndex.TAIL_MIN + 200):
+        index.add({"query": f"filler design number {i}"})
+    index.add({"query": "traffic light controller"})
+    assert index._packed_rows > 0
+    assert len(index) == DesignIndex.TAIL_MIN + 201
+    assert index.search("traffic light", 1)[0][0] == len(index) - 1
+    assert index.search("filler design number 7", 1)[0][0] == 7
+
+
+def test_truncated_postings_keep_document_frequency():
+    """Postings are cut to the budget but IDF still sees every row."""
+    index = DesignIndex(budget=50, candidates=10)
+    for i in range(DesignIndex.TAIL_MIN + 1):
+        index.add({"query": f"common words {i}"})
+    index.add({"query": "common words with a rare tail"})
+    [(df, parts)] = index._postings([next(iter(index.embed("common")))])
+    assert df == len(index)
+    assert sum(rows.size for rows, _ in parts) < df
+    assert index.search("rare tail", 1)[0][0] == len(index) - 1
+
+
+@pytest.fixture(scope="module")
+def large_index():
+    index = DesignIndex()
+    components = [design["spec"]["component"] for design in LIBRARY]
+    for i in range(100_000):
+        index.add({"query": f"{components[i % len(components)]} {i % 97} rev {i}"})
+    index.add({"query": "dual port ram controller with burst refresh"})
+    return index
+
+
+def test_search_at_100k_designs(large_index):
+    """100k designs fit in tens of MB and a search stays in the low milliseconds."""
+    # A dense float32 matrix at the old 4096 dimensions would be 1.6 GB
+    assert large_index.nbytes < 64 * 2**20
+    for query, row in [("dual port ram with refresh", 100_000), ("adder rev 4242", 4242)]:
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            hits = large_index.search(query, 5)
+            timings.append(time.perf_counter() - started)
+        assert hits[0][0] == row
+        # Sub-millisecond on a quiet machine; the bound leaves room for CI noise
+        assert min(timings) < 0.01
@@ -0,0 +1,77 @@
+"""Test the lazy download manifest and its cached renders."""
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.downloads import materialized, router, save_session_design
+
+
+RTL = "module adder(input [7:0] a, input [7:0] b, output [8:0] sum);\n  assign sum = a + b;\nendmodule\n"
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def _session(design):
+    session_id = uuid.uuid4().hex
+    save_session_design(session_id, design)
+    return session_id
+
+
+def test_manifest_lists_only_buildable_artifacts():
+    """A manifest is recorded up front, with nothing rendered until downloaded."""
+    session_id = _session({"rtl_code": RTL})
+    artifacts = client.get(f"/download/manifest/{session_id}").json()["artifacts"]
+    assert set(artifacts) == {"rtl", "testbench", "vcd"}
+    assert not any(entry["materialized"] for entry in artifacts.values())
+    assert artifacts["rtl"]["inputs"] == ["rtl_code"]
+
+    assert client.get(f"/download/manifest/{uuid.uuid4().hex}").status_code == 404
+    assert client.get(f"/download/report/{session_id}").status_code == 404
+
+
+def test_download_renders_once_and_revalidates():
+    """The first download renders and records the digest; a matching ETag gets a 304."""
+    session_id = _session({"rtl_code": RTL})
+    first = client.get(f"/download/rtl/{session_id}")
+    assert first.status_code == 200
+    assert first.text == RTL
+    assert first.headers["content-disposition"] == f"attachment; filename=rtl_{session_id[:8]}.v"
+
+    entry = client.get(f"/download/manifest/{session_id}").json()["artifacts"]["rtl"]
+    assert entry["materialized"]
+    assert first.headers["etag"] == f'"{entry["digest"]}"'
+
+    again = client.get(f"/download/rtl/{session_id}", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_sessions_with_one_design_share_renders():
+    """Session-independent artifacts of identical designs hit the same cache entry."""
+    first = client.get(f"/download/vcd/{_session({'rtl_code': RTL})}")
+    hits = materialized.hits
+    second = client.get(f"/download/vcd/{_session({'rtl_code': RTL})}")
+    assert materialized.hits == hits + 1
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_per_session_artifacts_are_not_shared():
+    """Reports name their session, so each session gets its own render."""
+    design = {"parsed_spec": {"component": "adder", "bit_width": 8}}
+    a, b = _session(design), _session(design)
+    report_a = client.get(f"/download/report/{a}")
+    report_b = client.get(f"/download/report/{b}")
+    assert report_a.headers["etag"] != report_b.headers["etag"]
+    assert f"Session: {a}" in report_a.text
+
+
+def test_new_design_invalidates_the_previous_render():
+    """Saving a changed design resets the manifest and changes the digest."""
+    session_id = _session({"rtl_code": RTL})
+    old = client.get(f"/download/rtl/{session_id}")
+    save_session_design(session_id, {"rtl_code": RTL.replace("adder", "adder16")})
+    new = client.get(f"/download/rtl/{session_id}")
+    assert new.headers["etag"] != old.headers["etag"]
+    assert "adder16" in new.text
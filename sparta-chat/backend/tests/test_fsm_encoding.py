@@ -0,0 +1,25 @@
+"""Test FSM encoding search."""
+import numpy as np
+import pytest
+
+from utils.fsm_encoding import MAX_FSM_STATES, _popcount, optimize_fsm_encoding
+
+
+def test_popcount_counts_bits_above_16():
+    """Codes wider than 16 bits count every bit."""
+    values = np.array([0, 1, 0xFFFF, 1 << 16, (1 << 40) | 0b101, (1 << 62) - 1], dtype=np.int64)
+    assert _popcount(values).tolist() == [0, 1, 16, 1, 3, 62]
+
+
+def test_largest_supported_fsm_is_searched():
+    """An FSM at the limit still gets distinct codes."""
+    states = [f"S{i}" for i in range(MAX_FSM_STATES)]
+    result = optimize_fsm_encoding(states, goal="area")
+    assert len(set(result["codes"].values())) == MAX_FSM_STATES
+
+
+def test_rejects_fsm_above_limit():
+    """Oversized FSMs are rejected before any n x n matrix is built."""
+    states = [f"S{i}" for i in range(MAX_FSM_STATES + 1)]
+    with pytest.raises(ValueError):
+        optimize_fsm_encoding(states)
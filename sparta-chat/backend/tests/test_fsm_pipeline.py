@@ -0,0 +1,87 @@
+"""Test that the FSM encoding chosen during synthesis reaches the generated RTL."""
+import asyncio
+import importlib
+import re
+import sys
+from pathlib import Path
+
+import httpx
+
+from agents.rtl_agent import RTLAgent
+from agents.synthesis_agent import SynthesisAgent
+from utils.http_clients import HTTPClientRegistry
+
+
+ROOT = Path(__file__).resolve().parents[3]
+
+SPEC = {
+    "component": "fsm",
+    "states": ["IDLE", "LOAD", "RUN", "DONE"],
+    "transitions": [
+        {"from": "IDLE", "to": "LOAD", "condition": "start"},
+        {"from": "LOAD", "to": "RUN"},
+        {"from": "RUN", "to": "DONE", "condition": "count_done"},
+        {"from": "DONE", "to": "IDLE"},
+    ],
+    "constraints": {"optimization_goal": "power"},
+}
+
+
+def _service_app(service_dir: str):
+    """Import a service's app.main as its own `app` package and return its FastAPI app."""
+    saved_path = list(sys.path)
+    saved = {name: sys.modules.pop(name) for name in list(sys.modules) if name == "app" or name.startswith("app.")}
+    sys.path.insert(0, str(ROOT / service_dir))
+    try:
+        return importlib.import_module("app.main").app
+    finally:
+        for name in [name for name in sys.modules if name == "app" or name.startswith("app.")]:
+            del sys.modules[name]
+        sys.modules.update(saved)
+        sys.path[:] = saved_path
+
+
+def _registry() -> HTTPClientRegistry:
+    """Clients that route to the real service apps in-process."""
+    registry = HTTPClientRegistry()
+    for name, service_dir in (("synthesis-agent", "agents/synthesis-agent"), ("rtl-generator", "services/rtl-generator")):
+        registry._clients[name] = httpx.AsyncClient(transport=httpx.ASGITransport(app=_service_app(service_dir)))
+    return registry
+
+
+async def _through_services(spec):
+    """Architecture from the synthesis service and RTL for it from the RTL generator."""
+    registry = _registry()
+    synthesis, rtl = SynthesisAgent(registry), RTLAgent(registry)
+    synthesis.breaker.record_success()
+    rtl.breaker.record_success()
+    try:
+        architecture = await synthesis.synthesize(spec)
+        return architecture, await rtl.generate(architecture)
+    finally:
+        await registry.aclose()
+
+
+def test_service_path_keeps_the_chosen_encoding():
+    """Synthesis service -> RTL service: the RTL uses the searched codes and the spec's conditions."""
+    architecture, result = asyncio.run(_through_services(SPEC))
+    assert architecture["type"] == "finite_state_machine"
+    assert architecture["state_names"] == SPEC["states"]
+    assert "estimated_metrics" in architecture
+
+    code = result["code"]
+    width = architecture["state_width"]
+    for state, value in architecture["state_encoding"].items():
+        assert f"localparam logic [{width-1}:0] {state} = {width}'b{value:0{width}b};" in code
+    assert f"// State encoding: {architecture['encoding']}" in code
+    assert re.search(r"input\s+logic start,", code)
+    assert re.search(r"input\s+logic count_done,", code)
+    assert "IDLE: begin if (start) next_state = LOAD; end" in code
+    assert "LOAD: begin next_state = RUN; end" in code
+    assert "done_signal" not in code
+
+
+def test_inline_fallback_matches_service_rtl():
+    """The RTL agent's inline generator produces the same module as the service."""
+    architecture, result = asyncio.run(_through_services(SPEC))
+    assert RTLAgent()._inline_generate(architecture)["code"] == result["code"].rstrip("\n")
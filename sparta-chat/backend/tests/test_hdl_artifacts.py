@@ -0,0 +1,49 @@
+"""Test testbench and VCD generation from a module header."""
+import re
+
+from utils.hdl_artifacts import _vcd_id, generate_testbench, generate_vcd, parse_ports
+from utils.spec_grammar import MAX_WIDTH
+
+
+def _module(ports):
+    return f"module wide({', '.join(ports)});\nendmodule\n"
+
+
+def _vcd_vars(vcd):
+    return re.findall(r"\$var wire (\d+) (\S+) (\w+) \$end", vcd)
+
+
+def test_vcd_ids_are_unique_past_94_ports():
+    """Identifiers grow to several printable characters instead of leaving the VCD alphabet."""
+    assert [_vcd_id(i) for i in (0, 93, 94, 95)] == ["!", "~", "!!", '"!']
+    ids = [_vcd_id(i) for i in range(94 * 95 + 1)]
+    assert len(set(ids)) == len(ids)
+    assert all(33 <= ord(c) <= 126 for ident in ids for c in ident)
+    assert len(ids[-1]) == 3
+
+    code = _module(["input logic clk"] + [f"input logic [3:0] in{i}" for i in range(200)])
+    variables = _vcd_vars(generate_vcd(code, cycles=2))
+    assert len(variables) == 201
+    assert len({ident for _, ident, _ in variables}) == 201
+
+
+def test_vcd_values_use_each_port_width():
+    """Every vector value change has exactly the port's width in bits."""
+    code = _module(["input logic clk", "input logic rst_n", "input logic [11:0] a", "output logic [4:0] y"])
+    vcd = generate_vcd(code, cycles=4)
+    widths = {ident: int(width) for width, ident, _ in _vcd_vars(vcd)}
+    for bits, ident in re.findall(r"^b([01x]+) (\S+)$", vcd, re.M):
+        assert len(bits) == widths[ident]
+
+
+def test_ports_wider_than_max_width_are_not_dumped():
+    """An absurd declared width gives a short note instead of a multi-gigabyte waveform."""
+    code = _module(["input logic clk", f"input logic [{10 ** 9}:0] huge", "output logic y"])
+    assert parse_ports(code)[1][1].width == 10 ** 9 + 1
+    vcd = generate_vcd(code)
+    assert vcd.startswith("$comment No waveform available: huge wider than")
+    assert len(vcd) < 200
+    assert "huge" in generate_testbench(code)
+
+    ok = _module([f"input logic [{MAX_WIDTH - 1}:0] a"])
+    assert (str(MAX_WIDTH), "!", "a") in _vcd_vars(generate_vcd(ok, cycles=1))
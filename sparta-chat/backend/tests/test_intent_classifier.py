@@ -0,0 +1,49 @@
+"""Test the hashed n-gram intent classifier."""
+import numpy as np
+
+from utils.intent_classifier import IntentClassifier, hash_features
+
+
+TEXTS = [
+    "design an 8-bit adder", "make a 16 bit adder", "ripple carry adder please",
+    "build an alu with add and sub", "alu supporting xor and or", "simple alu",
+    "traffic light fsm", "state machine with three states", "fsm for a vending machine",
+    "pcb for an arduino shield", "design a pcb board", "route my pcb layout",
+]
+INTENTS = ["design_creation"] * 9 + ["pcb_design"] * 3
+COMPONENTS = ["adder"] * 3 + ["alu"] * 3 + ["fsm"] * 3 + [None] * 3
+
+
+def test_sparse_rows_match_dense_products():
+    """Sparse features give the same products as the dense matrix."""
+    X = hash_features(TEXTS + [""], n_features=512)
+    dense = X.toarray()
+    assert dense.shape == (len(TEXTS) + 1, 512)
+    weights = np.random.default_rng(0).normal(size=(3, 512)).astype(np.float32)
+    np.testing.assert_allclose(X.matmul(weights), dense @ weights.T, rtol=1e-5, atol=1e-5)
+
+    mask = np.arange(len(X)) % 2 == 0
+    np.testing.assert_array_equal(X.select(mask).toarray(), dense[mask])
+
+    index = np.arange(len(X)) % 3
+    np.testing.assert_array_equal(X.class_counts(index, 3), np.eye(3)[index].T @ dense)
+
+
+def test_learns_intent_and_component():
+    """Both heads are trained; rows without a component label are skipped."""
+    model = IntentClassifier.train(TEXTS, {"intent": INTENTS, "component": COMPONENTS})
+    assert set(model.heads) == {"intent", "component"}
+    assert set(model.heads["component"].labels) == {"adder", "alu", "fsm"}
+
+    prediction = model.predict("a 32-bit adder")
+    assert prediction["component"]["label"] == "adder"
+    assert prediction["intent"]["label"] == "design_creation"
+    assert model.predict("pcb for a sensor board")["intent"]["label"] == "pcb_design"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """A saved model reloads with identical predictions."""
+    model = IntentClassifier.train(TEXTS, {"intent": INTENTS, "component": COMPONENTS})
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    assert IntentClassifier.load(path).predict_batch(TEXTS) == model.predict_batch(TEXTS)
@@ -0,0 +1,69 @@
+"""Test the shared keyword lexicon."""
+import random
+
+from utils.lexicon import KEYWORDS, KeywordAutomaton, Lexicon, scan
+
+
+def test_overlapping_keywords_are_all_reported():
+    """Keywords that overlap or nest inside each other are each found at their position."""
+    automaton = KeywordAutomaton(["he", "she", "his", "hers"])
+    assert sorted(automaton.find_all("ushers")) == [("he", 2), ("hers", 2), ("she", 1)]
+
+    found = KeywordAutomaton(["adder", "ripple-adder", "ripple-carry-adder"]).find_all("ripple-carry-adder")
+    assert sorted(found) == [("adder", 13), ("ripple-carry-adder", 0)]
+
+
+def test_repeated_occurrences():
+    """Every occurrence is reported, including overlapping repeats."""
+    assert KeywordAutomaton(["aa"]).find_all("aaaa") == [("aa", 0), ("aa", 1), ("aa", 2)]
+
+
+def test_keyword_in_several_categories():
+    """One occurrence of a shared keyword marks every category that lists it."""
+    lexicon = Lexicon({"design": ["create", "build"], "service": ["create"], "other": ["test"]})
+    matches = lexicon.scan("Create an ALU")
+    assert matches.has("design") and matches.has("service")
+    assert not matches.has("other")
+    assert matches.categories["design"] == (("create", 0),)
+    assert matches.categories["service"] == (("create", 0),)
+
+
+def test_matching_is_substring_not_word_boundary():
+    """Like the `kw in text.lower()` rules it replaced, keywords match inside words and across case."""
+    matches = scan("Show me the LATEST Counters")
+    assert matches.has("intent_explain")  # "how" inside "show"
+    assert matches.has("plan_verify")  # "test" inside "latest"
+    assert matches.keywords("counter") == ["counter"]
+    assert scan("an 8-bit adder").has("width_8")
+    assert not scan("an 8bit adder").has("width_8")
+
+
+def test_first_and_to_dict():
+    """Priority lookup and the JSON view report the matched keywords and spans."""
+    matches = scan("design a fifo buffer")
+    assert matches.first("fifo", ["buffer", "fifo"]) == "buffer"
+    assert matches.first("uart", ["uart"]) == ""
+    assert matches.to_dict()["fifo"] == [
+        {"keyword": "fifo", "start": 9, "end": 13},
+        {"keyword": "buffer", "start": 14, "end": 20},
+    ]
+
+
+def test_equivalent_to_substring_rules():
+    """For every category, the automaton agrees with the old per-keyword substring checks."""
+    rng = random.Random(0)
+    vocabulary = sorted({word for words in KEYWORDS.values() for word in words}) + [
+        "please", "the", "a", "with", "and", "x", "-", "bit", "State", "MACHINE", "Low", "POWER",
+    ]
+    texts = ["", "nothing relevant here", "Design a low power 8-bit ALU with reset and enable"]
+    for _ in range(300):
+        words = rng.choices(vocabulary, k=rng.randint(1, 8))
+        texts.append(rng.choice([" ", "", "-"]).join(words))
+
+    for text in texts:
+        matches = scan(text)
+        lowered = text.lower()
+        for category, words in KEYWORDS.items():
+            assert matches.has(category) == any(word in lowered for word in words), (text, category)
+            for keyword, start in matches.categories.get(category, []):
+                assert lowered[start:start + len(keyword)] == keyword
@@ -0,0 +1,104 @@
+"""Test the write-behind persistence queue."""
+import asyncio
+import json
+
+from utils.persistence import PersistenceQueue
+
+
+class FakeDB:
+    """Fails any batch containing a message listed in bad."""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.rows = []
+        self.calls = 0
+
+    async def save_messages(self, rows):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if any(row[3] in self.bad for row in rows):
+            raise RuntimeError("constraint failed")
+        self.rows.extend(rows)
+
+
+class FakeMemory:
+    def __init__(self):
+        self.designs = []
+        self.exports = 0
+
+    def record_design(self, session_id, design):
+        self.designs.append((session_id, design))
+
+    async def persist(self):
+        self.exports += 1
+
+
+def _queue(db, memory, tmp_path, **kwargs):
+    return PersistenceQueue(
+        db, memory, max_batch=64, flush_interval_ms=5, retries=1,
+        dead_letter_file=str(tmp_path / "dead.jsonl"), **kwargs
+    )
+
+
+def test_failing_row_does_not_drop_its_batch(tmp_path):
+    """Rows from other sessions in the same batch are still written; the bad one is dead-lettered."""
+    db = FakeDB(bad={"poison"})
+    queue = _queue(db, FakeMemory(), tmp_path)
+
+    async def scenario():
+        queue.start()
+        await queue.save_message("s1", "user", "hello")
+        await queue.save_message("s2", "user", "poison")
+        await queue.save_message("s3", "assistant", "world")
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert [row[3] for row in db.rows] == ["hello", "world"]
+    assert queue.stats["dead_lettered"] == 1 and queue.stats["dropped"] == 0
+    dead = [json.loads(line) for line in (tmp_path / "dead.jsonl").read_text().splitlines()]
+    assert [(d["session_id"], d["message"]) for d in dead] == [("s2", "poison")]
+
+
+def test_library_export_is_debounced(tmp_path):
+    """Many design batches export the library once, plus once at shutdown."""
+    memory = FakeMemory()
+    queue = _queue(FakeDB(), memory, tmp_path, library_interval=3600)
+
+    async def scenario():
+        queue.start()
+        for i in range(5):
+            await queue.save_design("s1", {"n": i})
+            await queue.flush()
+        assert memory.exports == 1
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert len(memory.designs) == 5
+    assert memory.exports == 2
+    assert queue.stats["designs"] == 5
+
+
+def test_flush_does_not_wait_for_later_writes(tmp_path):
+    """flush() returns once earlier writes land, even while more keep arriving."""
+    db = FakeDB()
+    queue = _queue(db, FakeMemory(), tmp_path)
+
+    async def scenario():
+        queue.start()
+        await queue.save_message("s1", "user", "before")
+        stop = asyncio.Event()
+
+        async def writer():
+            while not stop.is_set():
+                await queue.save_message("s2", "user", "later")
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(writer())
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(queue.flush(), 1.0)
+        assert db.rows[0][3] == "before"
+        stop.set()
+        await task
+        await queue.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+"""Test the render worker pool."""
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import utils.render_pool as render_pool_module
+from utils.block_diagram import BlockDiagramGenerator
+from utils.formatting import create_visualization
+from utils.render_pool import RenderJob, RenderPool, RenderQueueFull
+
+PNG_MAGIC = b"\x89PNG"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """One real worker process, without the matplotlib warm-up."""
+    monkeypatch.setattr(render_pool_module, "PRELOAD_MODULES", ())
+    pool = RenderPool(workers=1, max_pending=2)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_inline_render():
+    """With no workers the job runs in-process and returns the PNG."""
+    pool = RenderPool(workers=0)
+    png = asyncio.run(pool.render(RenderJob("utils.formatting:render_visualization_png", ("",))))
+    assert png.startswith(PNG_MAGIC)
+    assert pool.stats["inline"] == 1
+
+
+def test_render_in_worker(pool):
+    """Jobs run in a worker process."""
+    png = asyncio.run(pool.render(RenderJob("utils.formatting:render_visualization_png", ("",))))
+    assert png.startswith(PNG_MAGIC)
+    assert asyncio.run(pool.render(RenderJob("os:getpid"))) != os.getpid()
+    assert pool.stats == {"jobs": 2, "inline": 0, "waited": 0, "rejected": 0, "restarts": 0}
+
+
+def test_worker_crash_restarts_pool(pool):
+    """A job that kills its worker fails, and the next job runs on a fresh pool."""
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await pool.render(RenderJob("os:_exit", (1,)))
+        return await pool.render(RenderJob("os:getpid"))
+
+    assert asyncio.run(scenario()) != os.getpid()
+    assert pool.stats["restarts"] == 1
+
+
+def test_queue_full(pool):
+    """Callers past max_pending wait for a slot, and give up after their wait budget."""
+    async def scenario():
+        busy = [asyncio.create_task(pool.render(RenderJob("time:sleep", (0.5,)))) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(RenderQueueFull):
+            await pool.render(RenderJob("os:getpid"), wait_timeout=0.05)
+        await asyncio.gather(*busy)
+        return await pool.render(RenderJob("os:getpid"), wait_timeout=0.05)
+
+    assert asyncio.run(scenario()) != os.getpid()
+    assert pool.stats["waited"] == 1 and pool.stats["rejected"] == 1
+
+
+def test_producers_skip_when_queue_full(monkeypatch):
+    """Diagram producers degrade to no image instead of failing the reply."""
+    async def full(job, wait_timeout=None):
+        assert wait_timeout == render_pool_module.RENDER_WAIT_TIMEOUT
+        raise RenderQueueFull("2 renders already in flight")
+
+    monkeypatch.setattr(render_pool_module.render_pool, "render", full)
+    diagram = asyncio.run(BlockDiagramGenerator().generate_diagram({}, {"component": "adder"}))
+    visualization = asyncio.run(create_visualization("", "session"))
+    assert diagram is None and visualization is None
@@ -0,0 +1,59 @@
+"""Test the shared, memoized request analysis."""
+import json
+
+import pytest
+
+from utils.request_analysis import _analyze_normalized, analyze_request
+
+
+def test_equivalent_messages_share_one_analysis():
+    """Messages that normalize the same are a cache hit returning the same analysis."""
+    _analyze_normalized.cache_clear()
+    first = analyze_request("Design a 16-bit adder")
+    second = analyze_request("  design   a 16-BIT adder ")
+    assert second is first
+    assert _analyze_normalized.cache_info().hits == 1
+    assert first.component == "adder"
+    assert first.parameters["bit_width"] == 16
+    assert first.spec["bit_width"] == 16
+
+
+def test_cached_analysis_is_read_only():
+    """Shared fields cannot be mutated in place, so one request cannot corrupt later hits."""
+    analysis = analyze_request("design a low power fsm with 5 states")
+    with pytest.raises(TypeError):
+        analysis.constraints["optimization_goal"] = "speed"
+    with pytest.raises(TypeError):
+        analysis.spec["component"] = "alu"
+    with pytest.raises(TypeError):
+        analysis.classification["intent"]["label"] = "optimization"
+    with pytest.raises(AttributeError):
+        analysis.spec["states"].append("EXTRA")
+    with pytest.raises(AttributeError):
+        analysis.intent = "optimization"
+    with pytest.raises(TypeError):
+        analysis.matches.categories["fsm"] = ()
+
+    again = analyze_request("design a low power fsm with 5 states")
+    assert again.constraints == {"optimization_goal": "area"}
+    assert again.spec["component"] == "fsm"
+    assert len(again.spec["states"]) == 5
+
+
+def test_spec_copy_is_independent():
+    """Editing a spec copy (as the agents do) leaves the cached analysis untouched."""
+    analysis = analyze_request("design a low power fsm with 5 states")
+    spec = analysis.spec_copy()
+    spec["constraints"]["optimization_goal"] = "speed"
+    spec["states"].append("EXTRA")
+    assert analysis.spec_copy()["constraints"] == {"optimization_goal": "area"}
+    assert len(analyze_request("design a low power fsm with 5 states").spec["states"]) == 5
+
+
+def test_to_dict_is_json_ready():
+    """The metadata summary serializes and is a copy."""
+    analysis = analyze_request("create an 8 bit counter with reset")
+    summary = analysis.to_dict()
+    json.dumps(summary)
+    summary["classification"]["intent"]["label"] = "changed"
+    assert analysis.classification["intent"]["label"] == "design_creation"
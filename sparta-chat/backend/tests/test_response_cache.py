@@ -0,0 +1,65 @@
+"""Test the whole-response cache."""
+import os
+import time
+
+from utils.artifact_store import artifact_store
+from utils.response_cache import ResponseCache, find_artifacts, relink, response_key
+
+
+RESPONSE = {
+    "session_id": "old",
+    "response": "Here is your adder",
+    "download_links": {"rtl_file": "/download/rtl/old", "docs": "https://example.com/guide"},
+}
+
+
+def test_key_ignores_context_order():
+    """Equivalent contexts give one key; a different message gives another."""
+    assert response_key("8 bit adder", {"a": 1, "b": 2}) == response_key("8 bit adder", {"b": 2, "a": 1})
+    assert response_key("8 bit adder") == response_key("8 bit adder", {})
+    assert response_key("8 bit adder") != response_key("4 bit adder")
+
+
+def test_relink_rewrites_session_links():
+    """A cached answer is rebound to the requesting session, without touching the original."""
+    relinked = relink(RESPONSE, "old", "new")
+    assert relinked["session_id"] == "new"
+    assert relinked["download_links"] == {"rtl_file": "/download/rtl/new", "docs": "https://example.com/guide"}
+    assert RESPONSE["download_links"]["rtl_file"] == "/download/rtl/old"
+
+
+def test_lru_eviction_and_ttl():
+    """Least recently used entries go first; stale entries miss."""
+    cache = ResponseCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", "s", RESPONSE, None)
+    cache.put("b", "s", RESPONSE, None)
+    assert cache.get("a") is not None
+    cache.put("c", "s", RESPONSE, None)
+    assert cache.get("b") is None
+    assert cache.get("a")["response"] == RESPONSE
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_entry_stored_as_copy():
+    """Mutating the response after put() does not change the cached entry."""
+    cache = ResponseCache()
+    response = {"response": "text", "download_links": None}
+    cache.put("k", "s", response, {"rtl": "module m;"})
+    response["response"] = "changed"
+    assert cache.get("k")["response"]["response"] == "text"
+
+
+def test_missing_artifact_invalidates_entry():
+    """A hit is only served while the images it points at still exist."""
+    url = artifact_store.put(b"diagram bytes", "png")
+    response = {"response": "see diagram", "block_diagram": url}
+    path = artifact_store.path_for_url(url)
+    assert find_artifacts(response) == [path]
+
+    cache = ResponseCache()
+    cache.put("k", "s", response, None)
+    assert cache.get("k") is not None
+    os.remove(path)
+    assert cache.get("k") is None
@@ -0,0 +1,163 @@
+"""Test the cross-worker shared state store."""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from memory.vector_memory import MemoryManager
+from utils.shared_state import DEFAULT_DB_PATH, RedisState, SharedState, SQLiteState, open_state
+
+
+def test_sqlite_values_lists_and_counters(tmp_path):
+    """Two handles on one file (two workers) see each other's writes."""
+    path = str(tmp_path / "state.db")
+    a, b = SQLiteState(path), SQLiteState(path)
+
+    a.set("designs", "s1", {"rtl": "module x;"})
+    assert b.get("designs", "s1") == {"rtl": "module x;"}
+    assert b.add("designs", "s1", {"rtl": "other"}) is False
+    assert b.add("designs", "s2", 1) is True
+
+    for i in range(5):
+        (a if i % 2 else b).append("memory", "library", {"n": i})
+    assert a.list_length("memory", "library") == 5
+    assert [d["n"] for d in b.list_range("memory", "library", -2, -1)] == [3, 4]
+    assert [d["n"] for d in a.list_range("memory", "library", 1, 2)] == [1, 2]
+    assert a.list_range("memory", "library", 7, 9) == []
+
+    assert [a.next_id("image"), b.next_id("image"), a.next_id("image")] == [1, 2, 3]
+
+    a.delete("designs", "s1")
+    assert b.get("designs", "s1") is None
+    a.close()
+    b.close()
+
+
+def test_sqlite_ttl_expires_keys(tmp_path):
+    """Expired keys read as missing and can be re-added."""
+    state = SQLiteState(str(tmp_path / "state.db"))
+    state.set("sessions", "s1", "design", ttl=0.05)
+    mapping = state.mapping("sessions")
+    assert "s1" in mapping
+    time.sleep(0.1)
+    assert "s1" not in mapping
+    assert state.add("sessions", "s1", "fresh") is True
+    state.close()
+
+
+class FakeRedis:
+    """Just enough of the redis-py command set for RedisState."""
+
+    def __init__(self):
+        self.kv, self.lists = {}, {}
+
+    def get(self, key):
+        return self.kv.get(key)
+
+    def set(self, key, value, px=None, nx=False):
+        if nx and key in self.kv:
+            return None
+        self.kv[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.kv.pop(key, None)
+            self.lists.pop(key, None)
+
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+        return len(self.lists[key])
+
+    def lrange(self, key, start, stop):
+        items = self.lists.get(key, [])
+        stop = len(items) if stop == -1 else stop + 1
+        return items[start:stop]
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def incrby(self, key, amount):
+        self.kv[key] = int(self.kv.get(key, 0)) + amount
+        return self.kv[key]
+
+
+def test_redis_adapter_round_trips_json():
+    """The Redis adapter stores JSON under prefixed keys."""
+    client = FakeRedis()
+    state = RedisState(client, prefix="test")
+    state.set("designs", "s1", {"a": 1})
+    assert state.get("designs", "s1") == {"a": 1}
+    assert "test:designs:s1" in client.kv
+    assert state.add("designs", "s1", {}) is False
+    assert state.append("memory", "library", "x") == 1
+    assert state.list_range("memory", "library") == ["x"]
+    assert state.next_id("image") == 1
+
+
+def test_default_path_ignores_working_directory(tmp_path, monkeypatch):
+    """Without SHARED_STATE_URL every worker opens backend/db/shared_state.db."""
+    monkeypatch.delenv("SHARED_STATE_URL", raising=False)
+    monkeypatch.chdir(tmp_path)
+    state = open_state()
+    assert state.db_path == DEFAULT_DB_PATH
+    assert os.path.isabs(state.db_path)
+    assert DEFAULT_DB_PATH.endswith(os.path.join("backend", "db", "shared_state.db"))
+
+
+def test_backends_must_implement_every_operation():
+    """SharedState is abstract: a backend missing an operation cannot be created."""
+    with pytest.raises(TypeError):
+        SharedState()
+
+    class Partial(SharedState):
+        def get(self, namespace, key):
+            return None
+
+    with pytest.raises(TypeError, match="list_range"):
+        Partial()
+
+
+def test_list_range_does_not_wait_for_writers(tmp_path):
+    """Reads take a snapshot instead of the write lock, so a busy writer never blocks them."""
+    path = str(tmp_path / "state.db")
+    reader = SQLiteState(path)
+    for i in range(3):
+        reader.append("memory", "library", i)
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO lists (namespace, key, value) VALUES ('memory', 'library', '3')")
+    try:
+        reader._connection().execute("PRAGMA busy_timeout = 100")
+        assert reader.list_range("memory", "library") == [0, 1, 2]
+    finally:
+        writer.execute("COMMIT")
+        writer.close()
+    assert reader.list_range("memory", "library", -1, -1) == [3]
+    reader.close()
+
+
+def test_memory_manager_reads_state_off_the_event_loop(tmp_path, monkeypatch):
+    """Async memory calls run their blocking shared-state reads in a worker thread."""
+    state = SQLiteState(str(tmp_path / "state.db"))
+    memory = MemoryManager(str(tmp_path / "memory.json"), state)
+    threads = []
+    list_range = state.list_range
+
+    def recording(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return list_range(*args, **kwargs)
+
+    monkeypatch.setattr(state, "list_range", recording)
+
+    async def scenario():
+        memory.add_message_to_session("s1", "user", "hello")
+        return await memory.load_recent_messages("s1")
+
+    assert [m["content"] for m in asyncio.run(scenario())] == ["hello"]
+    assert threads and threading.get_ident() not in threads
+    state.close()
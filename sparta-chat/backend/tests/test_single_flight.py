@@ -0,0 +1,106 @@
+"""Test request coalescing."""
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_identical_calls_share_one_execution():
+    """Concurrent callers for one key run the work once and see the same result."""
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def work(broadcast):
+            calls.append(1)
+            await release.wait()
+            return {"answer": 42}
+
+        callers = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.waiters() == {"k": 3}
+        release.set()
+        results = await asyncio.gather(*callers)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    assert all(result == {"answer": 42} for result, _ in results)
+    assert flight.stats == {"leaders": 1, "coalesced": 2}
+    assert flight.waiters() == {}
+
+
+def test_events_reach_every_attached_caller():
+    """Stage events from the leader's work are broadcast to joined callers too."""
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        seen = {"a": [], "b": []}
+
+        def sink(name):
+            async def emit(event, data):
+                seen[name].append((event, data["stage"]))
+            return emit
+
+        async def work(broadcast):
+            await release.wait()
+            await broadcast("stage", {"stage": "rtl"})
+            return "done"
+
+        callers = [asyncio.create_task(flight.do("k", work, sink(name))) for name in seen]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*callers)
+        return seen
+
+    assert asyncio.run(scenario()) == {"a": [("stage", "rtl")], "b": [("stage", "rtl")]}
+
+
+def test_exception_propagates_and_key_is_released():
+    """A failure reaches every caller and the next call starts a fresh flight."""
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def failing(broadcast):
+            await release.wait()
+            raise RuntimeError("synthesis down")
+
+        callers = [asyncio.create_task(flight.do("k", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+
+        async def ok(broadcast):
+            return "recovered"
+
+        return outcomes, await flight.do("k", ok)
+
+    outcomes, retry = asyncio.run(scenario())
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert retry == ("recovered", False)
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    """The work keeps running for the remaining callers when one goes away."""
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work(broadcast):
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(flight.do("k", work))
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        return await follower
+
+    assert asyncio.run(scenario()) == ("result", True)
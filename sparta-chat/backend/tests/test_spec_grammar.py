@@ -0,0 +1,61 @@
+"""Test spec parameter grammar."""
+from utils.spec_grammar import MAX_STATES, MAX_WIDTH, apply_parameters, extract_parameters, first_values
+
+
+def _values(text):
+    return first_values(extract_parameters(text))
+
+
+def test_extracts_typed_values_with_spans():
+    """Numbers, units and lists come back typed, with the matched text."""
+    text = "uart at 9.6k baud with 7 data bits, 2 stop bits, clock 50 MHz"
+    params = extract_parameters(text)
+    values = first_values(params)
+    assert values == {"baud_rate": 9600, "data_bits": 7, "stop_bits": 2, "clock_mhz": 50.0}
+    for p in params:
+        assert text[p.start:p.end] == p.text
+
+
+def test_specific_phrasings_win_over_generic_width():
+    """"[15:0]" is a width and "32x8" a FIFO geometry, not two bare numbers."""
+    spec = {"component": "fifo"}
+    apply_parameters(spec, _values("fifo 32x8"))
+    assert (spec["depth"], spec["data_width"]) == (32, 8)
+    assert _values("bus [15:0]")["width"] == 16
+
+
+def test_state_list_overrides_defaults():
+    """Named states replace the defaults and set the count."""
+    spec = {"component": "fsm", "states": ["IDLE"], "num_states": 1}
+    warnings = apply_parameters(spec, _values("fsm with states red, green and yellow"))
+    assert warnings == []
+    assert spec["states"] == ["RED", "GREEN", "YELLOW"]
+    assert spec["num_states"] == 3
+
+
+def test_huge_state_count_is_a_warning():
+    """An untrusted state count above the limit is ignored, not expanded into a list."""
+    spec = {"component": "fsm", "states": ["IDLE", "DONE"], "num_states": 2}
+    warnings = apply_parameters(spec, _values(f"fsm with {10 ** 9} states"))
+    assert len(warnings) == 1
+    assert spec["states"] == ["IDLE", "DONE"]
+
+    spec = {"component": "fsm"}
+    assert apply_parameters(spec, _values(f"fsm with {MAX_STATES} states")) == []
+    assert len(spec["states"]) == MAX_STATES
+
+
+def test_huge_width_is_a_warning():
+    """An untrusted bus width above the limit is ignored for buses and FIFO words."""
+    spec = {"component": "adder", "bit_width": 8}
+    warnings = apply_parameters(spec, _values(f"{10 ** 9}-bit adder"))
+    assert len(warnings) == 1
+    assert spec["bit_width"] == 8
+
+    spec = {"component": "fifo", "depth": 16, "data_width": 8}
+    assert len(apply_parameters(spec, _values(f"fifo 32x{10 ** 6}"))) == 1
+    assert spec == {"component": "fifo", "depth": 32, "data_width": 8}
+
+    spec = {"component": "adder"}
+    assert apply_parameters(spec, _values(f"{MAX_WIDTH}-bit adder")) == []
+    assert spec["bit_width"] == MAX_WIDTH
@@ -0,0 +1,78 @@
+"""Test retry resumption through StageCheckpoint."""
+import asyncio
+
+import pytest
+
+from utils.stage_graph import ResourceLimits, StageCheckpoint, StageError, StageGraph
+
+
+def _build(calls, fail_rtl):
+    async def spec():
+        calls.append("spec")
+        return {"component": "adder"}
+
+    async def architecture(spec):
+        calls.append("architecture")
+        return {"type": spec["component"]}
+
+    async def diagram(architecture):
+        calls.append("diagram")
+        await asyncio.sleep(0.05)
+        return f"diagram of {architecture['type']}"
+
+    async def rtl(architecture):
+        calls.append("rtl")
+        if fail_rtl:
+            raise RuntimeError("RTL error")
+        return "module adder;"
+
+    async def simulation(rtl):
+        calls.append("simulation")
+        return {"status": "passed"}
+
+    graph = StageGraph(ResourceLimits({"default": 8}))
+    graph.add("spec", spec)
+    graph.add("architecture", architecture, ("spec",))
+    graph.add("diagram", diagram, ("architecture",), optional=True)
+    graph.add("rtl", rtl, ("architecture",))
+    graph.add("simulation", simulation, ("rtl",))
+    return graph
+
+
+def test_retry_resumes_at_failed_stage():
+    """Only the failed stage and its dependents rerun; unaffected work is adopted."""
+    calls = []
+    checkpoint = StageCheckpoint()
+
+    async def turn():
+        with pytest.raises(StageError):
+            await _build(calls, fail_rtl=True).run(checkpoint=checkpoint)
+        assert checkpoint.failed == "rtl"
+        assert set(checkpoint.results) == {"spec", "architecture"}
+        assert set(checkpoint.inflight) == {"diagram"}
+        return await _build(calls, fail_rtl=False).run(checkpoint=checkpoint)
+
+    results = asyncio.run(turn())
+    assert results["simulation"] == {"status": "passed"}
+    assert results["diagram"] == "diagram of adder"
+    assert calls.count("spec") == calls.count("architecture") == calls.count("diagram") == 1
+    assert calls.count("rtl") == 2
+    assert checkpoint.failed is None
+
+
+def test_discard_cancels_adopted_work():
+    """Abandoning the turn cancels work held for a retry."""
+    calls = []
+    checkpoint = StageCheckpoint()
+
+    async def turn():
+        with pytest.raises(StageError):
+            await _build(calls, fail_rtl=True).run(checkpoint=checkpoint)
+        work = checkpoint.inflight["diagram"]
+        checkpoint.discard()
+        await asyncio.sleep(0)
+        return work
+
+    work = asyncio.run(turn())
+    assert work.cancelled()
+    assert checkpoint.inflight == {}
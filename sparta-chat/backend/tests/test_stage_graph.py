@@ -0,0 +1,92 @@
+"""Test the stage DAG executor."""
+import asyncio
+import time
+
+import pytest
+
+from utils.stage_graph import ResourceLimits, StageError, StageGraph
+
+
+def _graph():
+    return StageGraph(ResourceLimits({"default": 8}))
+
+
+def test_independent_stages_overlap_and_receive_inputs():
+    """Stages start as soon as their own inputs exist."""
+    async def source():
+        return 2
+
+    async def slow_double(source):
+        await asyncio.sleep(0.1)
+        return source * 2
+
+    async def slow_square(source):
+        await asyncio.sleep(0.1)
+        return source ** 2
+
+    async def total(slow_double, slow_square):
+        return slow_double + slow_square
+
+    graph = _graph()
+    graph.add("source", source)
+    graph.add("slow_double", slow_double, ("source",))
+    graph.add("slow_square", slow_square, ("source",))
+    graph.add("total", total, ("slow_double", "slow_square"))
+
+    started = time.perf_counter()
+    results = asyncio.run(graph.run())
+    assert results["total"] == 8
+    assert time.perf_counter() - started < 0.18
+
+
+def test_optional_failure_yields_none():
+    """A failing optional stage hands None to its dependents."""
+    async def render():
+        raise RuntimeError("no matplotlib")
+
+    async def page(render):
+        return {"image": render}
+
+    graph = _graph()
+    graph.add("render", render, optional=True)
+    graph.add("page", page, ("render",))
+    assert asyncio.run(graph.run())["page"] == {"image": None}
+
+
+def test_required_failure_raises_stage_error():
+    """A failing required stage cancels the run and names itself."""
+    cancelled = []
+
+    async def bad():
+        raise ValueError("boom")
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    graph = _graph()
+    graph.add("bad", bad)
+    graph.add("slow", slow)
+    with pytest.raises(StageError) as exc:
+        asyncio.run(graph.run())
+    assert exc.value.stage == "bad"
+    assert isinstance(exc.value.error, ValueError)
+    assert cancelled == [True]
+
+
+def test_rejects_cycles_and_unknown_inputs():
+    """Graph shape errors are reported before anything runs."""
+    async def stage(**_):
+        return None
+
+    cyclic = _graph().add("a", stage, ("b",)).add("b", stage, ("a",))
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(cyclic.run())
+
+    dangling = _graph().add("a", stage, ("missing",))
+    with pytest.raises(ValueError, match="unknown input"):
+        asyncio.run(dangling.run())
+    assert asyncio.run(dangling.run({"missing": 1}))["a"] is None
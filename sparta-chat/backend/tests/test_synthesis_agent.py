@@ -0,0 +1,41 @@
+"""Test SynthesisAgent caching."""
+import asyncio
+
+from agents.synthesis_agent import SynthesisAgent
+from utils.fsm_encoding import MAX_FSM_STATES
+from utils.synthesis_cache import cache_key
+
+
+def _agent(monkeypatch, service_result):
+    agent = SynthesisAgent()
+
+    async def call(request, fallback):
+        return fallback() if service_result is None else service_result
+
+    monkeypatch.setattr(agent.breaker, "call", call)
+    return agent
+
+
+def test_inline_fallback_is_not_cached(monkeypatch):
+    """A degraded inline estimate must not outlive the outage."""
+    agent = _agent(monkeypatch, None)
+    spec = {"component": "adder", "bit_width": 8}
+    result = asyncio.run(agent.synthesize(spec))
+    assert result["type"] == "ripple_carry_adder"
+    assert agent.cache.get(cache_key(spec, {})) is None
+
+
+def test_service_result_is_cached(monkeypatch):
+    """Answers from the service are memoized."""
+    agent = _agent(monkeypatch, {"type": "from_service"})
+    spec = {"component": "alu", "bit_width": 16}
+    asyncio.run(agent.synthesize(spec))
+    assert agent.cache.get(cache_key(spec, {})) == {"type": "from_service"}
+
+
+def test_inline_fallback_rejects_oversized_fsm(monkeypatch):
+    """The fallback reports an error instead of searching a huge FSM."""
+    agent = _agent(monkeypatch, None)
+    spec = {"component": "fsm", "states": [f"S{i}" for i in range(MAX_FSM_STATES + 1)]}
+    result = asyncio.run(agent.synthesize(spec))
+    assert "error" in result
@@ -0,0 +1,125 @@
+"""Test span trees and the metrics exposition."""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from utils.tracing import JSONLExporter, Tracer
+
+
+def test_nested_spans_share_trace_and_link_parents():
+    """A span opened inside another is its child in the same trace."""
+    tracer = Tracer()
+    with tracer.span("chat", session="s1") as root:
+        with tracer.span("rtl") as child:
+            assert tracer.current() is child
+        assert tracer.current() is root
+    assert tracer.current() is None
+
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert root.parent_id is None
+    assert [s["name"] for s in tracer.ring.recent(trace_id=root.trace_id)] == ["rtl", "chat"]
+
+
+def test_context_follows_tasks_created_inside_a_span():
+    """Tasks started under a span parent their spans to it."""
+    tracer = Tracer()
+
+    async def stage(name):
+        with tracer.span(name) as span:
+            await asyncio.sleep(0)
+            return span
+
+    async def scenario():
+        with tracer.span("pipeline") as root:
+            children = await asyncio.gather(stage("a"), stage("b"))
+        return root, children
+
+    root, children = asyncio.run(scenario())
+    assert {c.parent_id for c in children} == {root.span_id}
+
+
+def test_errors_are_recorded_and_reraised():
+    """A failing span is marked, counted and still propagates the exception."""
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("synthesis") as span:
+            raise ValueError("bad spec")
+    assert span.status == "error"
+    assert span.error == "ValueError: bad spec"
+    assert tracer.errors["synthesis"] == 1
+    assert tracer.inflight["synthesis"] == 0
+
+
+def test_metrics_exposition():
+    """Histogram buckets, error counters and collector gauges render in Prometheus text format."""
+    tracer = Tracer()
+    with tracer.span("rtl"):
+        pass
+    tracer.register_collector(lambda: [("sparta_queue_depth", "Queued requests", {"priority": "high"}, 3)])
+    text = tracer.render_metrics()
+
+    assert 'sparta_span_duration_seconds_bucket{span="rtl",le="0.005"} 1' in text
+    assert 'sparta_span_duration_seconds_bucket{span="rtl",le="+Inf"} 1' in text
+    assert 'sparta_span_duration_seconds_count{span="rtl"} 1' in text
+    assert 'sparta_inflight{span="rtl"} 0' in text
+    assert "# TYPE sparta_queue_depth gauge" in text
+    assert 'sparta_queue_depth{priority="high"} 3.0' in text
+
+
+def test_failing_collector_does_not_break_metrics():
+    """A collector that raises is skipped."""
+    tracer = Tracer()
+
+    def broken():
+        raise RuntimeError("db gone")
+
+    tracer.register_collector(broken)
+    assert "sparta_span_duration_seconds" in tracer.render_metrics()
+
+
+def test_jsonl_exporter_appends_finished_spans(tmp_path):
+    """Each finished span becomes one JSON line."""
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer([JSONLExporter(str(path))])
+    with tracer.span("chat"):
+        with tracer.span("rtl", component="adder"):
+            pass
+    tracer.close()
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in rows] == ["rtl", "chat"]
+    assert rows[0]["attributes"] == {"component": "adder"}
+
+
+def test_jsonl_exporter_never_blocks_the_caller(tmp_path, monkeypatch):
+    """Spans are queued while the writer is stuck, and dropped once the queue is full."""
+    path = tmp_path / "spans.jsonl"
+    exporter = JSONLExporter(str(path), max_queue=3, flush_interval=0.01)
+    writing = threading.Event()
+    release = threading.Event()
+    real_dumps = json.dumps
+
+    def slow_dumps(*args, **kwargs):
+        writing.set()
+        release.wait()
+        return real_dumps(*args, **kwargs)
+
+    monkeypatch.setattr("utils.tracing.json.dumps", slow_dumps)
+    tracer = Tracer([exporter])
+    with tracer.span("first"):
+        pass
+    assert writing.wait(5)  # the writer holds "first" and is stuck
+
+    for i in range(5):
+        with tracer.span(f"queued-{i}"):
+            pass
+    assert exporter.dropped == 2
+    assert not path.exists()
+
+    release.set()
+    exporter.flush()
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert names == ["first", "queued-0", "queued-1", "queued-2"]
+    exporter.close()
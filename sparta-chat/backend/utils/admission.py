@@ -0,0 +1,192 @@
+"""Admission Control - bounded pipeline concurrency with a TaskPriority-ordered wait queue"""
+import asyncio
+import heapq
+import hmac
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from utils.tracing import tracer
+
+
+class TaskPriority(str, Enum):
+    """Queue priority levels (same values as the platform's shared TaskPriority)"""
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+    URGENT = "urgent"
+
+
+# Higher rank is admitted first
+PRIORITY_RANK = {
+    TaskPriority.LOW: 0,
+    TaskPriority.MEDIUM: 1,
+    TaskPriority.HIGH: 2,
+    TaskPriority.URGENT: 3,
+}
+
+
+# Callers presenting this key may choose their own priority; everyone else gets MEDIUM
+PRIORITY_KEY = os.getenv("CHAT_PRIORITY_KEY", "")
+
+
+def resolve_priority(
+    requested: TaskPriority,
+    credential: Optional[str],
+    key: Optional[str] = None
+) -> TaskPriority:
+    """
+    Priority the server grants a request. The client's field is honoured only
+    with the right credential; anyone else could simply send "urgent" and jump
+    the queue.
+    """
+    key = PRIORITY_KEY if key is None else key
+    if key and credential and hmac.compare_digest(credential.encode(), key.encode()):
+        return requested
+    return TaskPriority.MEDIUM
+
+
+class AdmissionRejected(Exception):
+    """Request refused under load; status_code is 429 (queue full) or 503 (queued too long)"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, priority: TaskPriority, future: asyncio.Future):
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """
+    At most max_concurrent pipelines run at once. Further requests wait in a
+    priority queue (highest TaskPriority first, FIFO within a level) of at most
+    max_queue entries. A full queue rejects at once unless the newcomer outranks
+    the lowest queued request, which is then bumped instead. Waiting longer than
+    queue_timeout is a 503. Rejections carry a Retry-After estimated from recent
+    pipeline durations.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.max_concurrent = max_concurrent or int(os.getenv("CHAT_MAX_CONCURRENT", "4"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("CHAT_MAX_QUEUE", "16"))
+        self.queue_timeout = queue_timeout or float(os.getenv("CHAT_QUEUE_TIMEOUT", "30"))
+        self.running = 0
+        self._queue: List[Any] = []  # heap of (-rank, seq, waiter)
+        self._seq = itertools.count()
+        self._avg_service = 5.0  # seconds, exponentially weighted
+        self.stats = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0, "bumped": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waited = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for _, _, w in self._queue if not w.future.done())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = self.depth + self.running
+        return max(1, math.ceil(self._avg_service * backlog / self.max_concurrent))
+
+    def _lowest_queued(self) -> Optional[_Waiter]:
+        live = [entry for entry in self._queue if not entry[2].future.done()]
+        return max(live)[2] if live else None
+
+    def check(self, priority: TaskPriority = TaskPriority.MEDIUM):
+        """Raise AdmissionRejected now if a request at this priority would be turned away"""
+        if self.running < self.max_concurrent or self.depth < self.max_queue:
+            return
+        lowest = self._lowest_queued()
+        if lowest is None or PRIORITY_RANK[priority] <= PRIORITY_RANK[lowest.priority]:
+            self.stats["rejected_full"] += 1
+            raise AdmissionRejected("Chat queue is full", 429, self.retry_after())
+
+    async def _acquire(self, priority: TaskPriority):
+        if self.running < self.max_concurrent and self.depth == 0:
+            self.running += 1
+            self.stats["admitted"] += 1
+            return
+        self.check(priority)
+        if self.depth >= self.max_queue:
+            # Newcomer outranks the lowest queued request: bump that one instead
+            victim = self._lowest_queued()
+            victim.future.set_exception(AdmissionRejected("Displaced by higher-priority work", 429, self.retry_after()))
+            self.stats["bumped"] += 1
+        waiter = _Waiter(priority, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (-PRIORITY_RANK[priority], next(self._seq), waiter))
+        self.stats["queued"] += 1
+        try:
+            with tracer.span("admission.wait", priority=priority.value, depth=self.depth):
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if self._granted(waiter):
+                # The slot was handed over just as the caller gave up
+                self._release()
+            waiter.future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["rejected_timeout"] += 1
+            raise AdmissionRejected("Timed out waiting for a chat slot", 503, self.retry_after())
+        finally:
+            waited = time.monotonic() - waiter.enqueued_at
+            self._waited += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        self.stats["admitted"] += 1
+
+    @staticmethod
+    def _granted(waiter: _Waiter) -> bool:
+        future = waiter.future
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def _release(self):
+        # Hand the slot straight to the best live waiter, or free it
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: TaskPriority = TaskPriority.MEDIUM):
+        """Hold one pipeline slot for the duration of the block"""
+        await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_service = 0.8 * self._avg_service + 0.2 * (time.monotonic() - started)
+            self._release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        by_priority: Dict[str, int] = {}
+        for _, _, waiter in self._queue:
+            if not waiter.future.done():
+                by_priority[waiter.priority.value] = by_priority.get(waiter.priority.value, 0) + 1
+        return {
+            **self.stats,
+            "running": self.running,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self.depth,
+            "queue_by_priority": by_priority,
+            "max_queue": self.max_queue,
+            "avg_queue_wait_ms": round(self._wait_total / self._waited * 1000.0, 1) if self._waited else 0.0,
+            "max_queue_wait_ms": round(self._wait_max * 1000.0, 1),
+            "avg_pipeline_seconds": round(self._avg_service, 2),
+        }
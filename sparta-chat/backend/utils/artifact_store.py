@@ -0,0 +1,87 @@
+"""Artifact Store - rendered images stored once under their content hash and served by URL"""
+import asyncio
+import base64
+import hashlib
+import os
+import re
+from typing import Optional
+
+
+URL_PREFIX = "/artifacts/"
+
+_NAME_RE = re.compile(r"^([0-9a-f]{32})\.(png|svg)$")
+
+MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+class ArtifactStore:
+    """
+    Content-addressed files: the name is a hash of the bytes, so a URL never
+    changes meaning. That makes it safe to cache forever and lets the digest
+    double as a strong ETag. Identical renders share one file.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("ARTIFACT_DIR", "static/artifacts")
+
+    def put(self, data: bytes, ext: str = "png") -> str:
+        """Store bytes (no-op if already present); returns the artifact URL"""
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        name = f"{digest}.{ext}"
+        path = os.path.join(self.root, name)
+        if not os.path.exists(path):
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return URL_PREFIX + name
+
+    async def save(self, data: bytes, ext: str = "png") -> str:
+        """put() off the event loop"""
+        return await asyncio.to_thread(self.put, data, ext)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Filesystem path for an artifact file name, or None if invalid or missing"""
+        if not _NAME_RE.match(name):
+            return None
+        path = os.path.join(self.root, name)
+        return path if os.path.exists(path) else None
+
+    def path_for_url(self, url: Optional[str]) -> Optional[str]:
+        """Filesystem path an artifact URL points at (None for anything else)"""
+        if not url or not url.startswith(URL_PREFIX):
+            return None
+        return os.path.join(self.root, url[len(URL_PREFIX):])
+
+    def inline(self, url: Optional[str]) -> Optional[str]:
+        """data: URI for an artifact URL; other values pass through unchanged"""
+        path = self.path_for_url(url)
+        if path is None or not os.path.exists(path):
+            return url
+        ext = path.rsplit(".", 1)[-1]
+        with open(path, "rb") as f:
+            encoded = base64.b64encode(f.read()).decode("utf-8")
+        return f"data:{MEDIA_TYPES.get(ext, 'application/octet-stream')};base64,{encoded}"
+
+    @staticmethod
+    def etag(name: str) -> str:
+        return f'"{name.split(".", 1)[0]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+artifact_store = ArtifactStore()
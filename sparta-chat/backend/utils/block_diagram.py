@@ -1,19 +1,45 @@
 """Block Diagram Generator - Creates visual diagrams from RTL/architecture"""
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import base64
 from io import BytesIO
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+
+from utils.artifact_store import artifact_store
+from utils.render_pool import RENDER_WAIT_TIMEOUT, RenderJob, RenderQueueFull, render_pool
+from utils.startup import lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
+patches = lazy_import("matplotlib.patches")
 
 
 class BlockDiagramGenerator:
     """Generate visual block diagrams for hardware designs"""
     
-    async def generate_diagram(self, architecture: Dict[str, Any], parsed_spec: Dict[str, Any]) -> str:
+    async def generate_diagram(
+        self,
+        architecture: Dict[str, Any],
+        parsed_spec: Dict[str, Any],
+        inline: bool = False
+    ) -> Optional[str]:
         """
         Create block diagram showing component connections
-        Returns base64 encoded image
+        Rendered in the render pool; returns the artifact URL (or a base64 data URI when inline),
+        or None when the pool stays saturated past RENDER_WAIT_TIMEOUT
         """
+        try:
+            png = await render_pool.render(
+                RenderJob("utils.block_diagram:render_block_diagram_png", (architecture, parsed_spec)),
+                wait_timeout=RENDER_WAIT_TIMEOUT,
+            )
+        except RenderQueueFull as e:
+            print(f"⚠️ Block diagram skipped: {e}")
+            return None
+        if inline:
+            image_base64 = base64.b64encode(png).decode('utf-8')
+            return f"data:image/png;base64,{image_base64}"
+        return await artifact_store.save(png)
+    
+    def render_png(self, architecture: Dict[str, Any], parsed_spec: Dict[str, Any]) -> bytes:
+        """Synchronous matplotlib render of the block diagram"""
         component_type = parsed_spec.get("component", "generic")
         
         fig, ax = plt.subplots(figsize=(12, 8))
@@ -37,9 +63,7 @@ class BlockDiagramGenerator:
         plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', facecolor='white')
         plt.close()
         
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        return f"data:image/png;base64,{image_base64}"
+        return buffer.getvalue()
     
     def _draw_alu_diagram(self, ax):
         """Draw ALU block diagram"""
@@ -202,3 +226,8 @@ class BlockDiagramGenerator:
             if i < len(components) - 1:
                 ax.arrow(5, y - 0.5, 0, -y_spacing + 0.6, head_width=0.3, head_length=0.2, 
                         fc='black', ec='black')
+
+
+def render_block_diagram_png(architecture: Dict[str, Any], parsed_spec: Dict[str, Any]) -> bytes:
+    """Render-pool entry point (module level so the job pickles by name)"""
+    return BlockDiagramGenerator().render_png(architecture, parsed_spec)
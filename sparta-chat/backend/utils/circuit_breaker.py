@@ -0,0 +1,174 @@
+"""Circuit Breakers - per-service health tracking so dead microservices fall back instantly"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from utils.http_clients import http_clients
+from utils.tracing import tracer
+
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_service_failure(error: Exception) -> bool:
+    """Transport errors and 5xx count against the service; a 4xx is the caller's fault"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return True
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and consecutive failures are counted.
+    Open: calls fall back immediately until the reset timeout passes or a
+    health probe succeeds.
+    Half-open: a single trial call decides between closed and open.
+    """
+
+    def __init__(self, name: str, url: str, failure_threshold: int = 2, reset_timeout: float = 30.0):
+        self.name = name
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.last_error: Optional[str] = None
+        self.last_probe: Optional[float] = None
+        self.stats = {"calls": 0, "failures": 0, "short_circuits": 0}
+
+    def allow_request(self) -> bool:
+        """Whether a real call may be attempted now"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self.trial_in_flight = False
+        if self.state == HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+        self.last_error = None
+
+    def record_failure(self, error: Exception):
+        self.failures += 1
+        self.stats["failures"] += 1
+        self.last_error = f"{type(error).__name__}: {error}"[:200]
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, request: Callable[[], Awaitable[T]], fallback: Callable[[], T]) -> T:
+        """Run request through the breaker, using fallback when open or on failure"""
+        with tracer.span(f"service.{self.name}") as span:
+            if not self.allow_request():
+                self.stats["short_circuits"] += 1
+                span.set(outcome="short_circuit")
+                return fallback()
+            self.stats["calls"] += 1
+            trial = self.state == HALF_OPEN
+            try:
+                result = await request()
+            except Exception as e:
+                if is_service_failure(e):
+                    self.record_failure(e)
+                span.set(outcome="fallback", error=f"{type(e).__name__}: {e}"[:200])
+                return fallback()
+            finally:
+                # Also on cancellation, or the breaker would stay half-open
+                # with no trial ever allowed again
+                if trial:
+                    self.trial_in_flight = False
+            self.record_success()
+            span.set(outcome="ok")
+            return result
+
+    async def probe(self, client: httpx.AsyncClient):
+        """GET /health; success closes the breaker, failure counts like a failed call"""
+        self.last_probe = time.time()
+        try:
+            response = await client.get(f"{self.url}/health")
+            response.raise_for_status()
+        except Exception as e:
+            if self.state == OPEN:
+                # Still down: keep real traffic off it for another reset period
+                self.opened_at = time.monotonic()
+                self.last_error = f"{type(e).__name__}: {e}"[:200]
+            else:
+                self.record_failure(e)
+            return
+        self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            **self.stats,
+        }
+
+
+class BreakerRegistry:
+    """One breaker per service plus the background health prober"""
+
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.probe_interval = float(os.getenv("BREAKER_PROBE_INTERVAL", "15"))
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, url: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(
+                name,
+                url,
+                failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "2")),
+                reset_timeout=float(os.getenv("BREAKER_RESET_TIMEOUT", "30")),
+            )
+        return self.breakers[name]
+
+    async def probe_all(self, client: httpx.AsyncClient):
+        await asyncio.gather(*(b.probe(client) for b in self.breakers.values()))
+
+    async def _probe_loop(self):
+        client = http_clients.get("health-probe")
+        while True:
+            await self.probe_all(client)
+            await asyncio.sleep(self.probe_interval)
+
+    def start(self):
+        """Begin background health probing (call from the startup hook)"""
+        if self._task is None and self.probe_interval > 0:
+            self._task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def states(self) -> Dict[str, str]:
+        """Compact name -> state view for chat metadata"""
+        return {name: b.state for name, b in self.breakers.items()}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: b.snapshot() for name, b in self.breakers.items()}
+
+
+breakers = BreakerRegistry()
@@ -1,27 +1,37 @@
 """Code highlighting and formatting utilities"""
-from pygments import highlight
-from pygments.lexers import VerilogLexer, PythonLexer, get_lexer_by_name
-from pygments.formatters import HtmlFormatter
 from typing import Dict, Any
 
+from utils.startup import lazy_import
+
+pygments = lazy_import("pygments")
+lexers = lazy_import("pygments.lexers")
+formatters = lazy_import("pygments.formatters")
+
 
 class CodeHighlighter:
     """Syntax highlighting for RTL code"""
     
     def __init__(self):
-        self.verilog_lexer = VerilogLexer()
+        # Lexers and formatter are built on first use, not at import
+        self.formatter = None
+    
+    def _load(self):
+        if self.formatter is not None:
+            return
+        self.verilog_lexer = lexers.VerilogLexer()
         try:
-            self.vhdl_lexer = get_lexer_by_name('vhdl')
+            self.vhdl_lexer = lexers.get_lexer_by_name('vhdl')
         except:
-            self.vhdl_lexer = VerilogLexer()  # Fallback
-        self.python_lexer = PythonLexer()
-        self.formatter = HtmlFormatter(style='monokai', noclasses=True, linenos=True)
+            self.vhdl_lexer = lexers.VerilogLexer()  # Fallback
+        self.python_lexer = lexers.PythonLexer()
+        self.formatter = formatters.HtmlFormatter(style='monokai', noclasses=True, linenos=True)
     
     def highlight_rtl(self, code: str, language: str = "verilog") -> str:
         """
         Apply syntax highlighting to RTL code
         Returns HTML with highlighted code
         """
+        self._load()
         if language.lower() in ["verilog", "systemverilog", "sv"]:
             lexer = self.verilog_lexer
         elif language.lower() == "vhdl":
@@ -31,7 +41,7 @@ class CodeHighlighter:
         else:
             lexer = self.verilog_lexer  # Default
         
-        highlighted = highlight(code, lexer, self.formatter)
+        highlighted = pygments.highlight(code, lexer, self.formatter)
         
         return f"""
 <div style="background-color: #272822; padding: 10px; border-radius: 5px; overflow-x: auto;">
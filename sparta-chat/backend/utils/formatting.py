@@ -1,10 +1,15 @@
 """Response formatting utilities"""
 from typing import Dict, Any, Optional
-import matplotlib.pyplot as plt
 import os
 import base64
 from io import BytesIO
 
+from utils.artifact_store import artifact_store
+from utils.render_pool import RENDER_WAIT_TIMEOUT, RenderJob, RenderQueueFull, render_pool
+from utils.startup import lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
+
 
 def format_response(
     parsed_spec: Dict[str, Any],
@@ -151,11 +156,28 @@ I've successfully created your **{component}** design! Here's what I built:
     return response
 
 
-async def create_visualization(waveform_data: str, session_id: str) -> str:
+async def create_visualization(waveform_data: str, session_id: str, inline: bool = False) -> Optional[str]:
     """
     Create enhanced visualization with timing diagram and component diagram
-    Returns base64 encoded image string
+    Rendered in the render pool; returns the artifact URL (or a base64 data URI when inline),
+    or None when the pool stays saturated past RENDER_WAIT_TIMEOUT
     """
+    try:
+        png = await render_pool.render(
+            RenderJob("utils.formatting:render_visualization_png", (waveform_data,)),
+            wait_timeout=RENDER_WAIT_TIMEOUT,
+        )
+    except RenderQueueFull as e:
+        print(f"⚠️ Visualization skipped: {e}")
+        return None
+    if inline:
+        image_base64 = base64.b64encode(png).decode('utf-8')
+        return f"data:image/png;base64,{image_base64}"
+    return await artifact_store.save(png)
+
+
+def render_visualization_png(waveform_data: str) -> bytes:
+    """Synchronous matplotlib render of the waveform/utilization figure (runs in a render worker)"""
     # Create figure with subplots for waveform and component view
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 6), height_ratios=[2, 1])
     
@@ -205,7 +227,4 @@ async def create_visualization(waveform_data: str, session_id: str) -> str:
     plt.savefig(buffer, format='png', dpi=120, bbox_inches='tight', facecolor='white')
     plt.close()
     
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    
-    return f"data:image/png;base64,{image_base64}"
+    return buffer.getvalue()
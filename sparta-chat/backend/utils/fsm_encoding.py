@@ -0,0 +1,212 @@
+"""FSM state-assignment search - picks binary/Gray/one-hot/min-distance encodings per goal"""
+import math
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+
+# Relative weights for the next-state logic cost model
+FLIP_FLOP_COST = 4.0
+LITERAL_COST = 1.0
+
+# Largest FSM the search accepts: it builds n x n adjacency matrices and one-hot
+# needs n flip-flops, so bigger specs are rejected up front
+MAX_FSM_STATES = 256
+
+
+@lru_cache(maxsize=None)
+def _popcount16() -> np.ndarray:
+    """Popcount lookup for 16-bit chunks; built on first use"""
+    return np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.int32)
+
+
+def default_transitions(states: List[str]) -> List[Tuple[str, str]]:
+    """Sequential ring (S0 -> S1 -> ... -> S0) with a hold self-loop on every state"""
+    transitions = []
+    for i, state in enumerate(states):
+        transitions.append((state, state))
+        if len(states) > 1:
+            transitions.append((state, states[(i + 1) % len(states)]))
+    return transitions
+
+
+def _normalize_transitions(states: List[str], transitions: Optional[List[Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Map (src, dst) pairs or {"from", "to"} dicts onto state indices"""
+    index = {s: i for i, s in enumerate(states)}
+    pairs = transitions if transitions else default_transitions(states)
+    src, dst = [], []
+    for t in pairs:
+        a, b = (t.get("from"), t.get("to")) if isinstance(t, dict) else (t[0], t[1])
+        if a in index and b in index:
+            src.append(index[a])
+            dst.append(index[b])
+    return np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Vectorized popcount of non-negative codes, 16 bits at a time"""
+    table = _popcount16()
+    counts = table[values & 0xFFFF]
+    values = values >> 16
+    while values.any():
+        counts = counts + table[values & 0xFFFF]
+        values = values >> 16
+    return counts
+
+
+def binary_codes(n: int) -> np.ndarray:
+    """Sequential codes 0..n-1"""
+    return np.arange(n, dtype=np.int64)
+
+
+def gray_codes(n: int) -> np.ndarray:
+    """Reflected Gray codes in state order"""
+    codes = np.arange(n, dtype=np.int64)
+    return codes ^ (codes >> 1)
+
+
+def min_distance_codes(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Greedy adjacency-driven assignment: states visited in BFS order from the reset
+    state take the free code with the least weighted Hamming distance to their
+    already-placed neighbours.
+    """
+    width = max(1, math.ceil(math.log2(n))) if n > 1 else 1
+    weights = np.zeros((n, n), dtype=np.int64)
+    mask = src != dst
+    np.add.at(weights, (src[mask], dst[mask]), 1)
+    weights = weights + weights.T
+
+    candidates = np.arange(1 << width, dtype=np.int64)
+    free = np.ones(candidates.size, dtype=bool)
+    codes = np.full(n, -1, dtype=np.int64)
+
+    order: List[int] = []
+    seen = np.zeros(n, dtype=bool)
+    for root in range(n):
+        if seen[root]:
+            continue
+        queue = [root]
+        seen[root] = True
+        while queue:
+            node = queue.pop(0)
+            order.append(node)
+            for nbr in np.nonzero(weights[node])[0]:
+                if not seen[nbr]:
+                    seen[nbr] = True
+                    queue.append(int(nbr))
+
+    for node in order:
+        placed = np.nonzero((weights[node] > 0) & (codes >= 0))[0]
+        if placed.size:
+            # cost[c] = sum_k w_k * popcount(c ^ code_k) over every free candidate at once
+            dist = _popcount(candidates[:, None] ^ codes[placed][None, :])
+            cost = dist @ weights[node, placed]
+            cost = np.where(free, cost, np.iinfo(np.int64).max)
+            choice = int(np.argmin(cost))
+        else:
+            choice = int(np.argmax(free))
+        codes[node] = candidates[choice]
+        free[choice] = False
+    return codes
+
+
+def evaluate_encoding(name: str, codes: Optional[np.ndarray], n: int, src: np.ndarray, dst: np.ndarray) -> Dict[str, Any]:
+    """
+    Cost of the next-state logic for one encoding.
+
+    Each next-state bit is a sum of products with one term per source state that
+    can move into a code with that bit set. A term decodes its source with `width`
+    literals (one for one-hot) plus a condition literal per transition; source
+    codes at Hamming distance 1 merge pairwise and drop a literal. Area counts
+    flip-flops and literals, speed is the logic depth of the widest bit and power
+    is the number of state-bit toggles summed over transitions.
+    """
+    moving = src != dst
+    if name == "one_hot":
+        width = n
+        # bit j <- OR of (src bit & condition) for every transition into j
+        fan_in = 2 * np.bincount(dst, minlength=n)
+        toggles = int(2 * np.count_nonzero(moving))
+    else:
+        width = max(1, int(codes.max()).bit_length()) if n > 1 else 1
+        bits = ((codes[:, None] >> np.arange(width)) & 1).astype(bool)
+
+        # on[s, j]: source state s has a transition into a code with bit j set
+        on = np.zeros((n, width), dtype=bool)
+        np.logical_or.at(on, src, bits[dst])
+        sources = on.sum(axis=0)
+
+        # Adjacent (distance-1) ON sources combine into a single shorter term
+        adjacent = (_popcount(codes[:, None] ^ codes[None, :]) == 1).astype(np.int64)
+        on_i = on.T.astype(np.int64)
+        edges = ((on_i @ adjacent) * on_i).sum(axis=1) // 2
+        merges = np.minimum(edges, sources // 2)
+
+        conditions = np.bincount(dst, minlength=n)[:, None] * bits
+        fan_in = sources * width - merges * (width + 1) + conditions.sum(axis=0)
+        toggles = int(_popcount(codes[src] ^ codes[dst]).sum())
+
+    logic_literals = int(fan_in.sum())
+    depth = int(np.ceil(np.log2(fan_in.max() + 1))) if fan_in.size else 0
+    return {
+        "encoding": name,
+        "width": int(width),
+        "flip_flops": int(width),
+        "logic_literals": logic_literals,
+        "logic_depth": depth,
+        "toggles": toggles,
+        "area_cost": round(width * FLIP_FLOP_COST + logic_literals * LITERAL_COST, 2),
+    }
+
+
+def optimize_fsm_encoding(
+    states: List[str],
+    transitions: Optional[List[Any]] = None,
+    goal: str = "area",
+) -> Dict[str, Any]:
+    """
+    Evaluate every candidate encoding for an FSM and pick the best for the goal.
+
+    goal: "area" (fewest flip-flops + literals), "speed" (shallowest next-state
+    logic) or "power" (fewest state-bit toggles). Raises ValueError for an FSM
+    with no states or more than MAX_FSM_STATES states
+    """
+    n = len(states)
+    if n == 0:
+        raise ValueError("FSM has no states")
+    if n > MAX_FSM_STATES:
+        raise ValueError(f"FSM has {n} states; at most {MAX_FSM_STATES} are supported")
+    src, dst = _normalize_transitions(states, transitions)
+
+    candidates: Dict[str, Optional[np.ndarray]] = {
+        "binary": binary_codes(n),
+        "gray": gray_codes(n),
+        "min_distance": min_distance_codes(n, src, dst),
+        "one_hot": None,
+    }
+    evaluated = [evaluate_encoding(name, codes, n, src, dst) for name, codes in candidates.items()]
+
+    if goal == "speed":
+        key = lambda e: (e["logic_depth"], e["area_cost"])
+    elif goal == "power":
+        key = lambda e: (e["toggles"], e["area_cost"])
+    else:
+        key = lambda e: (e["area_cost"], e["logic_depth"])
+    best = min(evaluated, key=key)
+
+    name = best["encoding"]
+    if name == "one_hot":
+        codes = {s: 1 << i for i, s in enumerate(states)}
+    else:
+        codes = {s: int(c) for s, c in zip(states, candidates[name])}
+
+    return {
+        "encoding": name,
+        "goal": goal,
+        "width": best["width"],
+        "codes": codes,
+        "cost": best,
+        "candidates": evaluated,
+    }
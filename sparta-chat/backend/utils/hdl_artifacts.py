@@ -0,0 +1,148 @@
+"""HDL Artifacts - testbench and VCD stimulus derived from a generated module's port list"""
+import random
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from utils.spec_grammar import MAX_WIDTH
+
+
+class Port(NamedTuple):
+    direction: str
+    name: str
+    width: int
+
+
+_HEADER_RE = re.compile(r"module\s+(\w+)\s*(?:#\s*\(.*?\)\s*)?\((.*?)\)\s*;", re.S)
+_DECL_RE = re.compile(r"(input|output|inout)\b\s*(?:logic|wire|reg)?\s*(?:signed\s*)?(?:\[\s*(\d+)\s*:\s*(\d+)\s*\])?\s*(\w+)$")
+
+CLOCK_NAMES = ("clk", "clock")
+RESET_NAMES = ("rst_n", "reset_n", "rst", "reset")
+
+
+def parse_ports(code: str) -> Optional[tuple]:
+    """(module_name, [Port]) from an ANSI-style module header, or None"""
+    header = _HEADER_RE.search(code or "")
+    if header is None:
+        return None
+    ports: List[Port] = []
+    direction, width = None, 1
+    for token in header.group(2).split(","):
+        token = " ".join(token.split())
+        decl = _DECL_RE.match(token)
+        if decl:
+            direction = decl.group(1)
+            width = abs(int(decl.group(2)) - int(decl.group(3))) + 1 if decl.group(2) else 1
+            ports.append(Port(direction, decl.group(4), width))
+        elif direction and re.fullmatch(r"\w+", token):
+            # "input logic [7:0] a, b": later names inherit the declaration
+            ports.append(Port(direction, token, width))
+    return header.group(1), ports
+
+
+def _vcd_id(index: int) -> str:
+    """Unique VCD identifier in bijective base 94: "!".."~", then "!!".."~~", then three characters"""
+    ident = chr(33 + index % 94)
+    index //= 94
+    while index:
+        index -= 1
+        ident += chr(33 + index % 94)
+        index //= 94
+    return ident
+
+
+def _decl(width: int) -> str:
+    return f"[{width - 1}:0] " if width > 1 else ""
+
+
+def generate_testbench(code: str, cycles: int = 16) -> str:
+    """Self-running SystemVerilog testbench: clock/reset if present, random stimulus, VCD dump"""
+    parsed = parse_ports(code)
+    if parsed is None:
+        return "// No testbench available: module header not recognised"
+    module, ports = parsed
+    clock = next((p.name for p in ports if p.direction == "input" and p.name in CLOCK_NAMES), None)
+    reset = next((p.name for p in ports if p.direction == "input" and p.name in RESET_NAMES), None)
+    stimulus = [p for p in ports if p.direction == "input" and p.name not in (clock, reset)]
+
+    lines = ["`timescale 1ns/1ps", "", f"module tb_{module};"]
+    lines += [f"    logic {_decl(p.width)}{p.name};" for p in ports]
+    lines += ["", f"    {module} dut ("]
+    lines += [f"        .{p.name}({p.name}){',' if i < len(ports) - 1 else ''}" for i, p in enumerate(ports)]
+    lines += ["    );", ""]
+    if clock:
+        lines += [f"    initial {clock} = 0;", f"    always #5 {clock} = ~{clock};", ""]
+    lines += ["    initial begin", f'        $dumpfile("tb_{module}.vcd");', f"        $dumpvars(0, tb_{module});"]
+    if reset:
+        active = "0" if reset.endswith("_n") else "1"
+        lines += [f"        {reset} = {active};"]
+    lines += [f"        {p.name} = '0;" for p in stimulus]
+    if reset:
+        lines += ["        #20;", f"        {reset} = {'1' if active == '0' else '0'};"]
+    lines += [f"        repeat ({cycles}) begin"]
+    lines += [f"            {p.name} = $urandom;" for p in stimulus]
+    lines += [f"            @(posedge {clock});" if clock else "            #10;"]
+    outputs = [p.name for p in ports if p.direction == "output"]
+    if outputs:
+        fmt = " ".join(f"{name}=%0h" for name in outputs)
+        lines += [f'            $display("t=%0t {fmt}", $time, {", ".join(outputs)});']
+    lines += ["        end", "        $finish;", "    end", "endmodule", ""]
+    return "\n".join(lines)
+
+
+def generate_vcd(code: str, cycles: int = 16, seed: int = 0) -> str:
+    """
+    VCD of the testbench stimulus (clock, reset, inputs). Outputs are declared
+    but left unknown: they need a real simulator run. Ports wider than
+    MAX_WIDTH bits are not dumped: every value change would be that many characters
+    """
+    parsed = parse_ports(code)
+    if parsed is None:
+        return "$comment No waveform available: module header not recognised $end\n"
+    module, ports = parsed
+    too_wide = [p.name for p in ports if p.width > MAX_WIDTH]
+    if too_wide:
+        return f"$comment No waveform available: {', '.join(too_wide)} wider than {MAX_WIDTH} bits $end\n"
+    rng = random.Random(seed)
+    ids = {p.name: _vcd_id(i) for i, p in enumerate(ports)}
+    clock = next((p.name for p in ports if p.direction == "input" and p.name in CLOCK_NAMES), None)
+    reset = next((p.name for p in ports if p.direction == "input" and p.name in RESET_NAMES), None)
+
+    def value(port: Port, v) -> str:
+        if port.width == 1:
+            return f"{v}{ids[port.name]}"
+        bits = v if isinstance(v, str) else format(v, f"0{port.width}b")
+        return f"b{bits} {ids[port.name]}"
+
+    out = [
+        f"$date {datetime.utcnow().isoformat()} $end",
+        "$version SPARTA stimulus generator $end",
+        "$comment Stimulus only; outputs are x until simulated $end",
+        "$timescale 1ns $end",
+        f"$scope module tb_{module} $end",
+    ]
+    out += [f"$var wire {p.width} {ids[p.name]} {p.name} $end" for p in ports]
+    out += ["$upscope $end", "$enddefinitions $end", "#0", "$dumpvars"]
+    for p in ports:
+        if p.direction == "output":
+            out.append(value(p, "x" * p.width) if p.width > 1 else f"x{ids[p.name]}")
+        elif p.name == reset:
+            out.append(value(p, 0 if reset.endswith("_n") else 1))
+        else:
+            out.append(value(p, 0))
+    out.append("$end")
+    for cycle in range(cycles):
+        t = cycle * 10
+        out.append(f"#{t + 5}")
+        if clock:
+            out.append(value(next(p for p in ports if p.name == clock), 1))
+        out.append(f"#{t + 10}")
+        if clock:
+            out.append(value(next(p for p in ports if p.name == clock), 0))
+        if reset and t + 10 == 20:
+            # Released at 20ns, as in the testbench
+            out.append(value(next(p for p in ports if p.name == reset), 1 if reset.endswith("_n") else 0))
+        for p in ports:
+            if p.direction == "input" and p.name not in (clock, reset):
+                out.append(value(p, rng.getrandbits(p.width)))
+    return "\n".join(out) + "\n"
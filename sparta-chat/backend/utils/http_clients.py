@@ -0,0 +1,95 @@
+"""HTTP Client Registry - one pooled, keep-alive AsyncClient per service, shared by every agent"""
+import importlib.util
+import os
+import ssl
+from typing import Dict, Any, Optional
+
+import certifi
+import httpx
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+# Per-service settings: request timeout (s) and pool size. Service names match
+# the circuit breaker names; anything unlisted uses "default".
+SERVICE_CONFIG: Dict[str, Dict[str, Any]] = {
+    "default": {"timeout": 30.0, "max_connections": 20},
+    "nlp-agent": {"timeout": 10.0, "max_connections": 20},
+    "synthesis-agent": {"timeout": 30.0, "max_connections": 20},
+    "rtl-generator": {"timeout": 30.0, "max_connections": 20},
+    "emulator": {"timeout": 30.0, "max_connections": 20},
+    "health-probe": {"timeout": 2.0, "max_connections": 8},
+    "stable-diffusion": {"timeout": 60.0, "max_connections": 4},
+    "images": {"timeout": 30.0, "max_connections": 10, "follow_redirects": True},
+}
+
+
+class HTTPClientRegistry:
+    """
+    Lazily builds one AsyncClient per service name with its own connection pool,
+    so keep-alive connections are reused across chat turns instead of every agent
+    (or every call) opening fresh ones.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+        self.keepalive_expiry = _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+        self.connect_timeout = _env_float("HTTP_CONNECT_TIMEOUT", 3.0)
+        # HTTP/2 needs the optional h2 package
+        self.http2 = os.getenv("HTTP2", "0") == "1" and importlib.util.find_spec("h2") is not None
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def _ssl(self) -> ssl.SSLContext:
+        # Loading the CA bundle costs ~40ms; build it once and share it across every pool
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self._ssl_context
+
+    def _config(self, name: str) -> Dict[str, Any]:
+        config = dict(SERVICE_CONFIG["default"])
+        config.update(SERVICE_CONFIG.get(name, {}))
+        env_name = name.upper().replace("-", "_")
+        config["timeout"] = _env_float(f"{env_name}_TIMEOUT", config["timeout"])
+        return config
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Pooled client for a service, created on first use"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self._config(name)
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(config["timeout"], connect=min(self.connect_timeout, config["timeout"])),
+                limits=httpx.Limits(
+                    max_connections=config["max_connections"],
+                    max_keepalive_connections=min(self.max_keepalive, config["max_connections"]),
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                http2=self.http2,
+                verify=self._ssl(),
+                follow_redirects=config.get("follow_redirects", False),
+            )
+            self._clients[name] = client
+        return client
+
+    def start(self, names: Optional[list] = None):
+        """Create the clients up front (startup hook) so the first request doesn't pay for it"""
+        for name in names or [n for n in SERVICE_CONFIG if n != "default"]:
+            self.get(name)
+
+    async def aclose(self):
+        """Close every pool (shutdown hook)"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"timeout": client.timeout.read, "closed": client.is_closed}
+            for name, client in self._clients.items()
+        }
+
+
+http_clients = HTTPClientRegistry()
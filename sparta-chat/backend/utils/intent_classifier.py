@@ -0,0 +1,266 @@
+"""Intent Classifier - hashed n-gram naive Bayes trained offline from chat history"""
+import json
+import re
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+N_FEATURES = 1 << 14
+HEADS = ("intent", "component")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def ngrams(text: str) -> List[str]:
+    """Word unigrams, word bigrams and character trigrams of each word"""
+    words = _TOKEN_RE.findall(text.lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return grams
+
+
+@dataclass
+class HashedRows:
+    """
+    Sparse binary feature matrix: one (row, bucket) pair per set entry, so
+    memory grows with the n-grams in the batch rather than rows x n_features
+    """
+    row_ids: np.ndarray
+    cols: np.ndarray
+    n_rows: int
+    n_features: int
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def select(self, mask: np.ndarray) -> "HashedRows":
+        """Rows where mask is True, renumbered from 0"""
+        renumber = np.cumsum(mask) - 1
+        entries = mask[self.row_ids]
+        return HashedRows(renumber[self.row_ids[entries]], self.cols[entries], int(mask.sum()), self.n_features)
+
+    def matmul(self, weights: np.ndarray) -> np.ndarray:
+        """X @ weights.T for weights of shape (classes, n_features)"""
+        out = np.empty((self.n_rows, weights.shape[0]), dtype=np.float32)
+        for j, w in enumerate(weights):
+            out[:, j] = np.bincount(self.row_ids, weights=w[self.cols], minlength=self.n_rows)
+        return out
+
+    def class_counts(self, index: np.ndarray, n_classes: int) -> np.ndarray:
+        """Y.T @ X for one-hot labels Y: how many rows of each class set each feature"""
+        flat = index[self.row_ids] * self.n_features + self.cols
+        counts = np.bincount(flat, minlength=n_classes * self.n_features)
+        return counts.reshape(n_classes, self.n_features).astype(np.float32)
+
+    def toarray(self) -> np.ndarray:
+        dense = np.zeros((self.n_rows, self.n_features), dtype=np.float32)
+        dense[self.row_ids, self.cols] = 1.0
+        return dense
+
+
+def hash_features(texts: Sequence[str], n_features: int = N_FEATURES) -> HashedRows:
+    """Binary hashed n-gram rows, one per text (crc32 is stable across processes)"""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        buckets = {zlib.crc32(g.encode()) % n_features for g in ngrams(text)}
+        rows.extend([i] * len(buckets))
+        cols.extend(buckets)
+    return HashedRows(np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), len(texts), n_features)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+@dataclass
+class LinearHead:
+    """One label set scored as softmax((X @ W.T + b) / temperature)"""
+    labels: np.ndarray
+    weights: np.ndarray
+    bias: np.ndarray
+    temperature: float = 1.0
+
+    def logits(self, X: HashedRows) -> np.ndarray:
+        return X.matmul(self.weights) + self.bias
+
+    def probabilities(self, X: HashedRows) -> np.ndarray:
+        return _softmax(self.logits(X) / self.temperature)
+
+    @classmethod
+    def fit(cls, X: HashedRows, y: Sequence[str], alpha: float = 0.5) -> "LinearHead":
+        """Multinomial naive Bayes over binary features, then temperature calibration"""
+        labels, index = np.unique(np.asarray(y), return_inverse=True)
+        head = cls(labels, *_naive_bayes(X, index, len(labels), alpha))
+        head.temperature = _fit_temperature(X, index, len(labels), alpha)
+        return head
+
+
+def _naive_bayes(X: HashedRows, index: np.ndarray, n_classes: int, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+    counts = X.class_counts(index, n_classes) + alpha
+    weights = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+    prior = np.log((np.bincount(index, minlength=n_classes) + 1.0) / (len(index) + n_classes))
+    return weights.astype(np.float32), prior.astype(np.float32)
+
+
+def _fit_temperature(X: HashedRows, index: np.ndarray, n_classes: int, alpha: float, folds: int = 5) -> float:
+    """
+    Pick the temperature minimising held-out log loss. Naive Bayes is badly
+    overconfident, so raw probabilities would never trigger the rule fallback.
+    """
+    n = len(index)
+    if n < 2 * folds or n_classes < 2:
+        return 1.0
+
+    held_out = np.zeros((n, n_classes), dtype=np.float32)
+    fold_of = np.arange(n) % folds
+    for k in range(folds):
+        train, test = fold_of != k, fold_of == k
+        weights, bias = _naive_bayes(X.select(train), index[train], n_classes, alpha)
+        held_out[test] = X.select(test).matmul(weights) + bias
+
+    temperatures = np.logspace(-0.5, 2.5, 61)
+    losses = []
+    for t in temperatures:
+        probs = _softmax(held_out / t)
+        losses.append(-np.log(probs[np.arange(n), index] + 1e-12).mean())
+    return float(temperatures[int(np.argmin(losses))])
+
+
+class IntentClassifier:
+    """
+    Intent and component classifier; every head scores a whole batch with one
+    sparse product.
+
+    Training labels are whatever the running pipeline recorded for each reply
+    (plan intent, spec component), i.e. the output of the keyword rules or of
+    a previous model, not human-reviewed labels. The classifier therefore
+    reproduces their misroutes: it generalizes phrasing the rules never saw,
+    but a message the rules always routed wrong is learned wrong too. Fix
+    those rows in chat_history before training if that matters.
+    """
+
+    def __init__(self, heads: Dict[str, LinearHead], n_features: int = N_FEATURES):
+        self.heads = heads
+        self.n_features = n_features
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Dict[str, Sequence[Optional[str]]],
+        n_features: int = N_FEATURES,
+        alpha: float = 0.5
+    ) -> "IntentClassifier":
+        """Train one head per label set; rows with a missing (None) label are skipped for that head"""
+        X = hash_features(texts, n_features)
+        heads = {}
+        for name, y in labels.items():
+            keep = np.array([label is not None for label in y], dtype=bool)
+            if keep.sum() and len({label for label in y if label is not None}) > 1:
+                heads[name] = LinearHead.fit(X.select(keep), [label for label in y if label is not None], alpha)
+        if not heads:
+            raise ValueError("Need at least two distinct labels for some head to train")
+        return cls(heads, n_features)
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Dict[str, Dict[str, Any]]]:
+        """Per text: {head: {"label", "confidence"}}"""
+        if not texts:
+            return []
+        X = hash_features(texts, self.n_features)
+        results: List[Dict[str, Dict[str, Any]]] = [{} for _ in texts]
+        for name, head in self.heads.items():
+            probs = head.probabilities(X)
+            best = probs.argmax(axis=1)
+            for i, j in enumerate(best):
+                results[i][name] = {"label": str(head.labels[j]), "confidence": round(float(probs[i, j]), 4)}
+        return results
+
+    def predict(self, text: str) -> Dict[str, Dict[str, Any]]:
+        return self.predict_batch([text])[0]
+
+    def save(self, path: str):
+        """Compressed .npz; float32 weights keep a two-head model well under a megabyte"""
+        arrays = {"n_features": np.array(self.n_features)}
+        for name, head in self.heads.items():
+            arrays[f"{name}_labels"] = head.labels.astype(str)
+            arrays[f"{name}_weights"] = head.weights
+            arrays[f"{name}_bias"] = head.bias
+            arrays[f"{name}_temperature"] = np.array(head.temperature)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with np.load(path) as data:
+            heads = {
+                name: LinearHead(
+                    labels=data[f"{name}_labels"],
+                    weights=data[f"{name}_weights"],
+                    bias=data[f"{name}_bias"],
+                    temperature=float(data[f"{name}_temperature"]),
+                )
+                for name in HEADS if f"{name}_weights" in data.files
+            }
+            return cls(heads, int(data["n_features"]))
+
+
+def load_training_examples(db_path: str) -> Tuple[List[str], Dict[str, List[Optional[str]]]]:
+    """
+    Pair each user message in chat_history with the next assistant reply of the
+    same session and read its labels from the reply metadata (plan intent and
+    spec component, or "pcb" replies).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT session_id, role, message, metadata FROM chat_history ORDER BY session_id, id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    texts: List[str] = []
+    labels: Dict[str, List[Optional[str]]] = {name: [] for name in HEADS}
+    pending: Dict[str, str] = {}
+    for session_id, role, message, metadata in rows:
+        if role == "user":
+            pending[session_id] = message
+            continue
+        text = pending.pop(session_id, None)
+        if text is None or not metadata:
+            continue
+        meta = json.loads(metadata)
+        if meta.get("type") == "pcb":
+            intent, component = "pcb_design", None
+        elif "plan" in meta or "spec" in meta:
+            intent = (meta.get("plan") or {}).get("intent")
+            component = (meta.get("spec") or {}).get("component")
+        else:
+            continue
+        texts.append(text)
+        labels["intent"].append(intent)
+        labels["component"].append(component)
+    return texts, labels
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the intent/component classifier from chat history")
+    parser.add_argument("--db", default="backend/db/chat_history.db")
+    parser.add_argument("--out", default="backend/db/intent_model.npz")
+    parser.add_argument("--features", type=int, default=N_FEATURES)
+    args = parser.parse_args()
+
+    texts, labels = load_training_examples(args.db)
+    model = IntentClassifier.train(texts, labels, n_features=args.features)
+    model.save(args.out)
+    summary = {name: {"classes": len(head.labels), "temperature": round(head.temperature, 2)} for name, head in model.heads.items()}
+    print(f"✅ Trained on {len(texts)} messages -> {args.out} {summary}")
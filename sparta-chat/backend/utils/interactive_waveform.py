@@ -1,9 +1,12 @@
 """Interactive Waveform Generator using Plotly"""
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from typing import Dict, Any
 import json
 
+from utils.startup import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+subplots = lazy_import("plotly.subplots")
+
 
 class InteractiveWaveformGenerator:
     """Generate interactive waveforms with zoom/pan capabilities"""
@@ -14,7 +17,7 @@ class InteractiveWaveformGenerator:
         Returns HTML div string for embedding
         """
         # Create figure with subplots for multiple signals
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=5, cols=1,
             shared_xaxes=True,
             vertical_spacing=0.05,
@@ -98,7 +101,7 @@ class InteractiveWaveformGenerator:
     async def create_performance_chart(self, metrics: Dict[str, Any]) -> str:
         """Create interactive performance comparison chart"""
         
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=1, cols=2,
             subplot_titles=('Resource Utilization', 'Performance Metrics'),
             specs=[[{"type": "bar"}, {"type": "bar"}]]
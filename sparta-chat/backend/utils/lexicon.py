@@ -0,0 +1,179 @@
+"""Shared keyword lexicon - every classifier keyword set compiled into one Aho-Corasick automaton"""
+from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+
+# Category -> keywords. Matching is case-insensitive substring matching, same as
+# the `kw in text.lower()` checks it replaces; a keyword may sit in many categories.
+KEYWORDS: Dict[str, List[str]] = {
+    # Planning / intent
+    "plan_design": ["create", "design", "build", "generate"],
+    "plan_optimize": ["optimize", "improve", "refine"],
+    "plan_verify": ["simulate", "test", "verify"],
+    "intent_pcb": ["pcb", "board", "circuit board", "led matrix", "sensor board", "motor controller"],
+    "intent_design": ["create", "design", "build"],
+    "intent_optimize": ["optimize", "improve"],
+    "intent_verify": ["simulate", "test"],
+    "intent_explain": ["explain", "how"],
+    "pcb_request": ["pcb", "board", "circuit board"],
+    "service_design": ["create", "design", "generate"],
+    "service_optimize": ["optimize"],
+    "service_simulate": ["simulate", "emulate"],
+
+    # Components and their details
+    "adder": ["adder"],
+    "alu": ["alu"],
+    "multiplier": ["multiplier"],
+    "fsm": ["fsm", "state machine"],
+    "uart": ["uart"],
+    "shift_register": ["shift register", "shifter"],
+    "counter": ["counter"],
+    "fifo": ["fifo", "buffer"],
+    "fsm_traffic": ["traffic"],
+    "fsm_vending": ["vending"],
+    "width_4": ["4-bit", "4 bit"],
+    "width_8": ["8-bit", "8 bit"],
+    "shift_left": ["left"],
+    "has_reset": ["reset"],
+    "has_enable": ["enable"],
+
+    # Constraints
+    "goal_area": ["low power", "minimal area"],
+    "goal_speed": ["fast", "high performance"],
+    "timing": ["timing"],
+
+    # Image generation
+    "hardware": [
+        "adder", "alu", "counter", "fsm", "breadboard", "schematic", "circuit", "register", "uart",
+        "mux", "demux", "flip-flop", "logic gate", "hardware", "design", "bit", "fpga", "asic",
+        "rtl", "verilog",
+    ],
+    "hardware_context": ["hardware", "rtl", "verilog", "circuit", "fpga"],
+    "visual": ["diagram", "schematic", "architecture", "flowchart", "circuit", "block diagram"],
+    "diagram_architecture": ["architecture", "system"],
+    "diagram_flowchart": ["flowchart", "flow"],
+    "diagram_circuit": ["circuit", "schematic"],
+    "diagram_block": ["block"],
+    "breadboard_part": [
+        "ripple-carry-adder", "ripple-adder", "carry-lookahead", "full-adder", "half-adder", "adder",
+        "alu", "counter", "register", "uart", "mux", "demux", "flip-flop",
+    ],
+    "image_topic": ["adder", "alu", "counter", "mux", "demux", "flip-flop", "register", "uart"],
+}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting every (possibly overlapping) keyword occurrence"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+
+        for keyword in set(keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(keyword)
+
+        # Breadth-first failure links; outputs inherit from their fallback state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and ch not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[str, int]]:
+        """Single pass over text; returns (keyword, start) for every occurrence"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword in out[state]:
+                found.append((keyword, i - len(keyword) + 1))
+        return found
+
+
+class LexiconMatches:
+    """Result of one scan: matched categories with keyword positions"""
+
+    def __init__(self, text: str, categories: Dict[str, List[Tuple[str, int]]]):
+        self.text = text
+        # Read-only: scan() results are cached and shared between callers
+        self.categories: Mapping[str, Tuple[Tuple[str, int], ...]] = MappingProxyType(
+            {category: tuple(hits) for category, hits in categories.items()}
+        )
+
+    def has(self, *categories: str) -> bool:
+        """True if any of the given categories matched"""
+        return any(c in self.categories for c in categories)
+
+    def keywords(self, category: str) -> List[str]:
+        """Distinct matched keywords for a category, in order of first appearance"""
+        seen: List[str] = []
+        for keyword, _ in self.categories.get(category, []):
+            if keyword not in seen:
+                seen.append(keyword)
+        return seen
+
+    def first(self, category: str, priority: Iterable[str]) -> str:
+        """First keyword from a priority list that matched in the category, or ''"""
+        matched = {keyword for keyword, _ in self.categories.get(category, [])}
+        for keyword in priority:
+            if keyword in matched:
+                return keyword
+        return ""
+
+    def to_dict(self) -> Dict[str, List[Dict[str, int]]]:
+        """JSON-friendly view: category -> [{keyword, start, end}]"""
+        return {
+            category: [{"keyword": kw, "start": start, "end": start + len(kw)} for kw, start in hits]
+            for category, hits in self.categories.items()
+        }
+
+
+class Lexicon:
+    """Keyword categories compiled into a single automaton"""
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self._by_keyword: Dict[str, List[str]] = {}
+        for category, words in keywords.items():
+            for word in words:
+                self._by_keyword.setdefault(word.lower(), []).append(category)
+        self._automaton = KeywordAutomaton(self._by_keyword)
+
+    def scan(self, text: str) -> LexiconMatches:
+        """Lower-case the text once and report every matched category"""
+        lowered = text.lower()
+        categories: Dict[str, List[Tuple[str, int]]] = {}
+        for keyword, start in self._automaton.find_all(lowered):
+            for category in self._by_keyword[keyword]:
+                categories.setdefault(category, []).append((keyword, start))
+        return LexiconMatches(lowered, categories)
+
+
+LEXICON = Lexicon(KEYWORDS)
+
+
+@lru_cache(maxsize=1024)
+def scan(text: str) -> LexiconMatches:
+    """Scan with the shared lexicon; repeated analysis of the same text is free"""
+    return LEXICON.scan(text)
@@ -0,0 +1,210 @@
+"""Persistence Queue - write-behind for chat history and the design library, batched off the request path"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.tracing import tracer
+
+
+# Queued by stop(); the writer exits once everything before it is written
+_STOP = ("stop", None)
+
+DEAD_LETTER_FILE = os.getenv(
+    "PERSIST_DEAD_LETTER_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "persist_dead_letters.jsonl")
+)
+
+
+class PersistenceQueue:
+    """
+    Requests enqueue writes and move on; one worker drains the queue in
+    batches. A batch closes after max_batch items or flush_interval_ms,
+    whichever comes first. Chat messages in a batch go to SQLite in a single
+    transaction; if that keeps failing, rows are written one by one and only
+    the rows that still fail go to a dead-letter file. Designs land in the
+    shared library at enqueue time; the library file is only an export of it,
+    rewritten at most once per library_interval and on stop(). stop() drains
+    everything still queued, so a clean shutdown loses nothing.
+    """
+
+    def __init__(
+        self,
+        db_manager,
+        memory_manager,
+        max_batch: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        retries: Optional[int] = None,
+        library_interval: Optional[float] = None,
+        dead_letter_file: Optional[str] = None
+    ):
+        self.db = db_manager
+        self.memory = memory_manager
+        self.max_batch = max_batch or int(os.getenv("PERSIST_BATCH_SIZE", "64"))
+        self.flush_interval = (flush_interval_ms or float(os.getenv("PERSIST_FLUSH_MS", "50"))) / 1000.0
+        self.retries = retries if retries is not None else int(os.getenv("PERSIST_RETRIES", "3"))
+        self.library_interval = (
+            library_interval if library_interval is not None else float(os.getenv("PERSIST_LIBRARY_INTERVAL", "30"))
+        )
+        self.dead_letter_file = dead_letter_file or DEAD_LETTER_FILE
+        self._unexported = 0
+        self._last_export = float("-inf")
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or int(os.getenv("PERSIST_MAX_QUEUE", "10000")))
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "messages": 0, "designs": 0, "batches": 0, "library_writes": 0,
+            "retries": 0, "row_fallbacks": 0, "dead_lettered": 0, "dropped": 0,
+        }
+
+    async def save_message(
+        self,
+        session_id: str,
+        role: str,
+        message: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Queue a chat message; only waits when the queue is full (backpressure)"""
+        await self._queue.put(("message", (session_id, datetime.utcnow().isoformat(), role, message, metadata)))
+
+    async def save_design(self, session_id: str, design_data: Dict[str, Any]):
+        """Add a design to the library now (searchable at once) and queue the file write"""
+        await asyncio.to_thread(self.memory.record_design, session_id, design_data)
+        await self._queue.put(("design", None))
+
+    def start(self):
+        """Start the writer (call from the startup hook)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self):
+        """
+        Wait until everything queued before this call has been written. A marker
+        goes in behind the current tail, so writes queued later never extend the
+        wait (queue.join() would, indefinitely under steady load).
+        """
+        if self._task is None:
+            await self._drain()
+            return
+        marker = asyncio.get_running_loop().create_future()
+        await self._queue.put(("flush", marker))
+        await marker
+
+    async def stop(self):
+        """Flush what is queued, then stop the writer (call from the shutdown hook)"""
+        if self._task is not None:
+            # A sentinel rather than cancel(): the writer finishes its batch and exits cleanly
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+        await self._drain()
+        if self._unexported:
+            await self._export_library()
+
+    async def _drain(self):
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write_batch(batch)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._write_batch(batch)
+            if batch[-1] is _STOP:
+                return
+
+    async def _write_batch(self, batch: List[Tuple[str, Any]]):
+        rows = [payload for kind, payload in batch if kind == "message"]
+        self._unexported += sum(1 for kind, _ in batch if kind == "design")
+        try:
+            if rows:
+                with tracer.span("db.save_messages", rows=len(rows)):
+                    if await self._with_retries(lambda: self.db.save_messages(rows)):
+                        self.stats["messages"] += len(rows)
+                    else:
+                        await self._write_rows_individually(rows)
+            if self._unexported and time.monotonic() - self._last_export >= self.library_interval:
+                await self._export_library()
+            self.stats["batches"] += 1
+        finally:
+            for kind, payload in batch:
+                if kind == "flush" and not payload.done():
+                    payload.set_result(None)
+                self._queue.task_done()
+
+    async def _write_rows_individually(self, rows: List[Tuple]):
+        """One bad row (or session) must not take the rest of its batch down with it"""
+        self.stats["row_fallbacks"] += 1
+        failed = []
+        for row in rows:
+            try:
+                await self.db.save_messages([row])
+                self.stats["messages"] += 1
+            except Exception as e:
+                failed.append((row, e))
+        if failed:
+            await self._dead_letter(failed)
+
+    async def _dead_letter(self, failed: List[Tuple[Tuple, Exception]]):
+        """Append rows that could not be written to a JSONL file for later replay"""
+        lines = "".join(
+            json.dumps({
+                "session_id": session_id, "timestamp": timestamp, "role": role,
+                "message": message, "metadata": metadata, "error": str(error),
+            }, default=str) + "\n"
+            for (session_id, timestamp, role, message, metadata), error in failed
+        )
+
+        def append():
+            os.makedirs(os.path.dirname(self.dead_letter_file) or ".", exist_ok=True)
+            with open(self.dead_letter_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+        try:
+            await asyncio.to_thread(append)
+            self.stats["dead_lettered"] += len(failed)
+            print(f"⚠️ {len(failed)} chat row(s) could not be saved; kept in {self.dead_letter_file}")
+        except Exception as e:
+            self.stats["dropped"] += len(failed)
+            print(f"❌ Could not dead-letter {len(failed)} chat row(s), dropped: {e}")
+
+    async def _export_library(self):
+        designs, self._unexported = self._unexported, 0
+        self._last_export = time.monotonic()
+        with tracer.span("memory.persist", designs=designs):
+            if await self._with_retries(self.memory.persist):
+                self.stats["designs"] += designs
+                self.stats["library_writes"] += 1
+            else:
+                # The designs are safe in the shared library; only the file export is stale
+                self._unexported += designs
+
+    async def _with_retries(self, write) -> bool:
+        delay = 0.1
+        for attempt in range(self.retries + 1):
+            try:
+                await write()
+                return True
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"❌ Persistence write failed after {attempt + 1} attempts: {e}")
+                    return False
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": self._queue.qsize(), "max_queue": self._queue.maxsize}
@@ -0,0 +1,137 @@
+"""Render Pool - matplotlib work runs in warm worker processes instead of on the event loop"""
+import asyncio
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from utils.startup import env_modules, preload
+from utils.tracing import tracer
+
+
+# Modules every worker imports up front so the first real job doesn't pay for
+# them (the drawing modules import matplotlib lazily). RENDER_PRELOAD="" turns
+# the warm-up off for faster worker spawn.
+PRELOAD_MODULES = tuple(env_modules(
+    "RENDER_PRELOAD",
+    "matplotlib.pyplot,matplotlib.patches,numpy,utils.formatting,utils.block_diagram,agents.image_agent"
+))
+
+
+# How long a producer waits for a render slot before giving up on the image;
+# well inside the render stage timeout so the rest of the reply isn't held up
+RENDER_WAIT_TIMEOUT = float(os.getenv("RENDER_WAIT_TIMEOUT", "10"))
+
+
+class RenderQueueFull(Exception):
+    """No render slot freed up within the caller's wait budget"""
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    """
+    Picklable job: target is "module:qualname" of a synchronous function that
+    returns PNG bytes or writes to a path given in its args
+    """
+    target: str
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+
+def _init_worker(modules: Tuple[str, ...]):
+    import matplotlib
+    matplotlib.use("Agg")
+    preload(modules)
+
+
+def _resolve(target: str):
+    module_name, qualname = target.split(":", 1)
+    obj: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def run_job(job: RenderJob) -> Any:
+    """Executed inside a worker (or inline when the pool is disabled)"""
+    return _resolve(job.target)(*job.args, **job.kwargs)
+
+
+def _warm() -> int:
+    return os.getpid()
+
+
+class RenderPool:
+    """
+    ProcessPoolExecutor with Agg-preloaded workers and a bounded number of
+    in-flight jobs; callers past the bound wait for a slot (backpressure).
+    Workers use the spawn start method: forking a process that is running an
+    event loop and SQLite threads is unsafe, and spawn is what Windows uses anyway.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers if workers is not None else int(
+            os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1)))
+        )
+        self.max_pending = max_pending or int(os.getenv("RENDER_MAX_PENDING", str(max(1, self.workers) * 4)))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"jobs": 0, "inline": 0, "waited": 0, "rejected": 0, "restarts": 0}
+
+    def start(self):
+        """Create the workers and warm them (startup hook); workers=0 renders inline"""
+        if self._executor is not None or self.workers <= 0:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(PRELOAD_MODULES,),
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_warm)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, job: RenderJob, wait_timeout: Optional[float] = None) -> Any:
+        """Run a job in the pool; waits for a free slot first, up to wait_timeout"""
+        with tracer.span("render", target=job.target, inline=self._executor is None):
+            return await self._render(job, wait_timeout)
+
+    async def _render(self, job: RenderJob, wait_timeout: Optional[float]) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        if self._slots.locked():
+            self.stats["waited"] += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), wait_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise RenderQueueFull(f"{self.max_pending} renders already in flight")
+        try:
+            self.stats["jobs"] += 1
+            if self._executor is None:
+                self.stats["inline"] += 1
+                return run_job(job)
+            executor = self._executor
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, run_job, job)
+            except BrokenProcessPool:
+                # A worker died (segfault, OOM kill); this job fails but the
+                # next one gets a fresh pool instead of the same error forever
+                if self._executor is executor:
+                    self.stats["restarts"] += 1
+                    self.shutdown()
+                    self.start()
+                raise
+        finally:
+            self._slots.release()
+
+
+render_pool = RenderPool()
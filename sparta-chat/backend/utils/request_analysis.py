@@ -0,0 +1,272 @@
+"""Request Analysis - one shared parse of the user message per chat turn"""
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+from utils.intent_classifier import IntentClassifier
+from utils.lexicon import LexiconMatches, scan
+from utils.spec_grammar import Parameter, apply_parameters, extract_parameters, first_values
+
+
+# Model predictions below this confidence fall back to the keyword rules
+CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.8"))
+
+_classifier: Optional[IntentClassifier] = None
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and collapse whitespace so trivially different prompts share an analysis"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def detect_intent(matches: LexiconMatches) -> str:
+    """Detect primary user intent"""
+    if matches.has("intent_pcb"):
+        return "pcb_design"
+    elif matches.has("intent_design"):
+        return "design_creation"
+    elif matches.has("intent_optimize"):
+        return "optimization"
+    elif matches.has("intent_verify"):
+        return "verification"
+    elif matches.has("intent_explain"):
+        return "explanation"
+    else:
+        return "general_query"
+
+
+# Component -> lexicon category, in rule priority order
+COMPONENT_RULES = (
+    ("adder", "adder"),
+    ("alu", "alu"),
+    ("multiplier", "multiplier"),
+    ("fsm", "fsm"),
+    ("uart_tx", "uart"),
+    ("shift_register", "shift_register"),
+    ("counter", "counter"),
+    ("fifo", "fifo"),
+)
+
+
+def detect_component(matches: LexiconMatches) -> str:
+    """First component whose keywords matched, or generic_design"""
+    for component, category in COMPONENT_RULES:
+        if matches.has(category):
+            return component
+    return "generic_design"
+
+
+def parse_spec(
+    matches: LexiconMatches,
+    component: Optional[str] = None,
+    parameters: Optional[List[Parameter]] = None
+) -> Dict[str, Any]:
+    """Rule-based hardware spec extraction (component, widths, constraints)"""
+    spec = {
+        "intent": "design_creation",
+        "confidence": 0.85
+    }
+    component = component or detect_component(matches)
+    
+    # Component details
+    if component == "adder":
+        spec["component"] = "adder"
+        spec["bit_width"] = 4 if matches.has("width_4") else 8
+        spec["description"] = "Arithmetic adder circuit"
+    elif component == "alu":
+        spec["component"] = "alu"
+        spec["bit_width"] = 8 if matches.has("width_8") else 16
+        spec["operations"] = ["ADD", "SUB", "AND", "OR", "XOR"]
+        spec["description"] = "Arithmetic Logic Unit"
+    elif component == "multiplier":
+        spec["component"] = "multiplier"
+        spec["bit_width"] = 8
+        spec["description"] = "Integer multiplier"
+    elif component == "fsm":
+        spec["component"] = "fsm"
+        if matches.has("fsm_traffic"):
+            spec["states"] = ["RED", "YELLOW", "GREEN", "WALK"]
+            spec["num_states"] = 4
+            spec["description"] = "Traffic Light Controller FSM"
+        elif matches.has("fsm_vending"):
+            spec["states"] = ["IDLE", "COIN_5", "COIN_10", "DISPENSE"]
+            spec["num_states"] = 4
+            spec["description"] = "Vending Machine FSM"
+        else:
+            spec["states"] = ["IDLE", "LOAD", "PROCESS", "DONE"]
+            spec["num_states"] = 4
+            spec["description"] = "Generic Finite State Machine"
+    elif component == "uart_tx":
+        spec["component"] = "uart_tx"
+        spec["baud_rate"] = 115200
+        spec["data_bits"] = 8
+        spec["stop_bits"] = 1
+        spec["description"] = "UART Transmitter"
+    elif component == "shift_register":
+        spec["component"] = "shift_register"
+        spec["bit_width"] = 8 if matches.has("width_8") else 4
+        spec["shift_direction"] = "left" if matches.has("shift_left") else "right"
+        spec["description"] = "Shift Register with Parallel Load"
+    elif component == "counter":
+        spec["component"] = "counter"
+        spec["bit_width"] = 8 if matches.has("width_8") else 4
+        spec["has_reset"] = matches.has("has_reset")
+        spec["has_enable"] = matches.has("has_enable")
+        spec["description"] = "Up Counter"
+    elif component == "fifo":
+        spec["component"] = "fifo"
+        spec["depth"] = 16
+        spec["data_width"] = 8
+        spec["description"] = "FIFO Buffer"
+    else:
+        spec["component"] = "generic_design"
+        spec["description"] = "Custom hardware component"
+    
+    # Constraints
+    spec["constraints"] = {}
+    if matches.has("goal_area"):
+        spec["constraints"]["optimization_goal"] = "area"
+    if matches.has("goal_speed"):
+        spec["constraints"]["optimization_goal"] = "speed"
+    
+    if parameters is None:
+        parameters = extract_parameters(matches.text)
+    warnings = apply_parameters(spec, first_values(parameters))
+    if warnings:
+        spec["warnings"] = warnings
+    return spec
+
+
+def _read_only(value: Any) -> Any:
+    """Recursively freeze dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({k: _read_only(v) for k, v in value.items()})
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_read_only(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_read_only(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Independent mutable (and JSON-friendly) copy of a _read_only value"""
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_thaw(v) for v in value))
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+@dataclass(frozen=True)
+class RequestAnalysis:
+    """
+    Everything derived from the message text, computed once and shared by all
+    agents. Analyses are cached and handed to every request with the same text,
+    so the mapping fields are frozen into read-only views; spec_copy() and
+    to_dict() return mutable copies.
+    """
+    normalized: str
+    matches: LexiconMatches
+    intent: str
+    component: str
+    parameters: Mapping[str, Any] = field(default_factory=dict)
+    constraints: Mapping[str, Any] = field(default_factory=dict)
+    spec: Mapping[str, Any] = field(default_factory=dict)
+    extracted: Tuple[Parameter, ...] = ()
+    classification: Mapping[str, Any] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        for name in ("parameters", "constraints", "spec", "extracted", "classification"):
+            object.__setattr__(self, name, _read_only(getattr(self, name)))
+    
+    @property
+    def is_pcb(self) -> bool:
+        """PCB requests skip the RTL pipeline"""
+        return "pcb" in self.intent or self.matches.has("pcb_request")
+    
+    def spec_copy(self) -> Dict[str, Any]:
+        """Independent, editable copy of the parsed spec"""
+        return _thaw(self.spec)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly summary for metadata/logging"""
+        return {
+            "normalized": self.normalized,
+            "intent": self.intent,
+            "component": self.component,
+            "parameters": _thaw(self.parameters),
+            "constraints": _thaw(self.constraints),
+            "extracted": [_thaw(p)._asdict() for p in self.extracted],
+            "classification": _thaw(self.classification),
+        }
+
+
+# Spec fields that carry extracted numeric parameters
+NUMERIC_FIELDS = ("bit_width", "num_states", "baud_rate", "data_bits", "stop_bits", "depth", "data_width", "clock_mhz")
+
+
+def set_classifier(classifier: Optional[IntentClassifier]):
+    """Install (or remove) the trained classifier; cached analyses are discarded"""
+    global _classifier
+    _classifier = classifier
+    _analyze_normalized.cache_clear()
+
+
+def load_classifier(path: str) -> bool:
+    """Load a trained .npz model if present; without one the rules are used alone"""
+    if not os.path.exists(path):
+        return False
+    set_classifier(IntentClassifier.load(path))
+    return True
+
+
+def _classify(normalized: str, matches: LexiconMatches) -> Dict[str, Dict[str, Any]]:
+    """Model label per head when confident, otherwise the rule label"""
+    rules = {"intent": detect_intent(matches), "component": detect_component(matches)}
+    predictions = _classifier.predict(normalized) if _classifier is not None else {}
+    known_components = {c for c, _ in COMPONENT_RULES} | {"generic_design"}
+    
+    decided = {}
+    for head, rule_label in rules.items():
+        prediction = predictions.get(head)
+        usable = (
+            prediction is not None
+            and prediction["confidence"] >= CLASSIFIER_THRESHOLD
+            and (head != "component" or prediction["label"] in known_components)
+        )
+        if usable:
+            decided[head] = {**prediction, "source": "model"}
+        else:
+            decided[head] = {"label": rule_label, "source": "rules"}
+            if prediction is not None:
+                decided[head]["model_confidence"] = prediction["confidence"]
+    return decided
+
+
+@lru_cache(maxsize=256)
+def _analyze_normalized(normalized: str) -> RequestAnalysis:
+    matches = scan(normalized)
+    classification = _classify(normalized, matches)
+    extracted = extract_parameters(normalized)
+    spec = parse_spec(matches, classification["component"]["label"], extracted)
+    return RequestAnalysis(
+        normalized=normalized,
+        matches=matches,
+        intent=classification["intent"]["label"],
+        component=spec.get("component", "generic_design"),
+        parameters={k: spec[k] for k in NUMERIC_FIELDS if k in spec},
+        constraints=spec.get("constraints", {}),
+        spec=spec,
+        extracted=extracted,
+        classification=classification,
+    )
+
+
+def analyze_request(text: str) -> RequestAnalysis:
+    """Analyze a message; results are memoized by normalized text in an LRU"""
+    return _analyze_normalized(normalize_text(text))
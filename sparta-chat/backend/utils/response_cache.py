@@ -0,0 +1,97 @@
+"""Response Cache - whole chat responses keyed by normalized request, size- and TTL-bounded"""
+import copy
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from utils.artifact_store import artifact_store
+
+
+# Files a cached response points at; a hit is only valid while they still exist
+_ARTIFACT_RE = re.compile(r"static/generated/[\w.\-]+")
+
+
+def response_key(normalized_message: str, context: Optional[Dict[str, Any]] = None) -> str:
+    """Stable key: normalized message plus the client-supplied context"""
+    payload = json.dumps({"message": normalized_message, "context": context or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def find_artifacts(response: Dict[str, Any]) -> List[str]:
+    """Generated image paths referenced by a response, including its diagram artifacts"""
+    paths = set(_ARTIFACT_RE.findall(response.get("response") or ""))
+    for field in ("visualization", "block_diagram"):
+        path = artifact_store.path_for_url(response.get(field))
+        if path is not None:
+            paths.add(path)
+    return sorted(paths)
+
+
+def relink(response: Dict[str, Any], old_session: str, new_session: str) -> Dict[str, Any]:
+    """Copy of a cached response rewritten for another session (ids and download URLs)"""
+    relinked = copy.deepcopy(response)
+    relinked["session_id"] = new_session
+    links = relinked.get("download_links") or {}
+    suffix = f"/{old_session}"
+    relinked["download_links"] = {
+        name: url[:-len(suffix)] + f"/{new_session}" if url.endswith(suffix) else url
+        for name, url in links.items()
+    } or None
+    return relinked
+
+
+class ResponseCache:
+    """LRU of finished ChatResponses plus the design payload behind their download links"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stale = time.monotonic() - entry["stored_at"] > self.ttl_seconds
+        if stale or not all(os.path.exists(path) for path in entry["artifacts"]):
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, session_id: str, response: Dict[str, Any], design: Optional[Dict[str, Any]]):
+        self._entries[key] = {
+            "session_id": session_id,
+            "response": copy.deepcopy(response),
+            "design": copy.deepcopy(design),
+            "artifacts": find_artifacts(response),
+            "stored_at": time.monotonic(),
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+        }
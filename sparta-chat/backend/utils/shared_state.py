@@ -0,0 +1,337 @@
+"""Shared State - cross-worker key/value, list and counter storage (SQLite by default, Redis optional)"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str)
+
+
+class SharedState(ABC):
+    """
+    State every worker must see: session designs, the design library, id
+    counters. Values are JSON; each backend provides get/set/add/delete,
+    append/list_range/list_length and incr, all atomic across processes.
+    Every call blocks on disk or network: from async code, run it (or a
+    function making several calls) with asyncio.to_thread.
+    """
+
+    def mapping(self, namespace: str, ttl: Optional[float] = None) -> "SharedMapping":
+        """Dict-like view of one namespace"""
+        return SharedMapping(self, namespace, ttl)
+
+    def next_id(self, name: str) -> int:
+        """Next value of a named counter; unique across workers and hosts sharing the backend"""
+        return self.incr("ids", name)
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def add(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set only if absent; True if this call stored it"""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        ...
+
+    @abstractmethod
+    def append(self, namespace: str, key: str, value: Any) -> int:
+        """Append to a list; returns the new length"""
+
+    @abstractmethod
+    def list_range(self, namespace: str, key: str, start: int = 0, stop: int = -1) -> List[Any]:
+        """Items start..stop inclusive; negative indices count from the end (Redis LRANGE)"""
+
+    @abstractmethod
+    def list_length(self, namespace: str, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def incr(self, namespace: str, key: str, amount: int = 1) -> int:
+        ...
+
+    def close(self):
+        pass
+
+
+class SharedMapping:
+    """
+    Dict-style access to one namespace. Values are copies: mutate, then assign
+    back, or other workers never see the change.
+    """
+
+    def __init__(self, state: SharedState, namespace: str, ttl: Optional[float] = None):
+        self.state = state
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.state.get(self.namespace, key)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.state.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self.state.set(self.namespace, key, value, self.ttl)
+
+    def __delitem__(self, key: str):
+        self.state.delete(self.namespace, key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.state.get(self.namespace, key) is not None
+
+
+def _slice(length: int, start: int, stop: int) -> Optional[tuple]:
+    """(offset, count) for an inclusive LRANGE-style range, or None if empty"""
+    if start < 0:
+        start = max(length + start, 0)
+    if stop < 0:
+        stop = length + stop
+    stop = min(stop, length - 1)
+    if start > stop:
+        return None
+    return start, stop - start + 1
+
+
+class SQLiteState(SharedState):
+    """
+    One SQLite file shared by every worker on a host. WAL lets readers run
+    alongside the single writer; counters and set-if-absent run inside
+    BEGIN IMMEDIATE so they stay atomic across processes. Expired keys are
+    ignored on read and purged when the store opens.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Reconnect in a forked child: SQLite handles must not cross fork()
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lists (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_lists_key ON lists(namespace, key, seq)")
+            conn.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _transaction(self, mode: str = "IMMEDIATE") -> "_Transaction":
+        return _Transaction(self._connection(), mode)
+
+    @staticmethod
+    def _expiry(ttl: Optional[float]) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM kv WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, _dumps(value), self._expiry(ttl))
+            )
+
+    def add(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM kv WHERE namespace = ? AND key = ? AND expires_at < ?",
+                (namespace, key, time.time())
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, _dumps(value), self._expiry(ttl))
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, namespace: str, key: str):
+        with self._lock, self._transaction() as conn:
+            conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.execute("DELETE FROM lists WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def append(self, namespace: str, key: str, value: Any) -> int:
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO lists (namespace, key, value) VALUES (?, ?, ?)",
+                (namespace, key, _dumps(value))
+            )
+            return self._length(conn, namespace, key)
+
+    def list_range(self, namespace: str, key: str, start: int = 0, stop: int = -1) -> List[Any]:
+        # DEFERRED: a read snapshot, so the count and the rows agree without
+        # taking the write lock away from other workers
+        with self._lock, self._transaction("DEFERRED") as conn:
+            window = _slice(self._length(conn, namespace, key), start, stop)
+            if window is None:
+                return []
+            rows = conn.execute(
+                "SELECT value FROM lists WHERE namespace = ? AND key = ? ORDER BY seq LIMIT ? OFFSET ?",
+                (namespace, key, window[1], window[0])
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def list_length(self, namespace: str, key: str) -> int:
+        with self._lock:
+            return self._length(self._connection(), namespace, key)
+
+    @staticmethod
+    def _length(conn: sqlite3.Connection, namespace: str, key: str) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM lists WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()[0]
+
+    def incr(self, namespace: str, key: str, amount: int = 1) -> int:
+        with self._lock, self._transaction() as conn:
+            row = conn.execute(
+                "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            value = (json.loads(row[0]) if row else 0) + amount
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, NULL)",
+                (namespace, key, _dumps(value))
+            )
+            return value
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _Transaction:
+    """
+    BEGIN <mode> ... COMMIT (ROLLBACK on error). IMMEDIATE takes the write lock
+    up front; DEFERRED only reads from one consistent snapshot
+    """
+
+    def __init__(self, conn: sqlite3.Connection, mode: str = "IMMEDIATE"):
+        self.conn = conn
+        self.mode = mode
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute(f"BEGIN {self.mode}")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class RedisState(SharedState):
+    """
+    Redis adapter for workers spread over several hosts. Takes any client
+    with the redis-py command methods (get, set, delete, rpush, lrange,
+    llen, incrby), so a stand-in client works for local testing.
+    """
+
+    def __init__(self, client, prefix: str = "sparta"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "sparta") -> "RedisState":
+        import redis  # optional dependency, only needed for redis:// URLs
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _list_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:list:{namespace}:{key}"
+
+    @staticmethod
+    def _loads(raw) -> Any:
+        if raw is None:
+            return None
+        return json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+    @staticmethod
+    def _ms(ttl: Optional[float]) -> Optional[int]:
+        return max(int(ttl * 1000), 1) if ttl else None
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        return self._loads(self.client.get(self._key(namespace, key)))
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        self.client.set(self._key(namespace, key), _dumps(value), px=self._ms(ttl))
+
+    def add(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self._key(namespace, key), _dumps(value), px=self._ms(ttl), nx=True))
+
+    def delete(self, namespace: str, key: str):
+        self.client.delete(self._key(namespace, key), self._list_key(namespace, key))
+
+    def append(self, namespace: str, key: str, value: Any) -> int:
+        return int(self.client.rpush(self._list_key(namespace, key), _dumps(value)))
+
+    def list_range(self, namespace: str, key: str, start: int = 0, stop: int = -1) -> List[Any]:
+        return [self._loads(raw) for raw in self.client.lrange(self._list_key(namespace, key), start, stop)]
+
+    def list_length(self, namespace: str, key: str) -> int:
+        return int(self.client.llen(self._list_key(namespace, key)))
+
+    def incr(self, namespace: str, key: str, amount: int = 1) -> int:
+        return int(self.client.incrby(self._key(namespace, key), amount))
+
+    def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+
+# backend/db/shared_state.db wherever the server is started from
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db", "shared_state.db")
+
+
+def open_state(url: Optional[str] = None) -> SharedState:
+    """Backend for SHARED_STATE_URL: sqlite:///<path> (default DEFAULT_DB_PATH) or redis://..."""
+    url = url or os.getenv("SHARED_STATE_URL", f"sqlite:///{DEFAULT_DB_PATH}")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisState.from_url(url, os.getenv("SHARED_STATE_PREFIX", "sparta"))
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+shared_state = open_state()
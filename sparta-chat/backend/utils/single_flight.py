@@ -0,0 +1,70 @@
+"""Single Flight - concurrent identical requests share one execution instead of running N times"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+# Event sink as used by the chat pipeline: emit(event_type, payload)
+Listener = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.listeners: List[Listener] = []
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same task and get the same result (or exception). The work runs
+    as its own task so a caller going away does not cancel it for the others.
+    Stage events are broadcast to every caller still attached.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[Listener], Awaitable[Any]],
+        emit: Optional[Listener] = None
+    ) -> Tuple[Any, bool]:
+        """Returns (result, shared); shared is True for callers that joined an existing flight"""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+
+            async def broadcast(event: str, data: Dict[str, Any]):
+                for listener in list(flight.listeners):
+                    await listener(event, data)
+
+            flight.task = asyncio.create_task(func(broadcast))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        flight.waiters += 1
+        if emit is not None:
+            flight.listeners.append(emit)
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if emit is not None:
+                flight.listeners.remove(emit)
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def waiters(self) -> Dict[str, int]:
+        """In-flight keys (shortened) -> number of callers waiting on them"""
+        return {key[:12]: flight.waiters for key, flight in self._flights.items()}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "inflight": self.waiters()}
@@ -0,0 +1,165 @@
+"""Spec Grammar - one precompiled pass extracting typed numeric/list parameters with spans"""
+import re
+from typing import Any, Dict, List, NamedTuple
+
+
+class Parameter(NamedTuple):
+    """One extracted value and where it came from"""
+    name: str
+    value: Any
+    start: int
+    end: int
+    text: str
+
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_SEP = r"\s*(?:of|=|:|is)?\s*"
+_IDENT_LIST = r"([a-z_][\w]*(?:\s*(?:,|/|->|\band\b)\s*[a-z_][\w]*)+)"
+
+# Alternatives are tried left to right at each position; the more specific
+# phrasings sit before the generic N-bit width
+_GRAMMAR = re.compile(
+    "|".join([
+        rf"(?P<data_bits>\b(\d+)\s*data\s*bits?\b|\bdata\s*bits{_SEP}(\d+)\b)",
+        rf"(?P<stop_bits>\b([12])\s*stop\s*bits?\b|\bstop\s*bits?{_SEP}([12])\b)",
+        rf"(?P<baud>\b{_NUM}\s*(k)?\s*(?:baud|bps)\b|\bbaud(?:\s*rate)?{_SEP}{_NUM}\s*(k)?\b)",
+        rf"(?P<clock>\b{_NUM}\s*(ghz|mhz|khz|hz)\b)",
+        rf"(?P<geometry>\b(\d+)\s*x\s*(\d+)\b)",
+        rf"(?P<depth>\bdepth{_SEP}(\d+)\b|\b(\d+)\s*-?\s*(?:deep|entry|entries|words?)\b)",
+        rf"(?P<num_states>\b(\d+)\s*-?\s*states?\b)",
+        rf"(?P<states>\bstates?\s*(?:are|named|called|:|=)?\s*\(?{_IDENT_LIST}\)?)",
+        rf"(?P<operations>\b(?:operations?|ops|supports?|supporting)\s*(?:are|:|=)?\s*\(?{_IDENT_LIST}\)?)",
+        r"(?P<range>\[\s*(\d+)\s*:\s*0\s*\])",
+        rf"(?P<width>\b(\d+)\s*-?\s*bits?\b(?:\s*wide)?|\b(?:bit\s*-?\s*width|data\s*width|width){_SEP}(\d+)\b)",
+    ]),
+    re.IGNORECASE,
+)
+
+_CLOCK_SCALE = {"ghz": 1000.0, "mhz": 1.0, "khz": 1e-3, "hz": 1e-6}
+
+OPERATIONS = {
+    "add", "sub", "and", "or", "xor", "not", "nand", "nor", "xnor", "shl", "shr",
+    "sll", "srl", "sra", "rol", "ror", "mul", "div", "mod", "cmp", "inc", "dec", "pass", "nop",
+}
+
+_STOP_WORDS = {"and", "with", "the", "a", "an", "to", "then"}
+
+# Largest state count taken from a message; matches the FSM encoder's limit
+MAX_STATES = 256
+
+# Widest bus taken from a message; wider values would blow up generated RTL,
+# testbench vectors and waveform dumps
+MAX_WIDTH = 1024
+
+
+def _groups(match: "re.Match", name: str) -> List[str]:
+    """Non-empty sub-groups of one named alternative"""
+    index = _GRAMMAR.groupindex[name]
+    # Sub-groups of an alternative follow its named group until the next named group
+    following = sorted(i for i in _GRAMMAR.groupindex.values() if i > index)
+    stop = following[0] if following else _GRAMMAR.groups + 1
+    return [match.group(i) for i in range(index + 1, stop) if match.group(i) is not None]
+
+
+def _split_list(body: str) -> List[str]:
+    """Split "a, b and c" / "a -> b -> c" / "a/b" into items"""
+    items = []
+    for part in re.split(r"\s*(?:,|/|->)\s*", body):
+        items.extend(p for p in re.split(r"\s+and\s+", part.strip()) if p)
+    return items
+
+
+def _convert(name: str, groups: List[str]) -> Any:
+    if name in ("data_bits", "stop_bits", "num_states", "depth", "width"):
+        return int(groups[0])
+    if name == "range":
+        return int(groups[0]) + 1
+    if name == "baud":
+        value = float(groups[0]) * (1000 if len(groups) > 1 else 1)
+        return int(round(value))
+    if name == "clock":
+        return round(float(groups[0]) * _CLOCK_SCALE[groups[1].lower()], 6)
+    if name == "geometry":
+        return (int(groups[0]), int(groups[1]))
+    if name == "states":
+        items = [s for s in _split_list(groups[0]) if s.lower() not in _STOP_WORDS]
+        return [s.upper() for s in items] if len(items) > 1 else None
+    if name == "operations":
+        items = [s.lower() for s in _split_list(groups[0])]
+        ops = [s.upper() for s in items if s in OPERATIONS]
+        return ops or None
+    return None
+
+
+# Output name for each grammar alternative
+_NAMES = {"range": "width", "clock": "clock_mhz", "baud": "baud_rate"}
+
+
+def extract_parameters(text: str) -> List[Parameter]:
+    """All parameters in the text, in order of appearance"""
+    found = []
+    for match in _GRAMMAR.finditer(text):
+        name = match.lastgroup
+        value = _convert(name, _groups(match, name))
+        if value is None:
+            continue
+        found.append(Parameter(_NAMES.get(name, name), value, match.start(), match.end(), match.group(0)))
+    return found
+
+
+def first_values(parameters: List[Parameter]) -> Dict[str, Any]:
+    """First value per parameter name (the earliest mention wins)"""
+    values: Dict[str, Any] = {}
+    for p in parameters:
+        values.setdefault(p.name, p.value)
+    return values
+
+
+def apply_parameters(spec: Dict[str, Any], values: Dict[str, Any]) -> List[str]:
+    """
+    Explicit numbers and lists from the message override the component defaults.
+    Returns warnings for values that were out of range and therefore ignored.
+    """
+    component = spec.get("component")
+    width = values.get("width")
+    warnings: List[str] = []
+    if width is not None and not 1 <= width <= MAX_WIDTH:
+        warnings.append(f"ignored width {width}: buses support 1 to {MAX_WIDTH} bits")
+        width = None
+    
+    if component == "fifo":
+        if "geometry" in values:
+            depth, data_width = values["geometry"]
+            spec["depth"] = depth
+            if 1 <= data_width <= MAX_WIDTH:
+                spec["data_width"] = data_width
+            else:
+                warnings.append(f"ignored width {data_width}: buses support 1 to {MAX_WIDTH} bits")
+        if "depth" in values:
+            spec["depth"] = values["depth"]
+        if width:
+            spec["data_width"] = width
+    elif component == "uart_tx":
+        for key in ("baud_rate", "data_bits", "stop_bits"):
+            if key in values:
+                spec[key] = values[key]
+    elif component == "fsm":
+        count = len(values["states"]) if "states" in values else values.get("num_states")
+        if count is not None and not 1 <= count <= MAX_STATES:
+            warnings.append(f"ignored state count {count}: FSMs support 1 to {MAX_STATES} states")
+        elif "states" in values:
+            spec["states"] = values["states"]
+            spec["num_states"] = len(values["states"])
+        elif "num_states" in values:
+            spec["num_states"] = values["num_states"]
+            spec["states"] = [f"S{i}" for i in range(values["num_states"])]
+    elif width:
+        spec["bit_width"] = width
+    
+    if component == "alu" and "operations" in values:
+        spec["operations"] = values["operations"]
+    if "clock_mhz" in values:
+        spec["clock_mhz"] = values["clock_mhz"]
+        spec.setdefault("constraints", {})["clock_mhz"] = values["clock_mhz"]
+    
+    return warnings
@@ -0,0 +1,198 @@
+"""Stage Graph - declarative DAG executor; each stage starts as soon as its inputs resolve"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from utils.tracing import tracer
+
+
+class StageError(Exception):
+    """A required stage failed; carries the stage name and the original error"""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class ResourceLimits:
+    """Per-resource-class concurrency caps, shared by every graph run in the process"""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def semaphore(self, resource: str) -> asyncio.Semaphore:
+        if resource not in self._semaphores:
+            self._semaphores[resource] = asyncio.Semaphore(self.limits.get(resource, self.limits.get("default", 8)))
+        return self._semaphores[resource]
+
+
+# CPU renders are matplotlib/plotly work, network is microservice/image calls, db is SQLite/memory I/O
+resource_limits = ResourceLimits({
+    "cpu": int(os.getenv("STAGE_LIMIT_CPU", "2")),
+    "network": int(os.getenv("STAGE_LIMIT_NETWORK", "16")),
+    "db": int(os.getenv("STAGE_LIMIT_DB", "4")),
+    "default": 8,
+})
+
+
+class StageCheckpoint:
+    """
+    Per-turn progress carried across graph runs: results of finished stages and
+    still-running tasks that a failure did not invalidate. A retry run treats
+    the results as provided and adopts the tasks instead of starting them again.
+    """
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.failed: Optional[str] = None
+
+    def discard(self):
+        """Cancel adopted work nobody will collect (turn abandoned)"""
+        for task in self.inflight.values():
+            task.cancel()
+        self.inflight.clear()
+
+
+@dataclass
+class Stage:
+    """One node: func(**{input: result}) under a resource cap and optional timeout"""
+    name: str
+    func: Callable[..., Awaitable[Any]]
+    inputs: Tuple[str, ...] = ()
+    resource: str = "default"
+    timeout: Optional[float] = None
+    optional: bool = False
+
+
+class StageGraph:
+    """
+    Stages declare the names of the results they consume. run() launches every
+    stage at once; each waits only on its own inputs, so independent work
+    overlaps automatically. A failing optional stage yields None for its
+    dependents; a failing required stage cancels the run and raises StageError.
+    """
+
+    def __init__(self, limits: Optional[ResourceLimits] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.limits = limits or resource_limits
+        self.timings: Dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        inputs: Tuple[str, ...] = (),
+        resource: str = "default",
+        timeout: Optional[float] = None,
+        optional: bool = False
+    ) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        self.stages[name] = Stage(name, func, tuple(inputs), resource, timeout, optional)
+        return self
+
+    def _validate(self, provided: Dict[str, Any]):
+        for stage in self.stages.values():
+            for dep in stage.inputs:
+                if dep not in self.stages and dep not in provided:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown input '{dep}'")
+        # Kahn's algorithm: anything left over sits on a cycle
+        pending = {name: [d for d in s.inputs if d in self.stages] for name, s in self.stages.items()}
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError(f"Stage graph has a cycle among {sorted(pending)}")
+            for name in ready:
+                del pending[name]
+            for deps in pending.values():
+                deps[:] = [d for d in deps if d not in ready]
+
+    def downstream(self, name: str) -> Set[str]:
+        """Stages that (transitively) consume name's result, name included"""
+        found = {name}
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.name not in found and found.intersection(stage.inputs):
+                    found.add(stage.name)
+                    changed = True
+        return found
+
+    async def _invoke(self, stage: Stage, kwargs: Dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        with tracer.span(f"stage.{stage.name}", resource=stage.resource) as span:
+            try:
+                async with self.limits.semaphore(stage.resource):
+                    span.set(wait_ms=round((time.perf_counter() - started) * 1000.0, 1))
+                    return await asyncio.wait_for(stage.func(**kwargs), stage.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not stage.optional:
+                    raise StageError(stage.name, e) from e
+                span.status = "error"
+                span.error = f"{type(e).__name__}: {e}"[:200]
+                return None
+            finally:
+                self.timings[stage.name] = round((time.perf_counter() - started) * 1000.0, 1)
+
+    async def run(
+        self,
+        provided: Optional[Dict[str, Any]] = None,
+        on_complete: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        checkpoint: Optional[StageCheckpoint] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute the graph; returns every stage result (plus the provided inputs) by name.
+        With a checkpoint, stages it already holds are skipped, and on a StageError
+        the work that does not depend on the failed stage is kept for the next run.
+        """
+        provided = dict(provided or {})
+        if checkpoint is not None:
+            provided.update(checkpoint.results)
+        self._validate(provided)
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future] = {name: loop.create_future() for name in self.stages}
+        for name, value in provided.items():
+            futures.setdefault(name, loop.create_future()).set_result(value)
+        running: Dict[str, asyncio.Future] = {}
+
+        async def execute(stage: Stage):
+            kwargs = {dep: await futures[dep] for dep in stage.inputs}
+            work = checkpoint.inflight.pop(stage.name, None) if checkpoint is not None else None
+            if work is None:
+                work = asyncio.ensure_future(self._invoke(stage, kwargs))
+            running[stage.name] = work
+            # Shielded so a failing sibling cancels this wrapper, not the work itself
+            result = await asyncio.shield(work)
+            futures[stage.name].set_result(result)
+            if checkpoint is not None:
+                checkpoint.results[stage.name] = result
+            if on_complete is not None and result is not None:
+                await on_complete(stage.name, result)
+
+        tasks = [asyncio.create_task(execute(stage)) for stage in self.stages.values() if stage.name not in provided]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            invalid = self.downstream(e.stage) if isinstance(e, StageError) and checkpoint is not None else None
+            for name, work in running.items():
+                if invalid is not None and name not in invalid and name not in checkpoint.results:
+                    checkpoint.inflight[name] = work
+                else:
+                    work.cancel()
+            if invalid is not None:
+                checkpoint.failed = e.stage
+            raise
+        if checkpoint is not None:
+            checkpoint.failed = None
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,116 @@
+"""Startup - lazy imports for heavy libraries and a per-phase boot-time breakdown"""
+import importlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+
+# First-import cost (ms) of every module loaded through lazy_import/preload
+import_times: Dict[str, float] = {}
+
+
+def _load(name: str):
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times.setdefault(name, round((time.perf_counter() - started) * 1000.0, 1))
+    return module
+
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is read, then imports
+    it. `plt = lazy_import("matplotlib.pyplot")` keeps `plt.figure(...)` call
+    sites unchanged while the import moves off the boot path.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _resolve(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = _load(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def preload(names: Sequence[str]) -> List[str]:
+    """Import modules now (warm-up); returns the ones that failed"""
+    failed = []
+    for name in names:
+        try:
+            _load(name)
+        except Exception as e:
+            print(f"⚠️ Could not preload {name}: {e}")
+            failed.append(name)
+    return failed
+
+
+def preload_in_background(names: Sequence[str]) -> Optional[threading.Thread]:
+    """Warm-up without delaying readiness: import in a daemon thread"""
+    if not names:
+        return None
+    thread = threading.Thread(target=preload, args=(list(names),), name="warm-imports", daemon=True)
+    thread.start()
+    return thread
+
+
+def env_modules(name: str, default: str = "") -> List[str]:
+    """Comma-separated module list from an env var ("" disables)"""
+    return [m.strip() for m in os.getenv(name, default).split(",") if m.strip()]
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of boot: mark() closes a phase measured from the
+    previous mark, phase() times a block. report() is logged once the app is
+    ready, together with any lazy imports that already happened.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.ready_ms: Optional[float] = None
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases[name] = round((now - self._last) * 1000.0, 1)
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._last = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name)
+
+    def ready(self) -> str:
+        """Record time-to-ready and return the log line"""
+        self.ready_ms = round((time.perf_counter() - self.started) * 1000.0, 1)
+        return self.report()
+
+    def report(self) -> str:
+        parts = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.phases.items())
+        line = f"⏱️ Ready in {self.ready_ms or 0:.0f}ms ({parts})"
+        if import_times:
+            line += " | lazy imports: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in import_times.items())
+        return line
+
+    def snapshot(self) -> Dict[str, object]:
+        return {"ready_ms": self.ready_ms, "phases": dict(self.phases), "lazy_imports": dict(import_times)}
@@ -0,0 +1,243 @@
+"""Tracing - per-request span trees, a local span exporter and Prometheus-format metrics"""
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+# Latency buckets (seconds) shared by every span histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class Span:
+    """One timed operation; parent_id links it into its request's tree"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration_ms: float = 0.0
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("sparta_current_span", default=None)
+
+
+class RingBufferExporter:
+    """Keeps the most recent finished spans in memory (served by /traces)"""
+
+    def __init__(self, capacity: int = 2000):
+        self.spans: Deque[Span] = deque(maxlen=capacity)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def recent(self, limit: int = 200, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        spans = [s for s in self.spans if trace_id is None or s.trace_id == trace_id]
+        return [asdict(s) for s in spans[-limit:]]
+
+
+class JSONLExporter:
+    """
+    Appends finished spans as JSON lines from a background writer thread.
+    export() only enqueues, so the event loop never waits on the file; the
+    writer serializes and appends whatever has queued up in one write. When
+    the queue is full (disk stalled) new spans are dropped and counted.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000, flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._writer = threading.Thread(target=self._run, name="span-writer", daemon=True)
+        self._writer.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        closed = False
+        while not closed:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            spans = [s for s in batch if s is not None]
+            closed = len(spans) < len(batch)
+            try:
+                if spans:
+                    lines = "".join(json.dumps(asdict(s), default=str) + "\n" for s in spans)
+                    with open(self.path, "a") as f:
+                        f.write(lines)
+            except Exception as e:
+                print(f"⚠️ Span export failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every span exported so far is written"""
+        if self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer (shutdown hook)"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label value"""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts: Dict[str, List[int]] = defaultdict(lambda: [0] * len(self.buckets))
+        self.sums: Dict[str, float] = defaultdict(float)
+        self.totals: Dict[str, int] = defaultdict(int)
+
+    def observe(self, label: str, seconds: float):
+        counts = self.counts[label]
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                counts[i] += 1
+        self.sums[label] += seconds
+        self.totals[label] += 1
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Tracer:
+    """
+    span() opens a child of whatever span is current in this task (contextvars
+    carry it into tasks created inside it), times it, records errors and hands
+    it to the exporters on exit. Durations feed one histogram keyed by span
+    name; open spans are counted per name for the in-flight gauge.
+    """
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.ring = RingBufferExporter(int(os.getenv("TRACE_BUFFER_SIZE", "2000")))
+        self.exporters = [self.ring] + list(exporters or [])
+        self.durations = Histogram()
+        self.inflight: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._collectors: List[Callable[[], List[Tuple[str, str, Dict[str, Any], float]]]] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_time=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        self.inflight[name] += 1
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            span.error = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            span.duration_ms = round(elapsed * 1000.0, 3)
+            _current_span.reset(token)
+            self.inflight[name] -= 1
+            self.durations.observe(name, elapsed)
+            if span.status != "ok":
+                self.errors[name] += 1
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span)
+                except Exception as e:
+                    print(f"⚠️ Span export failed: {e}")
+
+    def close(self):
+        """Flush and stop exporters that write in the background (shutdown hook)"""
+        for exporter in self.exporters:
+            if hasattr(exporter, "close"):
+                exporter.close()
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def register_collector(self, collector: Callable[[], List[Tuple[str, str, Dict[str, Any], float]]]):
+        """collector() -> [(metric_name, help, labels, value)] gauges added to /metrics"""
+        self._collectors.append(collector)
+
+    def render_metrics(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            "# HELP sparta_span_duration_seconds Span latency by operation",
+            "# TYPE sparta_span_duration_seconds histogram",
+        ]
+        hist = self.durations
+        for name in sorted(hist.totals):
+            for bound, count in zip(hist.buckets, hist.counts[name]):
+                lines.append(f"sparta_span_duration_seconds_bucket{_labels(span=name, le=bound)} {count}")
+            lines.append(f"sparta_span_duration_seconds_bucket{_labels(span=name, le='+Inf')} {hist.totals[name]}")
+            lines.append(f"sparta_span_duration_seconds_sum{_labels(span=name)} {hist.sums[name]:.6f}")
+            lines.append(f"sparta_span_duration_seconds_count{_labels(span=name)} {hist.totals[name]}")
+        lines += ["# HELP sparta_span_errors_total Spans that ended in an error or cancellation", "# TYPE sparta_span_errors_total counter"]
+        lines += [f"sparta_span_errors_total{_labels(span=name)} {count}" for name, count in sorted(self.errors.items())]
+        lines += ["# HELP sparta_inflight Operations currently running", "# TYPE sparta_inflight gauge"]
+        lines += [f"sparta_inflight{_labels(span=name)} {count}" for name, count in sorted(self.inflight.items())]
+
+        gauges: Dict[str, Tuple[str, List[str]]] = {}
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+                continue
+            for metric, help_text, labels, value in samples:
+                entry = gauges.setdefault(metric, (help_text, []))
+                entry[1].append(f"{metric}{_labels(**labels)} {float(value)}")
+        for metric, (help_text, samples) in gauges.items():
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge", *samples]
+        return "\n".join(lines) + "\n"
+
+
+def _build_tracer() -> Tracer:
+    path = os.getenv("TRACE_EXPORT_PATH")
+    return Tracer([JSONLExporter(path)] if path else None)
+
+
+tracer = _build_tracer()
@@ -13,6 +13,11 @@ from pathlib import Path
 # Backend API URL
 BACKEND_URL = "http://localhost:9000"
 
+
+def asset_url(src):
+    """Diagrams arrive as backend-relative /artifacts URLs (older responses: data URIs)"""
+    return f"{BACKEND_URL}{src}" if src and src.startswith("/") else src
+
 # Page config - Engineering theme
 st.set_page_config(
     page_title="SPARTA | Hardware Design Workstation",
@@ -332,7 +337,7 @@ with col_chat:
             if "visualization" in msg and msg["visualization"]:
                 st.markdown("---")
                 st.markdown("**WAVEFORM ANALYSIS**")
-                st.image(msg["visualization"], use_column_width=True)
+                st.image(asset_url(msg["visualization"]), use_column_width=True)
             
             # Show download links if present
             if "download_links" in msg and msg["download_links"]:
@@ -405,7 +410,7 @@ if prompt := st.chat_input("ENTER DESIGN SPECIFICATION..."):
                         if data.get("visualization"):
                             st.markdown("---")
                             st.markdown("**WAVEFORM ANALYSIS**")
-                            st.image(data["visualization"], use_column_width=True)
+                            st.image(asset_url(data["visualization"]), use_column_width=True)
                         
                         # Show download links
                         if data.get("download_links"):
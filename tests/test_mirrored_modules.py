@@ -0,0 +1,39 @@
+"""Guard modules kept as copies in more than one service.
+
+Each service image only ships its own tree, so a few modules are copied
+rather than imported from shared/. The copies may word their docstrings and
+comments in the local style, but their code must stay identical.
+"""
+import ast
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MIRRORS = [
+    ("sparta-chat/backend/utils/synthesis_cache.py", "agents/synthesis-agent/app/cache.py"),
+    ("sparta-chat/backend/utils/fsm_encoding.py", "agents/synthesis-agent/app/fsm_encoding.py"),
+    ("sparta-chat/backend/utils/lexicon.py", "agents/nlp-agent/app/lexicon.py"),
+    ("sparta-chat/backend/utils/spec_grammar.py", "agents/nlp-agent/app/spec_grammar.py"),
+    ("sparta-chat/backend/utils/fsm_rtl.py", "services/rtl-generator/app/fsm_rtl.py"),
+]
+
+
+def _code(path: Path) -> str:
+    """AST dump of a module with every docstring removed."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            body = node.body
+            if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                node.body = body[1:] or [ast.Pass()]
+    return ast.dump(tree)
+
+
+@pytest.mark.parametrize("original, copy", MIRRORS)
+def test_copies_match(original, copy):
+    """Test that a mirrored module has the same code as its original."""
+    assert _code(ROOT / original) == _code(ROOT / copy), f"{copy} has drifted from {original}"